@@ -0,0 +1,436 @@
+"""
+REST API of the agent and the servers that can host it.
+
+The API runs in one of three modes:
+    dev: Werkzeug development server in a thread of the agent process
+    threaded: waitress production server in a thread of the agent process,
+              with gzip compression, keep-alive and connection/request limits
+    process: a separate Python process serving the SQLite command history,
+             so API load never competes with recognition for the GIL
+
+Run "python -m agent.api --history command_history.db" to start the
+process mode server by hand.
+"""
+import os
+import sys
+import gzip
+import time
+import atexit
+import logging
+import argparse
+import ipaddress
+import threading
+import subprocess
+from flask import Flask, Response, jsonify, request, stream_with_context
+from agent.event_stream import EventBroadcaster, format_sse
+from agent.history_store import HistoryStore, DEFAULT_DB_PATH
+from agent.audio_capture import AudioArchive, DEFAULT_AUDIO_DIR
+
+logger = logging.getLogger("game-agent")
+
+API_MODES = ("dev", "threaded", "process")
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 5000
+
+# Page size limits for the /logs endpoint
+LOGS_DEFAULT_LIMIT = 100
+LOGS_MAX_LIMIT = 1000
+
+# Seconds between keep-alive comments on an idle stream; the slot of a closed
+# dashboard tab is freed when one fails to send
+STREAM_KEEPALIVE = 5
+
+# Production server limits
+# Threads for ordinary requests such as /logs and /health
+SERVER_THREADS = 8
+# Each open /stream response holds a waitress worker thread, so the pool gets
+# one per allowed subscriber on top of SERVER_THREADS; more are refused with 503
+STREAM_MAX_SUBSCRIBERS = int(os.getenv("NO_ALT_TAB_STREAM_CLIENTS", 32))
+CONNECTION_LIMIT = 100
+CHANNEL_TIMEOUT = 30  # seconds an idle keep-alive connection stays open
+MAX_REQUEST_BODY_SIZE = 64 * 1024
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+
+
+def is_loopback(address):
+    """
+    Returns:
+        True if the client address is on this machine
+    """
+    try:
+        return ipaddress.ip_address(address).is_loopback
+    except ValueError:
+        return False
+
+
+def create_app(command_logs, command_history, command_events=None, command_stats=None,
+               metrics_registry=None, health=None, audio_archive=None):
+    """
+    Build the Flask app serving the agent's REST API
+
+    Args:
+        command_logs: CommandLogBuffer with the most recent records, or None
+                      to serve everything from command_history
+        command_history: HistoryStore with the persisted records
+        command_events: EventBroadcaster feeding /stream, or None to disable it
+        command_stats: CommandStats for /stats, or None to disable it
+        metrics_registry: MetricsRegistry for /metrics, or None to disable it
+        health: Optional function returning extra /health fields
+        audio_archive: AudioArchive of captured utterances for /audio, or None to disable it
+
+    Returns:
+        The Flask app
+    """
+    app = Flask(__name__)
+
+    def replay(since):
+        # Entries newer than a cursor, for /stream reconnects
+        if command_logs is None:
+            return command_history.query(since=since, limit=LOGS_MAX_LIMIT)
+        return [record.to_dict() for record in command_logs.since(since, LOGS_MAX_LIMIT)]
+
+    @app.route('/logs', methods=['GET'])
+    def get_logs():
+        """
+        Return command logs page by page.
+
+        Query parameters:
+            since: Sequence number cursor; only newer entries are returned.
+                   Without it the newest entries are returned.
+            limit: Maximum number of entries (default 100, at most 1000)
+            start, end: Time range, as "YYYY-MM-DD HH:MM:SS" or a prefix of it
+            handler: Only entries for this command handler
+            status: Only entries with this status (ok, error or rejected)
+
+        Filtered queries and cursors older than the in-memory ring are served
+        from the SQLite history. Unfiltered responses carry an ETag; pollers
+        that send it back in If-None-Match get 304 Not Modified until new
+        entries arrive.
+        """
+        try:
+            since = request.args.get('since', type=int)
+            limit = min(int(request.args.get('limit', LOGS_DEFAULT_LIMIT)), LOGS_MAX_LIMIT)
+        except ValueError:
+            return jsonify({'error': 'since and limit must be integers'}), 400
+        if limit < 1 or (since is not None and since < 0):
+            return jsonify({'error': 'since must be >= 0 and limit >= 1'}), 400
+
+        filters = {key: request.args.get(key) for key in ('start', 'end', 'handler', 'status')}
+        if command_logs is None:
+            first_seq, last_seq = 1, command_history.last_seq()
+        else:
+            first_seq, last_seq = command_logs.first_seq, command_logs.last_seq
+
+        if any(filters.values()) or (since is not None and since + 1 < first_seq):
+            entries = command_history.query(since=since, limit=limit, **filters)
+            # Without a cursor the newest matches come back, so nothing newer is pending
+            next_cursor = entries[-1]['seq'] if entries else (last_seq if since is None else since)
+            return jsonify({
+                'entries': entries,
+                'next_cursor': next_cursor,
+                'has_more': since is not None and len(entries) == limit
+            })
+
+        # The page only depends on the cursor, the limit and which records exist
+        etag = f"{first_seq}-{last_seq}-{since}-{limit}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        if command_logs is None:
+            if since is None:
+                entries = command_history.latest(limit)
+            else:
+                entries = command_history.query(since=since, limit=limit)
+        elif since is None:
+            entries = [record.to_dict() for record in command_logs.latest(limit)]
+        else:
+            entries = [record.to_dict() for record in command_logs.since(since, limit)]
+
+        next_cursor = entries[-1]['seq'] if entries else (last_seq if since is None else max(since, first_seq - 1))
+        response = jsonify({
+            'entries': entries,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor < last_seq
+        })
+        response.set_etag(etag)
+        return response
+
+    if command_events is not None:
+        @app.route('/stream', methods=['GET'])
+        def stream_events():
+            """
+            Push new command log entries as Server-Sent Events.
+
+            Query parameters:
+                partials: Set to 1 to also receive partial transcripts
+
+            Reconnecting clients send Last-Event-ID and first receive the entries
+            they missed. A client that reads too slowly loses the oldest buffered
+            events and is sent a "dropped" event so it can resync through /logs.
+            """
+            partials = request.args.get('partials') == '1'
+            last_event_id = request.headers.get('Last-Event-ID', type=int)
+
+            subscription = command_events.subscribe(partials=partials)
+            if subscription is None:
+                return jsonify({'error': 'too many stream subscribers'}), 503
+
+            def generate():
+                try:
+                    yield "retry: 3000\n\n"
+                    last_sent = 0
+                    if last_event_id is not None:
+                        for entry in replay(last_event_id):
+                            yield format_sse("command", entry, entry['seq'])
+                            last_sent = entry['seq']
+
+                    reported_drops = 0
+                    while not subscription.closed:
+                        event = subscription.get(timeout=STREAM_KEEPALIVE)
+                        if subscription.dropped > reported_drops:
+                            yield format_sse("dropped", {'count': subscription.dropped - reported_drops})
+                            reported_drops = subscription.dropped
+                        if event is None:
+                            yield ": keep-alive\n\n"
+                            continue
+                        event_type, event_id, data = event
+                        if event_type == "command" and event_id <= last_sent:
+                            continue  # already sent while replaying
+                        yield format_sse(event_type, data, event_id)
+                finally:
+                    command_events.unsubscribe(subscription)
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+    if metrics_registry is not None:
+        @app.route('/metrics', methods=['GET'])
+        def get_metrics():
+            """
+            Return agent metrics in the Prometheus text exposition format
+            """
+            return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+    if command_stats is not None:
+        @app.route('/stats', methods=['GET'])
+        def get_stats():
+            """
+            Return command counts, success and error rates, the recognized-versus-rejected
+            ratio and p50/p95/p99 latency, overall and per handler, for the last
+            minute, the last hour and the whole session
+            """
+            return jsonify(command_stats.snapshot())
+
+    if audio_archive is not None:
+        @app.route('/audio/<name>', methods=['GET'])
+        def get_audio(name):
+            """
+            Return the captured audio of a rejected utterance as WAV.
+
+            Files are stored gzipped and sent as they are with
+            Content-Encoding: gzip to clients that accept it. Only clients on
+            this machine may fetch recordings, as the API listens on every interface.
+            """
+            if not is_loopback(request.remote_addr):
+                return jsonify({'error': 'audio is only served to this machine'}), 403
+            data = audio_archive.open(name)
+            if data is None:
+                return jsonify({'error': 'no such audio'}), 404
+            if "gzip" in request.headers.get('Accept-Encoding', ''):
+                return Response(data, mimetype='audio/wav', headers={'Content-Encoding': 'gzip'})
+            return Response(gzip.decompress(data), mimetype='audio/wav')
+
+    @app.route('/health', methods=['GET'])
+    def health_check():
+        status = {'status': 'healthy'}
+        if health is not None:
+            status.update(health())
+        return jsonify(status)
+
+    return app
+
+
+class GzipMiddleware:
+    """
+    WSGI middleware compressing complete responses for clients that accept gzip.
+
+    Streaming responses (Server-Sent Events) and small bodies pass through unchanged.
+    """
+
+    def __init__(self, app, min_size=GZIP_MIN_SIZE, level=5):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+
+    def __call__(self, environ, start_response):
+        if "gzip" not in environ.get("HTTP_ACCEPT_ENCODING", ""):
+            return self.app(environ, start_response)
+
+        captured = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return lambda data: None
+
+        body = self.app(environ, capture)
+        status, headers, exc_info = captured
+        names = {name.lower(): value for name, value in headers}
+        if (names.get("content-type", "").startswith("text/event-stream")
+                or "content-encoding" in names):
+            start_response(status, headers, exc_info)
+            return body
+
+        try:
+            data = b"".join(body)
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+        headers = [(name, value) for name, value in headers if name.lower() != "content-length"]
+        if len(data) >= self.min_size:
+            data = gzip.compress(data, self.level)
+            headers.append(("Content-Encoding", "gzip"))
+            headers.append(("Vary", "Accept-Encoding"))
+        headers.append(("Content-Length", str(len(data))))
+        start_response(status, headers, exc_info)
+        return [data]
+
+
+class HistoryTail:
+    """
+    Publishes records appearing in the SQLite history as "command" events,
+    for /stream in the separate API process
+    """
+
+    def __init__(self, command_history, command_events, interval=0.5):
+        self.command_history = command_history
+        self.command_events = command_events
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="history-tail", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = self.command_history.last_seq()
+        while not self._stop.wait(self.interval):
+            try:
+                entries = self.command_history.query(since=last, limit=LOGS_MAX_LIMIT)
+            except Exception as e:
+                logger.error(f"Failed to read command history: {e}")
+                continue
+            for entry in entries:
+                self.command_events.publish("command", entry, event_id=entry['seq'])
+                last = entry['seq']
+
+
+def create_server(app, host=DEFAULT_HOST, port=DEFAULT_PORT, stream_clients=STREAM_MAX_SUBSCRIBERS):
+    """
+    Build the waitress server for a Flask app; run() serves it, close() stops it
+
+    Args:
+        stream_clients: /stream subscribers the app's EventBroadcaster allows
+
+    Raises:
+        ImportError: If waitress is not installed
+    """
+    from waitress.server import create_server as create_waitress_server
+    # Short request queues under dashboard load are expected, not worth a warning each
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)
+    return create_waitress_server(
+        GzipMiddleware(app), host=host, port=port,
+        threads=SERVER_THREADS + stream_clients,
+        connection_limit=CONNECTION_LIMIT,
+        channel_timeout=CHANNEL_TIMEOUT,
+        max_request_body_size=MAX_REQUEST_BODY_SIZE,
+        ident="no-alt-tab"
+    )
+
+
+def serve(app, mode="threaded", host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Serve a Flask app in the calling thread
+
+    Args:
+        app: The Flask app
+        mode: "dev" for the Werkzeug development server, "threaded" for waitress
+        host: Interface to listen on
+        port: TCP port
+    """
+    if mode == "threaded":
+        try:
+            server = create_server(app, host, port)
+        except ImportError:
+            logger.warning("waitress is not installed, falling back to the development API server")
+        else:
+            logger.info(f"Serving API with waitress on {host}:{port}")
+            server.run()
+            return
+    app.run(host=host, port=port, threaded=True)
+
+
+def start_api_process(history_path, host=DEFAULT_HOST, port=DEFAULT_PORT, audio_dir=None):
+    """
+    Start the API in a separate process reading the SQLite command history
+    and, if audio_dir is given, the captured utterance audio
+
+    Returns:
+        The subprocess.Popen of the API server; it is terminated at exit
+    """
+    command = [sys.executable, "-m", "agent.api", "--history", history_path, "--host", host, "--port", str(port)]
+    if audio_dir:
+        command += ["--audio-dir", audio_dir]
+    process = subprocess.Popen(command)
+    logger.info(f"Started API server process with PID {process.pid}")
+
+    def stop():
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    atexit.register(stop)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the agent's command history over HTTP")
+    parser.add_argument("--history", default=DEFAULT_DB_PATH, help="SQLite command history file")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--server", choices=("dev", "threaded"), default="threaded")
+    parser.add_argument("--audio-dir", default=DEFAULT_AUDIO_DIR, help="Captured utterance audio directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    started = time.time()
+    command_history = HistoryStore(args.history, writer=False)
+    command_events = EventBroadcaster(max_subscribers=STREAM_MAX_SUBSCRIBERS)
+    HistoryTail(command_history, command_events).start()
+    audio_archive = None
+    if os.path.isdir(args.audio_dir):
+        audio_archive = AudioArchive(args.audio_dir, writer=False)
+    app = create_app(None, command_history, command_events,
+                     health=lambda: {'mode': 'process', 'uptime': round(time.time() - started, 1)},
+                     audio_archive=audio_archive)
+    serve(app, args.server, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Capture of the audio behind rejected and low-confidence utterances.
+
+The listen loop hands every chunk to an UtteranceRecorder, which only keeps
+references in a bounded deque. When a transcript is rejected its chunks are
+queued to an AudioArchive, whose writer thread encodes them as gzipped WAV
+files and evicts the least recently used files to stay under a size quota.
+"""
+import io
+import os
+import gzip
+import time
+import wave
+import queue
+import logging
+import threading
+from collections import deque, OrderedDict
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_AUDIO_DIR = "rejected_audio"
+DEFAULT_QUOTA_BYTES = 50 * 1024 * 1024
+AUDIO_SUFFIX = ".wav.gz"
+
+# Chunks carried over from before an utterance and the longest utterance kept
+DEFAULT_PRE_ROLL_CHUNKS = 2
+DEFAULT_MAX_CHUNKS = 60
+
+# Utterances waiting to be written; more are dropped rather than buffered
+WRITE_QUEUE_SIZE = 32
+
+
+class UtteranceRecorder:
+    """
+    Keeps the PCM chunks of the current utterance plus a short pre-roll
+    """
+
+    def __init__(self, pre_roll_chunks=DEFAULT_PRE_ROLL_CHUNKS, max_chunks=DEFAULT_MAX_CHUNKS):
+        """
+        Args:
+            pre_roll_chunks: Chunks from the end of the previous utterance kept
+                             at the start of the next one
+            max_chunks: Maximum chunks per utterance; older ones are discarded
+        """
+        self.pre_roll_chunks = pre_roll_chunks
+        self._chunks = deque(maxlen=max_chunks)
+
+    def add(self, chunk):
+        self._chunks.append(chunk)
+
+    def finish(self):
+        """
+        End the current utterance
+
+        Returns:
+            List of the utterance's chunks, including the pre-roll
+        """
+        chunks = list(self._chunks)
+        self._chunks.clear()
+        if self.pre_roll_chunks:
+            self._chunks.extend(chunks[-self.pre_roll_chunks:])
+        return chunks
+
+
+def encode_wav(chunks, rate, sample_width=2, channels=1):
+    """
+    Returns:
+        WAV file bytes of the PCM chunks
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(rate)
+        wav.writeframes(b"".join(chunks))
+    return buffer.getvalue()
+
+
+class AudioArchive:
+    """
+    Directory of gzipped WAV files kept under a size quota.
+
+    Files are evicted least recently used first; serving a file through
+    open() counts as a use.
+    """
+
+    def __init__(self, directory=DEFAULT_AUDIO_DIR, quota_bytes=DEFAULT_QUOTA_BYTES, rate=16000,
+                 sample_width=2, channels=1, writer=True):
+        """
+        Args:
+            directory: Where the audio files are stored
+            quota_bytes: Maximum total size of the stored files
+            rate, sample_width, channels: PCM format of the chunks
+            writer: Start the writer thread; read-only users pass False
+        """
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self.rate = rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._files = OrderedDict()
+        self._total = 0
+        self._counter = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._thread = None
+        if writer:
+            self._thread = threading.Thread(target=self._run, name="audio-writer", daemon=True)
+            self._thread.start()
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(AUDIO_SUFFIX):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._total += size
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def names(self):
+        """
+        Returns:
+            Stored file names, least recently used first
+        """
+        with self._lock:
+            return list(self._files)
+
+    def new_name(self):
+        """
+        Returns:
+            A unique file name for an utterance captured now
+        """
+        with self._lock:
+            self._counter += 1
+            return time.strftime("%Y%m%d-%H%M%S") + f"-{self._counter:04d}{AUDIO_SUFFIX}"
+
+    def save_async(self, chunks, name=None):
+        """
+        Queue an utterance for writing without blocking
+
+        Args:
+            chunks: List of PCM chunks
+            name: File name, see new_name()
+
+        Returns:
+            The file name, or None if the write queue is full
+        """
+        name = name or self.new_name()
+        try:
+            self._queue.put_nowait((name, chunks))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Audio capture queue is full, dropped utterance ({self.dropped} so far)")
+            return None
+        return name
+
+    def flush(self):
+        """
+        Wait until every queued utterance is written
+        """
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            name, chunks = self._queue.get()
+            try:
+                self._write(name, chunks)
+            except Exception as e:
+                logger.error(f"Failed to write captured audio {name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, name, chunks):
+        data = gzip.compress(encode_wav(chunks, self.rate, self.sample_width, self.channels), 6)
+        path = os.path.join(self.directory, name)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._total += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+            evicted = []
+            while self._total > self.quota_bytes and len(self._files) > 1:
+                old_name, size = self._files.popitem(last=False)
+                self._total -= size
+                evicted.append(old_name)
+
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old_name))
+            except OSError as e:
+                logger.warning(f"Could not remove captured audio {old_name}: {e}")
+        logger.debug(f"Captured audio {name} ({len(data)} bytes, {len(evicted)} evicted)")
+
+    def open(self, name):
+        """
+        Read a stored file and mark it as recently used
+
+        Returns:
+            Gzipped WAV bytes, or None if there is no such file
+        """
+        if os.path.basename(name) != name or not name.endswith(AUDIO_SUFFIX):
+            return None
+        with self._lock:
+            if name in self._files:
+                self._files.move_to_end(name)
+        # Files written by another process are not in the index but can still be read
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
@@ -0,0 +1,151 @@
+"""
+Fixed-capacity, thread-safe ring buffer of command log records
+"""
+import logging
+import threading
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_CAPACITY = 1000
+
+# Outcome of a processed transcript
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_REJECTED = "rejected"
+
+# Handlers report failures by returning a message starting with one of these
+ERROR_RESULT_PREFIXES = ("Error", "Failed", "Could not")
+
+
+class CommandLogRecord:
+    """
+    One processed transcript and what the agent did with it
+    """
+
+    __slots__ = ("seq", "timestamp", "transcript", "command", "confidence", "result", "status", "audio")
+
+    def __init__(self, timestamp, transcript, command=None, confidence=0, result=None, status=None, audio=None):
+        self.seq = 0
+        self.timestamp = timestamp
+        self.transcript = transcript
+        self.command = command
+        self.confidence = confidence
+        self.result = result
+        self.status = status
+        # File name of the captured utterance audio, if it was kept
+        self.audio = audio
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def result_status(result):
+    """
+    Classify a handler's result message as ok or error
+    """
+    if not result or str(result).startswith(ERROR_RESULT_PREFIXES):
+        return STATUS_ERROR
+    return STATUS_OK
+
+
+class CommandLogBuffer:
+    """
+    Keeps the most recent command log records in a preallocated ring.
+
+    Every appended record gets a monotonically increasing sequence number.
+    When the ring is full the oldest record is handed to the spill callback
+    (if any) and overwritten, so memory use stays flat however long the agent runs.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, spill=None, start_seq=1):
+        """
+        Args:
+            capacity: Maximum number of records kept in memory
+            spill: Optional callable receiving each evicted record
+            start_seq: Sequence number of the first record, e.g. to continue
+                       numbering from persisted history
+        """
+        if capacity < 1:
+            raise ValueError("Command log capacity must be at least 1")
+        self.capacity = capacity
+        self.spill = spill
+        self._records = [None] * capacity
+        self._start_seq = start_seq
+        self._next_seq = start_seq
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        """
+        Add a record, assigning its sequence number
+
+        Returns:
+            The record
+        """
+        with self._lock:
+            record.seq = self._next_seq
+            slot = (record.seq - 1) % self.capacity
+            evicted = self._records[slot]
+            self._records[slot] = record
+            self._next_seq += 1
+
+        if evicted is not None and self.spill is not None:
+            self.spill(evicted)
+        return record
+
+    @property
+    def last_seq(self):
+        """
+        Sequence number of the newest record, start_seq - 1 if empty
+        """
+        return self._next_seq - 1
+
+    @property
+    def first_seq(self):
+        """
+        Sequence number of the oldest record still in memory
+        """
+        return max(self._start_seq, self._next_seq - self.capacity)
+
+    def __len__(self):
+        return min(self._next_seq - self._start_seq, self.capacity)
+
+    def records(self):
+        """
+        Returns:
+            List of records in memory, oldest first
+        """
+        with self._lock:
+            return [self._records[(seq - 1) % self.capacity] for seq in range(self.first_seq, self._next_seq)]
+
+    def since(self, seq, limit):
+        """
+        Get records newer than a sequence number
+
+        Args:
+            seq: Cursor; records with a larger sequence number are returned.
+                 Cursors older than the ring start from the oldest record in memory
+            limit: Maximum number of records to return
+
+        Returns:
+            List of records, oldest first
+        """
+        with self._lock:
+            start = max(seq + 1, self.first_seq)
+            end = min(self._next_seq, start + limit)
+            return [self._records[(i - 1) % self.capacity] for i in range(start, end)]
+
+    def latest(self, limit):
+        """
+        Returns:
+            The newest records, at most limit of them, oldest first
+        """
+        with self._lock:
+            start = max(self.first_seq, self._next_seq - limit)
+            return [self._records[(i - 1) % self.capacity] for i in range(start, self._next_seq)]
+
+    def to_list(self):
+        """
+        Returns:
+            List of record dictionaries, oldest first
+        """
+        return [record.to_dict() for record in self.records()]
@@ -5,10 +5,32 @@ import json
 import os
 import logging
 import importlib
+from collections import OrderedDict
 from difflib import get_close_matches
+from agent.macros import compile_macro, get_macro_runner, MACRO_PREFIX
+from agent.vocabulary_profiles import VocabularyProfile, compile_profile, ALL_PROFILE
+from agent import metrics
+from agent import tracing
 
 logger = logging.getLogger("game-agent")
 
+# Number of recent transcripts whose parse results are remembered
+PARSE_CACHE_SIZE = 256
+
+# Language of a vocabulary file that does not say
+DEFAULT_LANGUAGE = "en"
+
+
+def language_vocabulary_path(language=DEFAULT_LANGUAGE):
+    """
+    Returns:
+        Path of the command vocabulary for a language, e.g. commands/command_vocabulary.de.json
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    if language == DEFAULT_LANGUAGE:
+        return os.path.join(current_dir, "commands", "command_vocabulary.json")
+    return os.path.join(current_dir, "commands", f"command_vocabulary.{language}.json")
+
 class CommandParser:
     def __init__(self, vocabulary_path=None):
         """
@@ -19,11 +41,16 @@ class CommandParser:
         """
         self.commands = {}
         self.phrases_to_handlers = {}
+        self.macros = {}
+        self.language = DEFAULT_LANGUAGE
+        self.profiles = {}
+        self.profile = None
+        self.default_profile = ALL_PROFILE
+        self._parse_cache = OrderedDict()
         
         if vocabulary_path is None:
             # Default path relative to this file
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            vocabulary_path = os.path.join(current_dir, "commands", "command_vocabulary.json")
+            vocabulary_path = language_vocabulary_path()
         
         self.load_vocabulary(vocabulary_path)
     
@@ -34,10 +61,24 @@ class CommandParser:
         Args:
             vocabulary_path: Path to the JSON file containing command vocabulary
         """
+        self._parse_cache.clear()
         try:
-            with open(vocabulary_path, 'r') as f:
+            with open(vocabulary_path, 'r', encoding='utf-8') as f:
                 vocabulary = json.load(f)
             
+            # Compile macros into step lists up front so triggering one is cheap.
+            # Their phrases go first so they win over the single commands they contain
+            for definition in vocabulary.get("macros", []):
+                try:
+                    macro = compile_macro(definition)
+                except ValueError as e:
+                    logger.error(f"Skipping invalid macro: {e}")
+                    continue
+                
+                self.macros[macro.handler_name] = macro
+                for phrase in definition.get("phrases", []):
+                    self.phrases_to_handlers[phrase.lower()] = macro.handler_name
+            
             for cmd in vocabulary.get("commands", []):
                 handler = cmd.get("handler")
                 phrases = cmd.get("phrases", [])
@@ -52,12 +93,56 @@ class CommandParser:
                 for phrase in phrases:
                     self.phrases_to_handlers[phrase.lower()] = handler
             
-            logger.info(f"Loaded {len(self.commands)} commands with {len(self.phrases_to_handlers)} phrases")
+            self._compile_profiles(vocabulary)
+            logger.info(f"Loaded {len(self.commands)} commands and {len(self.macros)} macros with {len(self.phrases_to_handlers)} phrases")
         except Exception as e:
             logger.error(f"Failed to load command vocabulary: {e}")
             # Initialize with empty commands if file can't be loaded
             self.commands = {}
             self.phrases_to_handlers = {}
+            self.macros = {}
+            self._compile_profiles({})
+    
+    def _compile_profiles(self, vocabulary):
+        """
+        Build the phrase index and grammar of every vocabulary profile up front
+        """
+        self.language = vocabulary.get("language", DEFAULT_LANGUAGE)
+        self.profiles = {ALL_PROFILE: VocabularyProfile(ALL_PROFILE, self.phrases_to_handlers, language=self.language)}
+        for definition in vocabulary.get("profiles", []):
+            try:
+                profile = compile_profile(definition, self.phrases_to_handlers, self.language)
+            except ValueError as e:
+                logger.error(f"Skipping invalid profile: {e}")
+                continue
+            self.profiles[profile.name] = profile
+        
+        self.default_profile = vocabulary.get("default_profile", ALL_PROFILE)
+        if self.default_profile not in self.profiles:
+            logger.error(f"Unknown default profile '{self.default_profile}', using the whole vocabulary")
+            self.default_profile = ALL_PROFILE
+        # Until something switches, every command is available
+        self.profile = self.profiles[ALL_PROFILE]
+    
+    def set_profile(self, name):
+        """
+        Restrict matching to a vocabulary profile
+        
+        Args:
+            name: Profile name from command_vocabulary.json, or "all"
+        
+        Returns:
+            The now active VocabularyProfile
+        
+        Raises:
+            ValueError: If there is no such profile
+        """
+        profile = self.profiles.get(name)
+        if profile is None:
+            raise ValueError(f"Unknown vocabulary profile '{name}'")
+        # Profiles are compiled when the vocabulary loads, so this is only a swap
+        self.profile = profile
+        return profile
     
     def normalize_text(self, text):
         """
@@ -97,23 +182,45 @@ class CommandParser:
         
         normalized = self.normalize_text(transcript)
         
+        with tracing.span("parse", transcript=normalized) as span:
+            # Users repeat the same few commands, so remember recent results
+            key = (normalized, fuzzy_match, threshold, self.profile.name)
+            cached = self._parse_cache.get(key)
+            if cached is not None:
+                self._parse_cache.move_to_end(key)
+                metrics.parse_cache_hits.inc()
+                logger.debug(f"Parse cache hit for '{normalized}' -> {cached[0]}")
+                span.set(cached=True, handler=cached[0])
+                return cached
+            metrics.parse_cache_misses.inc()
+            
+            result = self._match(normalized, fuzzy_match, threshold)
+            self._parse_cache[key] = result
+            if len(self._parse_cache) > PARSE_CACHE_SIZE:
+                self._parse_cache.popitem(last=False)
+            span.set(cached=False, handler=result[0], confidence=result[1])
+            return result
+    
+    def _match(self, normalized, fuzzy_match, threshold):
+        """
+        Match a normalized transcript against the active profile, exact phrases first
+        """
+        profile = self.profile
+        
         # First try exact matching
-        for phrase, handler in self.phrases_to_handlers.items():
+        for phrase, handler in profile.phrases_to_handlers.items():
             if phrase in normalized:
                 logger.info(f"Exact match found: '{phrase}' -> {handler}")
                 return handler, 1.0
         
         # If no exact match and fuzzy matching is enabled
         if fuzzy_match:
-            # Get all phrases as a list
-            all_phrases = list(self.phrases_to_handlers.keys())
-            
             # Try to find close matches
-            matches = get_close_matches(normalized, all_phrases, n=1, cutoff=threshold)
+            matches = get_close_matches(normalized, profile.phrases, n=1, cutoff=threshold)
             
             if matches:
                 best_match = matches[0]
-                handler = self.phrases_to_handlers[best_match]
+                handler = profile.phrases_to_handlers[best_match]
                 # Calculate a simple confidence score based on string similarity
                 confidence = sum(c1 == c2 for c1, c2 in zip(normalized, best_match)) / max(len(normalized), len(best_match))
                 logger.info(f"Fuzzy match found: '{normalized}' ~ '{best_match}' -> {handler} (confidence: {confidence:.2f})")
@@ -126,20 +233,32 @@ class CommandParser:
         """
         Dynamically imports and executes the specified command handler.
         
+        Macros are started in the background and return immediately.
+        
         Args:
-            handler_name (str): Name of the handler module to execute
+            handler_name (str): Name of the handler module or macro to execute
             command_text (str): Original command text for context-aware handlers
             
         Returns:
             str: Result message from the handler
         """
+        if handler_name.startswith(MACRO_PREFIX):
+            macro = self.macros.get(handler_name)
+            if macro is None:
+                logger.error(f"Unknown macro {handler_name}")
+                return f"Error: Unknown macro {handler_name}"
+            get_macro_runner().start(macro, self.execute_command)
+            return f"Started macro '{macro.name}' ({len(macro.steps)} steps)"
+        
         try:
             # Import the handler module dynamically
-            handler_module = importlib.import_module(f"agent.commands.{handler_name}")
+            with tracing.span("handler_import", handler=handler_name):
+                handler_module = importlib.import_module(f"agent.commands.{handler_name}")
             
             # Execute the handler with the original command text
             if hasattr(handler_module, "execute"):
-                return handler_module.execute(command_text=command_text)
+                with tracing.span("handler", handler=handler_name):
+                    return handler_module.execute(command_text=command_text)
             else:
                 logger.error(f"Handler {handler_name} does not have an execute function")
                 return f"Error: Handler {handler_name} is not properly implemented"
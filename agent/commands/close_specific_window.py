@@ -3,65 +3,62 @@ Command handler to close a specific window by name
 """
 import logging
 import time
-import ctypes
-from ctypes import wintypes
 import re
+from agent.window_index import get_window_index
+from agent.input_backend import get_input_backend, WM_CLOSE
+from agent.speculation import get_speculative_resolver
 
 logger = logging.getLogger("game-agent")
 
-# Windows API constants
-WM_CLOSE = 0x0010
-
-# Load user32.dll for Windows API access
-user32 = ctypes.WinDLL('user32', use_last_error=True)
-
-# Define LRESULT type (missing in some Python versions)
-if not hasattr(wintypes, 'LRESULT'):
-    wintypes.LRESULT = ctypes.c_long
-
-# Define required Windows API functions
-EnumWindows = user32.EnumWindows
-EnumWindows.argtypes = [ctypes.WINFUNCTYPE(ctypes.c_bool, wintypes.HWND, wintypes.LPARAM), wintypes.LPARAM]
-EnumWindows.restype = wintypes.BOOL
-
-GetWindowText = user32.GetWindowTextW
-GetWindowText.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
-GetWindowText.restype = ctypes.c_int
-
-IsWindowVisible = user32.IsWindowVisible
-IsWindowVisible.argtypes = [wintypes.HWND]
-IsWindowVisible.restype = wintypes.BOOL
-
-SendMessage = user32.SendMessageW
-SendMessage.argtypes = [wintypes.HWND, ctypes.c_uint, wintypes.WPARAM, wintypes.LPARAM]
-SendMessage.restype = wintypes.LRESULT
+# Seconds a speculative window lookup stays valid; windows come and go quickly
+SPECULATION_TTL = 2.0
 
 def find_window_by_name(pattern):
     """
     Find windows that match the given pattern
     Returns a list of (window handle, window title) tuples
     """
-    result = []
-    pattern = pattern.lower()
-    
-    def enum_windows_callback(hwnd, lparam):
-        if IsWindowVisible(hwnd):
-            length = 1024
-            buff = ctypes.create_unicode_buffer(length)
-            GetWindowText(hwnd, buff, length)
-            window_title = buff.value
-            if window_title and pattern in window_title.lower():
-                result.append((hwnd, window_title))
-        return True
+    return get_window_index().find(pattern)
+
+def speculative_candidates(prefix):
+    """
+    Window names that a partially spoken name could complete to,
+    taken from the words in currently visible window titles
+    Examples:
+    - "disc" -> ["discord"]
+    """
+    prefix_words = prefix.lower().split()
+    if not prefix_words:
+        return []
     
-    EnumWindows(ctypes.WINFUNCTYPE(ctypes.c_bool, wintypes.HWND, wintypes.LPARAM)(enum_windows_callback), 0)
-    return result
+    candidates = []
+    for _, title in get_window_index().windows():
+        words = re.findall(r"[a-z0-9]+", title.lower())
+        for i in range(len(words) - len(prefix_words) + 1):
+            name = " ".join(words[i:i + len(prefix_words)])
+            if name.startswith(" ".join(prefix_words)) and name not in candidates:
+                candidates.append(name)
+    return candidates
+
+def resolve_target(window_name):
+    """
+    Resolve a spoken window name to the matching windows
+    """
+    return find_window_by_name(window_name)
 
 def close_window(hwnd):
     """
     Close a window by sending WM_CLOSE message
     """
-    SendMessage(hwnd, WM_CLOSE, 0, 0)
+    get_input_backend().send_message(hwnd, WM_CLOSE, 0, 0)
+
+def grammar_phrases():
+    """
+    Phrases a recognizer grammar needs for this handler: "close" with each known
+    application name, since the window name is taken from the transcript
+    """
+    from agent.commands.open_application import application_names
+    return [f"close {name}" for name in application_names()]
 
 def extract_window_name(command_text):
     """
@@ -108,8 +105,8 @@ def execute(**kwargs):
         
         logger.info(f"Looking for windows matching: '{window_name}'")
         
-        # Find matching windows
-        matching_windows = find_window_by_name(window_name)
+        # Find matching windows, reusing a lookup started from partial results
+        matching_windows = get_speculative_resolver().resolve("close_specific_window", window_name, resolve_target)
         
         if not matching_windows:
             return f"No windows found matching '{window_name}'"
@@ -118,6 +115,7 @@ def execute(**kwargs):
         hwnd, title = matching_windows[0]
         logger.info(f"Closing window: '{title}' (handle: {hwnd})")
         close_window(hwnd)
+        get_window_index().invalidate()
         
         # Brief pause to let the window close
         time.sleep(0.2)
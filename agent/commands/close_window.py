@@ -2,9 +2,7 @@
 Command handler for closing windows
 """
 import logging
-import keyboard
-import win32gui
-import win32con
+from agent.input_backend import get_input_backend
 
 logger = logging.getLogger("game-agent")
 
@@ -16,7 +14,7 @@ def execute(**kwargs):
     
     try:
         # Method 1: Use Alt+F4 to close the active window
-        keyboard.press_and_release('alt+f4')
+        get_input_backend().hotkey('alt+f4')
         logger.info("Sent Alt+F4 to close active window")
         
         # Method 2: Alternative approach using Windows API
@@ -24,7 +22,7 @@ def execute(**kwargs):
         # hwnd = win32gui.GetForegroundWindow()
         # if hwnd:
         #     # Send WM_CLOSE message to the window
-        #     win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
+        #     get_input_backend().send_message(hwnd, WM_CLOSE, 0, 0)
         #     logger.info(f"Sent close message to window handle {hwnd}")
         
         return "Window close command sent"
@@ -2,7 +2,7 @@
 Command handler for muting game audio
 """
 import logging
-import keyboard
+from agent.input_backend import get_input_backend
 
 logger = logging.getLogger("game-agent")
 
@@ -14,7 +14,7 @@ def execute(**kwargs):
     
     try:
         # Send volume mute key - works on most Windows systems
-        keyboard.press_and_release('volume mute')
+        get_input_backend().media_key('volume_mute')
         logger.info("Sent volume mute key")
         
         return "System audio muted/unmuted"
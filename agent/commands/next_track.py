@@ -2,7 +2,7 @@
 Command handler for skipping to the next music track
 """
 import logging
-import keyboard
+from agent.input_backend import get_input_backend
 
 logger = logging.getLogger("game-agent")
 
@@ -14,7 +14,7 @@ def execute(**kwargs):
     
     try:
         # Send next track media key - works with most media players
-        keyboard.press_and_release('next track')
+        get_input_backend().media_key('next_track')
         logger.info("Sent next track media key")
         
         return "Skipped to next track"
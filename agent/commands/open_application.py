@@ -5,11 +5,22 @@ import logging
 import subprocess
 import re
 import os
-import time
 from pathlib import Path
+from agent.readiness import wait_for, window_appears, process_failed
+from agent.speculation import get_speculative_resolver
+from agent import tracing
 
 logger = logging.getLogger("game-agent")
 
+# Seconds to wait for a launched application to show its window
+LAUNCH_TIMEOUT = 5.0
+
+# Executable names that say nothing about the window title
+GENERIC_EXECUTABLES = {"launcher", "app", "update"}
+
+# Seconds a speculatively resolved application path stays valid
+SPECULATION_TTL = 10.0
+
 # Common application paths and executables
 COMMON_APPS = {
     "chrome": {
@@ -53,6 +64,22 @@ COMMON_APPS = {
     }
 }
 
+# Words that start an open command, see extract_app_name
+OPEN_VERBS = ("open", "launch", "start", "run")
+
+def application_names():
+    """
+    Every name and alias of the applications in COMMON_APPS
+    """
+    return [name for app_key, app_info in COMMON_APPS.items() for name in [app_key] + app_info["aliases"]]
+
+def grammar_phrases():
+    """
+    Phrases a recognizer grammar needs for this handler: each open verb with each
+    known application name, since the name is taken from the transcript
+    """
+    return [f"{verb} {name}" for verb in OPEN_VERBS for name in application_names()]
+
 def extract_app_name(command_text):
     """
     Extract application name from command text
@@ -145,6 +172,49 @@ def find_app_path(app_name):
     # Not found in common locations
     return None
 
+def canonical_app_name(app_name):
+    """
+    Map an application alias to its entry in COMMON_APPS
+    Examples:
+    - "google chrome" -> "chrome"
+    - "some game" -> "some game"
+    """
+    app_name_lower = app_name.lower()
+    for app_key, app_info in COMMON_APPS.items():
+        if app_name_lower == app_key or app_name_lower in app_info["aliases"]:
+            return app_key
+    return app_name_lower
+
+def speculative_candidates(prefix):
+    """
+    Applications that a partially spoken name could complete to
+    Examples:
+    - "ch" -> ["chrome"]
+    - "google ch" -> ["chrome"]
+    """
+    prefix = prefix.lower()
+    candidates = []
+    for app_key, app_info in COMMON_APPS.items():
+        if any(name.startswith(prefix) for name in [app_key] + app_info["aliases"]):
+            candidates.append(app_key)
+    return candidates
+
+def resolve_target(app_name):
+    """
+    Resolve an application name to its executable path
+    """
+    return find_app_path(app_name)
+
+def window_title_hint(app_name, app_path):
+    """
+    Guess a substring of the main window title from the executable name
+    Falls back to the spoken name for generic launcher executables
+    """
+    stem = os.path.splitext(os.path.basename(app_path))[0].lower()
+    if stem in GENERIC_EXECUTABLES:
+        return app_name.lower()
+    return stem
+
 def execute(command_text="", **kwargs):
     """
     Open a specific application by name
@@ -160,20 +230,34 @@ def execute(command_text="", **kwargs):
         
         logger.info(f"Looking for application: '{app_name}'")
         
-        # Find application path
-        app_path = find_app_path(app_name)
+        # Find application path, reusing a lookup started from partial results
+        app_path = get_speculative_resolver().resolve("open_application", canonical_app_name(app_name), resolve_target)
         
         if not app_path:
             return f"Could not find application '{app_name}'"
         
         # Launch the application
         logger.info(f"Launching application: '{app_path}'")
-        subprocess.Popen(app_path)
+        with tracing.span("launch", app=app_name):
+            process = subprocess.Popen(app_path)
+        
+        # Wait until the application shows a window, giving up early if it crashes
+        window_pattern = window_title_hint(app_name, app_path)
+        ready = wait_for(
+            window_appears(window_pattern),
+            timeout=LAUNCH_TIMEOUT,
+            abort=process_failed(process)
+        )
+        
+        if ready.ready:
+            logger.info(f"Application '{app_name}' ready after {ready.elapsed:.2f}s ({ready.attempts} checks)")
+            return f"Opened {app_name} (ready in {ready.elapsed:.2f}s)"
         
-        # Brief pause to let the application start
-        time.sleep(0.5)
+        if process.poll() not in (None, 0):
+            return f"Failed to open {app_name}: process exited with code {process.returncode}"
         
-        return f"Opened {app_name}"
+        logger.warning(f"No '{window_pattern}' window after {ready.elapsed:.2f}s, assuming {app_name} is starting")
+        return f"Opened {app_name} (no window after {ready.elapsed:.2f}s)"
     
     except Exception as e:
         logger.error(f"Error in open_application command: {e}")
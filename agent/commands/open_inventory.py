@@ -2,7 +2,7 @@
 Command handler for opening inventory in games
 """
 import logging
-import keyboard
+from agent.input_backend import get_input_backend
 
 logger = logging.getLogger("game-agent")
 
@@ -15,7 +15,7 @@ def execute(**kwargs):
     
     try:
         # Most games use 'i' key for inventory
-        keyboard.press_and_release('i')
+        get_input_backend().hotkey('i')
         logger.info("Sent 'i' key to open inventory")
         return "Inventory opened"
     except Exception as e:
@@ -2,7 +2,7 @@
 Command handler for going back to the previous music track
 """
 import logging
-import keyboard
+from agent.input_backend import get_input_backend
 
 logger = logging.getLogger("game-agent")
 
@@ -14,7 +14,7 @@ def execute(**kwargs):
     
     try:
         # Send previous track media key - works with most media players
-        keyboard.press_and_release('previous track')
+        get_input_backend().media_key('previous_track')
         logger.info("Sent previous track media key")
         
         return "Returned to previous track"
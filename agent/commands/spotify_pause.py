@@ -5,46 +5,21 @@ import logging
 import subprocess
 import os
 import time
-import ctypes
-from ctypes import wintypes
-import win32gui
-import win32process
+from agent.window_index import get_window_index
+from agent.input_backend import get_input_backend, WM_APPCOMMAND
 
 logger = logging.getLogger('game-agent')
 
 # Windows API constants
-WM_APPCOMMAND = 0x0319
 APPCOMMAND_MEDIA_PLAY = 0xE0000
 APPCOMMAND_MEDIA_PAUSE = 0xE0001
 APPCOMMAND_MEDIA_PLAY_PAUSE = 0xE0014
 
-# Define ULONG_PTR type (missing in some Python versions)
-if not hasattr(wintypes, 'ULONG_PTR'):
-    if ctypes.sizeof(ctypes.c_void_p) == 8:
-        wintypes.ULONG_PTR = ctypes.c_ulonglong
-    else:
-        wintypes.ULONG_PTR = ctypes.c_ulong
-
-# Load user32.dll for direct Windows API access
-user32 = ctypes.WinDLL('user32', use_last_error=True)
-
 def find_spotify_window():
     """
     Find the Spotify window handle
     """
-    spotify_hwnd = None
-    
-    def enum_windows_callback(hwnd, _):
-        nonlocal spotify_hwnd
-        if win32gui.IsWindowVisible(hwnd):
-            window_title = win32gui.GetWindowText(hwnd)
-            if "spotify" in window_title.lower():
-                spotify_hwnd = hwnd
-                return False  # Stop enumeration
-        return True
-    
-    win32gui.EnumWindows(enum_windows_callback, None)
-    return spotify_hwnd
+    return get_window_index().find_first("spotify")
 
 def send_command_to_spotify(command):
     """
@@ -59,7 +34,7 @@ def send_command_to_spotify(command):
     # Send command to Spotify window
     try:
         # Don't activate the window, just send the command to it
-        user32.SendMessageW(hwnd, WM_APPCOMMAND, 0, command)
+        get_input_backend().send_message(hwnd, WM_APPCOMMAND, 0, command)
         logger.info(f"Sent command {command} to Spotify window")
         return True
     except Exception as e:
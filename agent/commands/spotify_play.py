@@ -4,51 +4,55 @@ Command handler to play music specifically in Spotify
 import logging
 import subprocess
 import os
-import time
-import ctypes
-from ctypes import wintypes
-import win32gui
-import win32process
+from agent.window_index import get_window_index
+from agent.input_backend import get_input_backend, WM_APPCOMMAND
+from agent.readiness import wait_for, window_appears, process_failed
 
 logger = logging.getLogger('game-agent')
 
 # Windows API constants
-WM_APPCOMMAND = 0x0319
 APPCOMMAND_MEDIA_PLAY = 0xE0000
 APPCOMMAND_MEDIA_PAUSE = 0xE0001
 APPCOMMAND_MEDIA_PLAY_PAUSE = 0xE0014
 
-# Define ULONG_PTR type (missing in some Python versions)
-if not hasattr(wintypes, 'ULONG_PTR'):
-    if ctypes.sizeof(ctypes.c_void_p) == 8:
-        wintypes.ULONG_PTR = ctypes.c_ulonglong
-    else:
-        wintypes.ULONG_PTR = ctypes.c_ulong
-
-# Load user32.dll for direct Windows API access
-user32 = ctypes.WinDLL('user32', use_last_error=True)
+# Seconds to wait for the Spotify window after launching it
+LAUNCH_TIMEOUT = 8.0
 
 def find_spotify_window():
     """
     Find the Spotify window handle
     """
-    spotify_hwnd = None
-    
-    def enum_windows_callback(hwnd, _):
-        nonlocal spotify_hwnd
-        if win32gui.IsWindowVisible(hwnd):
-            window_title = win32gui.GetWindowText(hwnd)
-            if "spotify" in window_title.lower():
-                spotify_hwnd = hwnd
-                return False  # Stop enumeration
-        return True
-    
-    win32gui.EnumWindows(enum_windows_callback, None)
-    return spotify_hwnd
+    return get_window_index().find_first("spotify")
+
+def wait_for_spotify_window(process=None):
+    """
+    Wait until the Spotify window appears after a launch
+
+    Args:
+        process: Popen object of the launched executable, used to give up early
+                 if it exits with an error
+
+    Returns:
+        WaitResult holding the Spotify window handle when ready
+    """
+    result = wait_for(
+        window_appears("spotify"),
+        timeout=LAUNCH_TIMEOUT,
+        abort=process_failed(process) if process else None
+    )
+    if result.ready:
+        logger.info(f"Spotify window ready after {result.elapsed:.2f}s ({result.attempts} checks)")
+    else:
+        logger.warning(f"Spotify window did not appear within {result.elapsed:.2f}s")
+    return result
 
 def launch_spotify_if_needed():
     """
     Launch Spotify if it's not already running
+
+    Returns:
+        Tuple of (window handle or None, seconds until Spotify was ready or None
+        if it was already running)
     """
     spotify_hwnd = find_spotify_window()
     
@@ -64,11 +68,11 @@ def launch_spotify_if_needed():
         for path in spotify_paths:
             if os.path.exists(path):
                 try:
-                    subprocess.Popen(path)
+                    process = subprocess.Popen(path)
                     logger.info(f"Launched Spotify from {path}")
                     # Wait for Spotify to start
-                    time.sleep(2)
-                    return find_spotify_window()
+                    ready = wait_for_spotify_window(process)
+                    return ready.value, ready.elapsed
                 except Exception as e:
                     logger.error(f"Failed to launch Spotify from {path}: {e}")
         
@@ -76,19 +80,17 @@ def launch_spotify_if_needed():
         try:
             subprocess.Popen("start spotify:", shell=True)
             logger.info("Launched Spotify via protocol handler")
-            time.sleep(2)
-            return find_spotify_window()
+            ready = wait_for_spotify_window()
+            return ready.value, ready.elapsed
         except Exception as e:
             logger.error(f"Failed to launch Spotify via protocol handler: {e}")
     
-    return spotify_hwnd
+    return spotify_hwnd, None
 
-def send_command_to_spotify(command):
+def send_command_to_spotify(command, hwnd):
     """
     Send a media command specifically to the Spotify window
     """
-    hwnd = launch_spotify_if_needed()
-    
     if not hwnd:
         logger.error("Could not find or launch Spotify")
         return False
@@ -96,7 +98,7 @@ def send_command_to_spotify(command):
     # Bring Spotify window to foreground
     try:
         # Don't activate the window, just send the command to it
-        user32.SendMessageW(hwnd, WM_APPCOMMAND, 0, command)
+        get_input_backend().send_message(hwnd, WM_APPCOMMAND, 0, command)
         logger.info(f"Sent command {command} to Spotify window")
         return True
     except Exception as e:
@@ -114,8 +116,12 @@ def execute(command_text="", **kwargs):
     try:
         logger.info("Executing command: spotify play")
         
+        hwnd, ready_time = launch_spotify_if_needed()
+        
         # Try to send play command to Spotify
-        if send_command_to_spotify(APPCOMMAND_MEDIA_PLAY):
+        if send_command_to_spotify(APPCOMMAND_MEDIA_PLAY, hwnd):
+            if ready_time is not None:
+                return f"Launched Spotify (ready in {ready_time:.2f}s) and started playing music"
             return "Started playing music in Spotify"
         else:
             return "Failed to control Spotify"
@@ -4,7 +4,7 @@ Command handler for taking screenshots in games
 import logging
 import time
 import os
-import keyboard
+from agent.input_backend import get_input_backend
 
 logger = logging.getLogger("game-agent")
 
@@ -21,11 +21,11 @@ def execute(**kwargs):
         
         # Windows screenshot shortcut (Windows+PrintScreen)
         # This automatically saves to Pictures folder on Windows 10+
-        keyboard.press_and_release('win+print screen')
+        get_input_backend().hotkey('win+print screen')
         logger.info("Sent Win+PrintScreen key combination")
         
         # Alternative: Some games have their own screenshot key
-        # keyboard.press_and_release('f12')  # Common in Steam games
+        # get_input_backend().hotkey('f12')  # Common in Steam games
         
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         filename = f"screenshot-{timestamp}.png"
@@ -2,7 +2,7 @@
 Command handler for decreasing system volume
 """
 import logging
-import keyboard
+from agent.input_backend import get_input_backend
 
 logger = logging.getLogger("game-agent")
 
@@ -14,7 +14,7 @@ def execute(**kwargs):
     
     try:
         # Send volume down key - works on most Windows systems
-        keyboard.press_and_release('volume down')
+        get_input_backend().media_key('volume_down')
         logger.info("Sent volume down key")
         
         return "Volume decreased"
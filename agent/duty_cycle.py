@@ -0,0 +1,130 @@
+"""
+Adaptive duty cycling of speech decoding.
+
+After a stretch of silence the listen loop goes idle: chunks are only
+checked by a cheap energy voice activity detector and kept in a short
+pre-roll buffer instead of being decoded. The first chunk with voice
+switches back to full decoding, and the pre-roll is replayed ahead of it
+so the first word is not lost.
+
+Enable with NO_ALT_TAB_DUTY_CYCLE=1; NO_ALT_TAB_IDLE_AFTER sets the
+seconds of silence before going idle.
+"""
+import sys
+import math
+import time
+import array
+import operator
+import logging
+from collections import deque
+
+logger = logging.getLogger("game-agent")
+
+STATE_ACTIVE = "active"
+STATE_IDLE = "idle"
+
+DEFAULT_IDLE_AFTER = 30.0
+# About one second of 4096-sample chunks at 16 kHz
+DEFAULT_PRE_ROLL_CHUNKS = 4
+
+# Voice must be this many times louder than the noise floor...
+DEFAULT_SPEECH_RATIO = 3.0
+# ...and at least this loud (RMS of 16-bit samples)
+DEFAULT_MIN_RMS = 300.0
+
+
+def rms(data):
+    """
+    Returns:
+        Root mean square of 16-bit little-endian PCM samples
+    """
+    samples = array.array("h", data[:len(data) - len(data) % 2])
+    if sys.byteorder != "little":
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(map(operator.mul, samples, samples)) / len(samples))
+
+
+class EnergyVAD:
+    """
+    Voice activity detection by loudness relative to a tracked noise floor
+    """
+
+    def __init__(self, speech_ratio=DEFAULT_SPEECH_RATIO, min_rms=DEFAULT_MIN_RMS, adaptation=0.05):
+        """
+        Args:
+            speech_ratio: How many times the noise floor counts as voice
+            min_rms: Loudness below which a chunk is never voice
+            adaptation: How quickly the noise floor follows quiet chunks (0-1)
+        """
+        self.speech_ratio = speech_ratio
+        self.min_rms = min_rms
+        self.adaptation = adaptation
+        self.noise_floor = None
+
+    def is_speech(self, data):
+        level = rms(data)
+        if self.noise_floor is None:
+            self.noise_floor = level
+        speech = level >= self.min_rms and level >= self.noise_floor * self.speech_ratio
+        if not speech:
+            self.noise_floor += self.adaptation * (level - self.noise_floor)
+        return speech
+
+
+class DutyCycle:
+    """
+    Decides per chunk whether the recognizer needs to see it
+    """
+
+    def __init__(self, idle_after=DEFAULT_IDLE_AFTER, pre_roll_chunks=DEFAULT_PRE_ROLL_CHUNKS, vad=None,
+                 clock=time.monotonic):
+        """
+        Args:
+            idle_after: Seconds without voice before decoding stops
+            pre_roll_chunks: Chunks kept while idle and replayed on voice
+            vad: EnergyVAD, or any object with is_speech(data)
+        """
+        self.idle_after = idle_after
+        self.vad = vad or EnergyVAD()
+        self._clock = clock
+        self.pre_roll_chunks = pre_roll_chunks
+        self._pre_roll = deque(maxlen=pre_roll_chunks)
+        self._last_voice = clock()
+        self.state = STATE_ACTIVE
+        # Chunks decoded, and chunks never decoded (pre-roll that was replayed is not skipped)
+        self.decoded_chunks = 0
+        self.skipped_chunks = 0
+        self.wakeups = 0
+
+    def process(self, data):
+        """
+        Feed one chunk from the microphone
+
+        Returns:
+            Audio to decode now (pre-roll included after waking up), or None while idle
+        """
+        now = self._clock()
+        if self.vad.is_speech(data):
+            self._last_voice = now
+            if self.state == STATE_IDLE:
+                self.state = STATE_ACTIVE
+                self.wakeups += 1
+                replay = len(self._pre_roll)
+                data = b"".join(self._pre_roll) + data
+                self._pre_roll.clear()
+                self.decoded_chunks += replay + 1
+                self.skipped_chunks -= replay
+                logger.debug(f"Voice detected, decoding again with {replay} pre-roll chunks")
+                return data
+        elif self.state == STATE_ACTIVE and now - self._last_voice >= self.idle_after:
+            self.state = STATE_IDLE
+            logger.debug(f"No voice for {self.idle_after:.0f}s, pausing decoding")
+
+        if self.state == STATE_IDLE:
+            self._pre_roll.append(data)
+            self.skipped_chunks += 1
+            return None
+        self.decoded_chunks += 1
+        return data
@@ -0,0 +1,118 @@
+"""
+Fan-out of agent events to Server-Sent Events subscribers
+"""
+import json
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger("game-agent")
+
+# Events buffered per subscriber before the oldest ones are dropped
+DEFAULT_BUFFER_SIZE = 256
+
+
+class Subscription:
+    """
+    Bounded event queue of one subscriber.
+
+    Pushing never blocks: when the subscriber falls behind, the oldest
+    buffered events are discarded and counted in dropped.
+    """
+
+    def __init__(self, maxsize=DEFAULT_BUFFER_SIZE, partials=False):
+        self.partials = partials
+        self.dropped = 0
+        self.closed = False
+        self._events = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+
+    def push(self, event):
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Wait for the next event
+
+        Returns:
+            (event_type, event_id, data) tuple, or None on timeout or close
+        """
+        with self._condition:
+            if not self._events and not self.closed:
+                self._condition.wait(timeout)
+            if self._events:
+                return self._events.popleft()
+            return None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+
+class EventBroadcaster:
+    """
+    Publishes events to all current subscribers.
+
+    The subscriber list is copied on write, so publishing from the recognition
+    thread only iterates a tuple and takes each subscriber's lock briefly.
+    """
+
+    def __init__(self, max_subscribers=64):
+        self.max_subscribers = max_subscribers
+        self._subscribers = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxsize=DEFAULT_BUFFER_SIZE, partials=False):
+        """
+        Returns:
+            A new Subscription, or None if the subscriber limit is reached
+        """
+        subscription = Subscription(maxsize, partials)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def wants_partials(self):
+        """
+        Returns:
+            True if any subscriber asked for partial transcripts
+        """
+        return any(s.partials for s in self._subscribers)
+
+    def publish(self, event_type, data, event_id=None):
+        """
+        Send an event to every subscriber without blocking on any of them
+        """
+        event = (event_type, event_id, data)
+        for subscription in self._subscribers:
+            if event_type == "partial" and not subscription.partials:
+                continue
+            subscription.push(event)
+
+
+def format_sse(event_type, data, event_id=None):
+    """
+    Encode an event in the text/event-stream wire format
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,199 @@
+"""
+Persistent command history in SQLite, written by a background batching thread
+"""
+import time
+import queue
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_DB_PATH = "command_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS command_history (
+    seq INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    transcript TEXT,
+    command TEXT,
+    confidence REAL,
+    result TEXT,
+    status TEXT,
+    audio TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_command_history_timestamp ON command_history (timestamp);
+CREATE INDEX IF NOT EXISTS idx_command_history_command ON command_history (command, timestamp);
+CREATE INDEX IF NOT EXISTS idx_command_history_status ON command_history (status, timestamp);
+"""
+
+COLUMNS = ("seq", "timestamp", "transcript", "command", "confidence", "result", "status", "audio")
+
+# Columns added after the first release, with their types, for upgrading old databases
+ADDED_COLUMNS = {"audio": "TEXT"}
+
+_STOP = object()
+
+
+class HistoryStore:
+    """
+    Command log records persisted to SQLite.
+
+    add() only enqueues the record; a writer thread drains the queue and
+    inserts records in batches, one transaction per batch. Queries open their
+    own connection, and WAL mode lets them read while the writer commits.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=200, flush_interval=0.5, writer=True):
+        """
+        Args:
+            path: SQLite database file
+            batch_size: Maximum records per insert transaction
+            flush_interval: Seconds the writer waits to fill a batch
+            writer: Start the writer thread; readers in another process pass False
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._queue = queue.SimpleQueue()
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        existing = {row[1] for row in connection.execute("PRAGMA table_info(command_history)")}
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                connection.execute(f"ALTER TABLE command_history ADD COLUMN {column} {column_type}")
+        connection.commit()
+        connection.close()
+
+        self._thread = None
+        if writer:
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def add(self, record):
+        """
+        Queue a CommandLogRecord for writing; never blocks
+        """
+        self._queue.put(tuple(getattr(record, column) for column in COLUMNS))
+
+    def last_seq(self):
+        """
+        Returns:
+            Highest sequence number stored, 0 for an empty database
+        """
+        connection = self._connect()
+        try:
+            row = connection.execute("SELECT MAX(seq) FROM command_history").fetchone()
+            return row[0] or 0
+        finally:
+            connection.close()
+
+    def _run(self):
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(connection, batch)
+        connection.close()
+
+    def _write(self, connection, batch):
+        try:
+            with connection:
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO command_history ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                    batch
+                )
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to write {len(batch)} command history records: {e}")
+
+    def close(self, timeout=5):
+        """
+        Write everything still queued and stop the writer thread
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def query(self, since=None, start=None, end=None, handler=None, status=None, limit=100):
+        """
+        Query stored history, oldest first
+
+        Args:
+            since: Only records with a larger sequence number, the first limit of them.
+                   Without it the newest limit matching records are returned
+            start: Only records at or after this timestamp ("YYYY-MM-DD HH:MM:SS" or a prefix)
+            end: Only records before this timestamp
+            handler: Only records for this command handler
+            status: Only records with this status ("ok", "error" or "rejected")
+            limit: Maximum number of records
+
+        Returns:
+            List of record dictionaries
+        """
+        clauses = []
+        params = []
+        if since is not None:
+            clauses.append("seq > ?")
+            params.append(since)
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if handler:
+            clauses.append("command = ?")
+            params.append(handler)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+
+        sql = f"SELECT {', '.join(COLUMNS)} FROM command_history"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        params.append(limit)
+        if since is not None:
+            return self._fetch(sql + " ORDER BY seq LIMIT ?", params)
+
+        rows = self._fetch(sql + " ORDER BY seq DESC LIMIT ?", params)
+        rows.reverse()
+        return rows
+
+    def latest(self, limit=100):
+        """
+        Returns:
+            The newest records as dictionaries, at most limit of them, oldest first
+        """
+        rows = self._fetch(f"SELECT {', '.join(COLUMNS)} FROM command_history ORDER BY seq DESC LIMIT ?", [limit])
+        rows.reverse()
+        return rows
+
+    def _fetch(self, sql, params):
+        connection = self._connect()
+        try:
+            return [dict(zip(COLUMNS, row)) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
@@ -0,0 +1,260 @@
+"""
+Input injection backends used by command handlers to send keys and window messages
+"""
+import os
+import sys
+import time
+import logging
+import threading
+
+logger = logging.getLogger("game-agent")
+
+# Windows message constants shared by handlers
+WM_CLOSE = 0x0010
+WM_APPCOMMAND = 0x0319
+
+# Virtual-key codes for media keys
+MEDIA_VK_CODES = {
+    "play_pause": 0xB3,
+    "play": 0xFA,
+    "next_track": 0xB0,
+    "previous_track": 0xB1,
+    "volume_mute": 0xAD,
+    "volume_down": 0xAE,
+    "volume_up": 0xAF,
+}
+
+# Key names understood by the keyboard module for media keys
+MEDIA_KEY_NAMES = {
+    "play_pause": "play/pause media",
+    "next_track": "next track",
+    "previous_track": "previous track",
+    "volume_mute": "volume mute",
+    "volume_down": "volume down",
+    "volume_up": "volume up",
+}
+
+
+class InputBackend:
+    """
+    Interface for injecting input events into the desktop session
+    """
+
+    name = "base"
+
+    def supports_media_key(self, key):
+        """
+        Returns:
+            True if the backend can send the given media key
+        """
+        raise NotImplementedError
+
+    def media_key(self, key):
+        """
+        Press and release a media key
+
+        Args:
+            key: One of the MEDIA_VK_CODES names, e.g. "play_pause"
+        """
+        raise NotImplementedError
+
+    def hotkey(self, combination):
+        """
+        Press and release a key or key combination
+
+        Args:
+            combination: Key combination in keyboard module syntax, e.g. "alt+f4"
+        """
+        raise NotImplementedError
+
+    def send_message(self, hwnd, message, wparam=0, lparam=0):
+        """
+        Send a window message to a window handle
+
+        Returns:
+            The message result
+        """
+        raise NotImplementedError
+
+
+class KeyboardInputBackend(InputBackend):
+    """
+    Backend using the cross-platform keyboard module
+    """
+
+    name = "keyboard"
+
+    def __init__(self):
+        self._keyboard = None
+
+    def _module(self):
+        if self._keyboard is None:
+            import keyboard
+            self._keyboard = keyboard
+        return self._keyboard
+
+    def supports_media_key(self, key):
+        return key in MEDIA_KEY_NAMES
+
+    def media_key(self, key):
+        if key not in MEDIA_KEY_NAMES:
+            raise ValueError(f"Media key '{key}' is not supported by the keyboard backend")
+        self._module().press_and_release(MEDIA_KEY_NAMES[key])
+
+    def hotkey(self, combination):
+        self._module().press_and_release(combination)
+
+    def send_message(self, hwnd, message, wparam=0, lparam=0):
+        raise NotImplementedError("Window messages require the win32 input backend")
+
+
+class Win32InputBackend(InputBackend):
+    """
+    Backend using keybd_event and SendMessageW from user32.dll.
+
+    Media keys sent this way work better with games than the keyboard module,
+    which is kept as a fallback and for key combinations.
+    """
+
+    name = "win32"
+
+    KEYEVENTF_EXTENDEDKEY = 0x0001
+    KEYEVENTF_KEYUP = 0x0002
+
+    def __init__(self, fallback=None):
+        import ctypes
+        from ctypes import wintypes
+
+        # Define ULONG_PTR and LRESULT types (missing in some Python versions)
+        if not hasattr(wintypes, 'ULONG_PTR'):
+            if ctypes.sizeof(ctypes.c_void_p) == 8:
+                wintypes.ULONG_PTR = ctypes.c_ulonglong
+            else:
+                wintypes.ULONG_PTR = ctypes.c_ulong
+        if not hasattr(wintypes, 'LRESULT'):
+            wintypes.LRESULT = ctypes.c_long
+
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+        self._keybd_event = user32.keybd_event
+        self._keybd_event.argtypes = [wintypes.BYTE, wintypes.BYTE, wintypes.DWORD, wintypes.ULONG_PTR]
+
+        self._send_message = user32.SendMessageW
+        self._send_message.argtypes = [wintypes.HWND, ctypes.c_uint, wintypes.WPARAM, wintypes.LPARAM]
+        self._send_message.restype = wintypes.LRESULT
+
+        self.fallback = fallback or KeyboardInputBackend()
+
+    def supports_media_key(self, key):
+        return key in MEDIA_VK_CODES
+
+    def media_key(self, key):
+        if key not in MEDIA_VK_CODES:
+            raise ValueError(f"Unknown media key '{key}'")
+        try:
+            vk_code = MEDIA_VK_CODES[key]
+            self._keybd_event(vk_code, 0, self.KEYEVENTF_EXTENDEDKEY, 0)
+            self._keybd_event(vk_code, 0, self.KEYEVENTF_EXTENDEDKEY | self.KEYEVENTF_KEYUP, 0)
+        except Exception as e:
+            if not self.fallback.supports_media_key(key):
+                raise
+            logger.warning(f"Windows API method failed: {e}, falling back to keyboard module")
+            self.fallback.media_key(key)
+
+    def hotkey(self, combination):
+        self.fallback.hotkey(combination)
+
+    def send_message(self, hwnd, message, wparam=0, lparam=0):
+        return self._send_message(hwnd, message, wparam, lparam)
+
+
+class RecordingInputBackend(InputBackend):
+    """
+    Fake backend that records events instead of injecting them.
+
+    Each event is a (kind, args, timestamp) tuple, where timestamp comes from
+    time.perf_counter, so tests and benchmarks can assert on what a command
+    would have sent and when.
+    """
+
+    name = "recording"
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def _record(self, kind, *args):
+        with self._lock:
+            self.events.append((kind, args, time.perf_counter()))
+
+    def supports_media_key(self, key):
+        return key in MEDIA_VK_CODES
+
+    def media_key(self, key):
+        if key not in MEDIA_VK_CODES:
+            raise ValueError(f"Unknown media key '{key}'")
+        self._record("media_key", key)
+
+    def hotkey(self, combination):
+        self._record("hotkey", combination)
+
+    def send_message(self, hwnd, message, wparam=0, lparam=0):
+        self._record("send_message", hwnd, message, wparam, lparam)
+        return 0
+
+    def calls(self):
+        """
+        Returns:
+            List of (kind, args) tuples without timestamps
+        """
+        with self._lock:
+            return [(kind, args) for kind, args, _ in self.events]
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+
+
+BACKENDS = {
+    "win32": Win32InputBackend,
+    "keyboard": KeyboardInputBackend,
+    "recording": RecordingInputBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_default_backend():
+    """
+    Pick the input backend from NO_ALT_TAB_INPUT_BACKEND or the current platform
+    """
+    name = os.getenv("NO_ALT_TAB_INPUT_BACKEND")
+    if not name:
+        name = "win32" if sys.platform == 'win32' else "keyboard"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend '{name}', expected one of {', '.join(BACKENDS)}")
+    logger.info(f"Using {name} input backend")
+    return BACKENDS[name]()
+
+
+def get_input_backend():
+    """
+    Returns:
+        The shared InputBackend, created on first use
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_default_backend()
+    return _backend
+
+
+def set_input_backend(backend):
+    """
+    Replace the shared InputBackend, e.g. with a RecordingInputBackend
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
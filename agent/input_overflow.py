@@ -0,0 +1,55 @@
+"""
+Estimate of the microphone frames lost to input buffer overflows.
+
+In blocking mode PyAudio drops input that overflows its buffer without
+saying how much (stream.read(exception_on_overflow=False) only hides it).
+A stream delivers its rate in frames per second, so whatever the wall clock
+says has arrived since the stream opened, but was neither read nor is still
+buffered, was dropped. The latency before the first frame arrives is covered
+by a tolerance of about one chunk.
+"""
+import time
+
+
+class OverflowEstimator:
+    """
+    Frames dropped per listening cycle, from the wall clock and the frames read
+    """
+
+    def __init__(self, rate, tolerance_frames=0, clock=time.monotonic):
+        """
+        Args:
+            rate: Frames per second the stream delivers
+            tolerance_frames: Shortfall not counted, covering input latency and clock jitter
+        """
+        self.rate = rate
+        self.tolerance_frames = tolerance_frames
+        self._clock = clock
+        self._started = None
+        self._read = 0
+
+    def start(self):
+        """
+        Call when the stream opens
+        """
+        self._started = self._clock()
+        self._read = 0
+
+    def read(self, frames):
+        self._read += frames
+
+    def finish(self, buffered=0):
+        """
+        Call before the stream closes
+
+        Args:
+            buffered: Frames still waiting in the stream, e.g. stream.get_read_available()
+
+        Returns:
+            Frames dropped since start()
+        """
+        if self._started is None:
+            return 0
+        expected = (self._clock() - self._started) * self.rate
+        self._started = None
+        return max(0, int(expected - self._read - buffered - self.tolerance_frames))
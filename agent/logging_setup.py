@@ -0,0 +1,140 @@
+"""
+Queue-based logging: callers only enqueue records, a background listener
+formats them and does the file and console I/O
+"""
+import sys
+import json
+import queue
+import atexit
+import logging
+import datetime
+import logging.handlers
+
+DEFAULT_LOG_FILE = "agent.log"
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Rotation settings
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_ROTATE_WHEN = "midnight"
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+_queue_handler = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+
+    Fields passed with extra= (e.g. logger.info("...", extra={"handler": "mute_game"}))
+    are included as top-level keys.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def create_file_handler(log_file, rotation="size", max_bytes=DEFAULT_MAX_BYTES,
+                        backup_count=DEFAULT_BACKUP_COUNT, when=DEFAULT_ROTATE_WHEN):
+    """
+    Create a rotating file handler
+
+    Args:
+        log_file: Path of the active log file
+        rotation: "size" to rotate at max_bytes, "time" to rotate at when
+        max_bytes: File size that triggers a size-based rotation
+        backup_count: Number of rotated files kept
+        when: Interval of time-based rotation, as understood by TimedRotatingFileHandler
+
+    Returns:
+        The handler
+    """
+    if rotation == "size":
+        return logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    if rotation == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file, when=when, backupCount=backup_count, encoding="utf-8")
+    raise ValueError(f"Unknown log rotation '{rotation}', expected 'size' or 'time'")
+
+
+def configure_logging(log_file=DEFAULT_LOG_FILE, level=logging.INFO, rotation="size",
+                      max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT,
+                      when=DEFAULT_ROTATE_WHEN, json_format=False, console=True):
+    """
+    Route all logging through a queue to a background listener thread.
+
+    The root logger gets a single QueueHandler, so logging from the
+    recognition thread or a handler costs an enqueue; formatting, disk and
+    console writes happen on the listener thread. Calling this again replaces
+    the previous configuration.
+
+    Args:
+        log_file: Log file path, or None for console only
+        level: Root log level
+        rotation: "size" or "time", see create_file_handler
+        max_bytes: Size limit of one log file for size-based rotation
+        backup_count: Number of rotated log files kept
+        when: Rotation interval for time-based rotation
+        json_format: Write the log file as JSON lines instead of plain text
+        console: Also write plain text to stderr
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    handlers = []
+    if log_file:
+        file_handler = create_file_handler(log_file, rotation, max_bytes, backup_count, when)
+        file_handler.setFormatter(JsonLinesFormatter() if json_format else logging.Formatter(LOG_FORMAT))
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(console_handler)
+
+    # Unbounded, so logging never blocks the caller
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """
+    Flush queued records, close the log files and detach the queue handler
+    """
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
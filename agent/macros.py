@@ -0,0 +1,183 @@
+"""
+Macros: named sequences of command handlers with timed delays between steps
+"""
+import time
+import logging
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from agent.timer_wheel import get_timer_wheel
+
+logger = logging.getLogger("game-agent")
+
+# Prefix that distinguishes macro names from handler module names
+MACRO_PREFIX = "macro:"
+
+
+class MacroStep:
+    """
+    One handler invocation, run a fixed delay after the previous step finished
+    """
+
+    __slots__ = ("handler", "command_text", "delay")
+
+    def __init__(self, handler, command_text, delay):
+        self.handler = handler
+        self.command_text = command_text
+        self.delay = delay
+
+
+class Macro:
+    """
+    Compiled macro ready to be scheduled
+    """
+
+    def __init__(self, name, steps, description=""):
+        self.name = name
+        self.steps = steps
+        self.description = description
+
+    @property
+    def handler_name(self):
+        return MACRO_PREFIX + self.name
+
+
+def handler_exists(handler):
+    return importlib.util.find_spec(f"agent.commands.{handler}") is not None
+
+
+def compile_macro(definition):
+    """
+    Compile a macro definition from the command vocabulary into a Macro
+
+    Steps are either a handler name, a {"handler": ..., "text": ...} object
+    for handlers that read the command text, or a {"wait_ms": ...} object.
+    Consecutive waits are merged into the delay of the following step.
+
+    Args:
+        definition: Macro object from command_vocabulary.json
+
+    Returns:
+        Macro
+
+    Raises:
+        ValueError: If the definition is malformed or names an unknown handler
+    """
+    name = definition.get("name")
+    if not name:
+        raise ValueError("Macro is missing a name")
+
+    steps = []
+    pending_delay = 0.0
+    for raw_step in definition.get("steps", []):
+        if isinstance(raw_step, str):
+            raw_step = {"handler": raw_step}
+        if not isinstance(raw_step, dict):
+            raise ValueError(f"Macro '{name}' has an invalid step: {raw_step!r}")
+
+        if "wait_ms" in raw_step:
+            wait_ms = float(raw_step["wait_ms"])
+            if wait_ms < 0:
+                raise ValueError(f"Macro '{name}' has a negative wait: {wait_ms}")
+            pending_delay += wait_ms / 1000.0
+            continue
+
+        handler = raw_step.get("handler")
+        if not handler or handler.startswith(MACRO_PREFIX):
+            raise ValueError(f"Macro '{name}' step must name a command handler: {raw_step!r}")
+        if not handler_exists(handler):
+            raise ValueError(f"Macro '{name}' uses unknown handler '{handler}'")
+
+        command_text = raw_step.get("text", handler.replace("_", " "))
+        steps.append(MacroStep(handler, command_text, pending_delay))
+        pending_delay = 0.0
+
+    if not steps:
+        raise ValueError(f"Macro '{name}' has no steps")
+
+    return Macro(name, steps, definition.get("description", ""))
+
+
+class MacroRun:
+    """
+    State of one macro execution
+    """
+
+    def __init__(self, macro, execute):
+        self.macro = macro
+        self.execute = execute
+        self.results = []
+        self.jitter = []
+        self.started = time.perf_counter()
+        self.done = threading.Event()
+
+
+class MacroRunner:
+    """
+    Runs macros on a timer wheel without blocking the caller.
+
+    The wheel only times the delays; each step runs on a small worker pool so a
+    slow handler cannot hold up timers of other macros. The next step is
+    scheduled relative to the moment the previous step finished.
+    """
+
+    def __init__(self, wheel=None, max_workers=2):
+        self.wheel = wheel or get_timer_wheel()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="macro")
+
+    def start(self, macro, execute):
+        """
+        Start a macro in the background
+
+        Args:
+            macro: Compiled Macro
+            execute: Callable(handler_name, command_text=...) running one handler
+
+        Returns:
+            MacroRun whose done event is set after the last step
+        """
+        run = MacroRun(macro, execute)
+        logger.info(f"Starting macro '{macro.name}' with {len(macro.steps)} steps")
+        self._schedule(run, 0)
+        return run
+
+    def _schedule(self, run, index):
+        step = run.macro.steps[index]
+        self.wheel.schedule(step.delay, lambda deadline: self.executor.submit(self._run_step, run, index, deadline))
+
+    def _run_step(self, run, index, deadline):
+        step = run.macro.steps[index]
+        jitter = time.perf_counter() - deadline
+        try:
+            result = run.execute(step.handler, command_text=step.command_text)
+        except Exception as e:
+            result = f"Error: {e}"
+        run.results.append(result)
+        run.jitter.append(jitter)
+        logger.info(f"Macro '{run.macro.name}' step {index + 1}/{len(run.macro.steps)} {step.handler} "
+                    f"(delay {step.delay * 1000:.0f} ms, jitter {jitter * 1000:+.2f} ms): {result}")
+
+        if index + 1 < len(run.macro.steps):
+            self._schedule(run, index + 1)
+        else:
+            total = time.perf_counter() - run.started
+            logger.info(f"Macro '{run.macro.name}' finished in {total * 1000:.1f} ms, "
+                        f"max jitter {max(run.jitter) * 1000:.2f} ms")
+            run.done.set()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_macro_runner():
+    """
+    Returns:
+        The shared MacroRunner, created on first use
+    """
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = MacroRunner()
+    return _runner
@@ -1,121 +1,303 @@
 import time
+# Startup phases are measured from here, so they include import time
+_process_start = time.perf_counter()
+import atexit
 import logging
 import importlib
 import os
+import sys
 import json
-import pyaudio
+import signal
+import _thread
 import threading
 import datetime
-from vosk import Model, KaldiRecognizer
-from flask import Flask, jsonify
-from agent.command_parser import CommandParser
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("agent.log"),
-        logging.StreamHandler()
-    ]
+from agent.command_parser import CommandParser, language_vocabulary_path
+from agent.command_log import (CommandLogBuffer, CommandLogRecord, DEFAULT_CAPACITY,
+                               STATUS_ERROR, STATUS_REJECTED, result_status)
+from agent.history_store import HistoryStore, DEFAULT_DB_PATH
+from agent.speculation import get_speculative_resolver
+from agent.event_stream import EventBroadcaster
+from agent.api import (create_app, serve, start_api_process, API_MODES, DEFAULT_HOST, DEFAULT_PORT,
+                       STREAM_MAX_SUBSCRIBERS)
+from agent import metrics
+from agent.stats import CommandStats
+from agent.audio_capture import AudioArchive, UtteranceRecorder, DEFAULT_AUDIO_DIR
+from agent.input_overflow import OverflowEstimator
+from agent import tracing
+from agent.readiness import wait_for, url_responds
+from agent.startup import StartupReport, ModelLoader, PHASE_API, PHASE_FIRST_LISTEN
+from agent.supervisor import Heartbeat, SUPERVISED_ENV
+from agent.resource_governor import ResourceGovernor, RecognitionProfile, FULL_PROFILE
+from agent.vocabulary_profiles import ProfileSwitcher
+from agent.duty_cycle import DutyCycle, DEFAULT_IDLE_AFTER
+from agent.wake_word import WakeWordGate, GATE_CLOSED, GATE_OPENED, DEFAULT_WINDOW
+from agent.model_installer import install_model
+from agent.model_registry import selected_language, language_model, model_path, model_url
+from agent.model_cache import ModelCache, DEFAULT_BUDGET_MB
+from agent.recognition_server import RemoteModel, make_recognizer, ping, default_address
+from agent.logging_setup import configure_logging, DEFAULT_LOG_FILE, DEFAULT_MAX_BYTES, DEFAULT_BACKUP_COUNT
+
+# Configure logging; records are written by a background listener thread
+configure_logging(
+    log_file=os.getenv("NO_ALT_TAB_LOG_FILE", DEFAULT_LOG_FILE),
+    rotation=os.getenv("NO_ALT_TAB_LOG_ROTATION", "size"),
+    max_bytes=int(os.getenv("NO_ALT_TAB_LOG_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    backup_count=int(os.getenv("NO_ALT_TAB_LOG_BACKUPS", DEFAULT_BACKUP_COUNT)),
+    json_format=os.getenv("NO_ALT_TAB_LOG_FORMAT", "text") == "json"
 )
 logger = logging.getLogger("game-agent")
 
-# Initialize Flask for REST API
-app = Flask(__name__)
-command_logs = []
+# Time to API, to model ready and to first listen, reported by /health
+startup_report = StartupReport(start=_process_start)
+
+# Refreshed for every audio chunk, so a supervisor can tell a hung listen loop
+listener_heartbeat = Heartbeat()
+# Language spoken into the microphone and its model, chosen with
+# NO_ALT_TAB_LANGUAGE and NO_ALT_TAB_MODEL, see agent/model_registry.py
+LANGUAGE = selected_language()
+MODEL_NAME = language_model(LANGUAGE)
+MODEL_PATH = model_path(MODEL_NAME)
+MODEL_URL = os.getenv("NO_ALT_TAB_MODEL_URL") or model_url(MODEL_NAME)
+
+# Attach to a running recognition server (python -m agent.recognition_server)
+# instead of loading the model, unless NO_ALT_TAB_RECOGNITION_SERVER=0
+RECOGNITION_SERVER = default_address() if os.getenv("NO_ALT_TAB_RECOGNITION_SERVER", "1") != "0" else None
+
+# Per-utterance spans in Chrome trace-event format, off unless asked for
+if os.getenv("NO_ALT_TAB_TRACE") == "1":
+    tracing.enable_tracing(os.getenv("NO_ALT_TAB_TRACE_FILE", tracing.DEFAULT_TRACE_FILE))
+
+# Every command log record is persisted to SQLite by a background writer;
+# the most recent ones also stay in a bounded in-memory ring for fast polling.
+# Sequence numbers continue from the stored history so cursors survive restarts
+command_history = HistoryStore(os.getenv("NO_ALT_TAB_HISTORY_DB", DEFAULT_DB_PATH))
+atexit.register(command_history.close)
+command_logs = CommandLogBuffer(
+    capacity=int(os.getenv("NO_ALT_TAB_LOG_CAPACITY", DEFAULT_CAPACITY)),
+    start_seq=command_history.last_seq() + 1
+)
+
+# Live command events for /stream subscribers
+command_events = EventBroadcaster(max_subscribers=STREAM_MAX_SUBSCRIBERS)
+
+# Incremental per-handler statistics for /stats
+command_stats = CommandStats()
+
+# Audio of rejected and low-confidence utterances can be kept on disk, under a
+# size quota, so the vocabulary and thresholds can be tuned from real failures.
+# It records whatever is said near the PC, so it is opt-in (NO_ALT_TAB_CAPTURE_AUDIO=1)
+CAPTURE_CONFIDENCE = 0.75
+audio_archive = None
+
+def start_audio_capture():
+    """
+    Create the audio archive if NO_ALT_TAB_CAPTURE_AUDIO=1; called at startup
+    """
+    global audio_archive
+    if os.getenv("NO_ALT_TAB_CAPTURE_AUDIO", "0") == "1":
+        audio_archive = AudioArchive(
+            os.getenv("NO_ALT_TAB_AUDIO_DIR", DEFAULT_AUDIO_DIR),
+            quota_bytes=int(float(os.getenv("NO_ALT_TAB_AUDIO_QUOTA_MB", 50)) * 1024 * 1024)
+        )
+        logger.info(f"Capturing the audio of rejected utterances in {audio_archive.directory}")
 
 # Initialize command parser
-command_parser = CommandParser()
+command_parser = CommandParser(language_vocabulary_path(LANGUAGE))
+
+# Vocabularies of other languages, loaded when a profile first speaks them
+command_parsers = {LANGUAGE: command_parser}
+
+# Priority, core pinning and a cheaper profile while a game runs (NO_ALT_TAB_GOVERNOR=1)
+resource_governor = ResourceGovernor.from_env(command_parser.phrases_to_handlers)
+
+# Vocabulary profile following the foreground window (NO_ALT_TAB_PROFILES=1)
+profile_switcher = ProfileSwitcher.from_env(command_parser)
 
-def process_command(transcript):
+def record_command(command_log, started, audio=None):
+    """
+    Store a command log record, account its latency and push it to live subscribers
+    
+    Args:
+        command_log: The finished CommandLogRecord
+        started: perf_counter() value when the transcript arrived
+        audio: PCM chunks of the utterance, kept if it was rejected or low-confidence
+    """
+    if audio and audio_archive is not None and (
+            command_log.status == STATUS_REJECTED or command_log.confidence < CAPTURE_CONFIDENCE):
+        command_log.audio = audio_archive.save_async(audio)
+    latency = time.perf_counter() - started
+    handler = command_log.command if command_log.status != STATUS_REJECTED else "none"
+    metrics.dispatch_latency.observe(latency, handler)
+    command_stats.record(command_log.command, command_log.status, latency)
+    command_logs.append(command_log)
+    command_history.add(command_log)
+    command_events.publish("command", command_log.to_dict(), event_id=command_log.seq)
+
+def process_command(transcript, audio=None, parser=None):
     """
     Process a command from the transcript using the command parser
+    
+    Args:
+        transcript: Final transcript of the utterance
+        audio: Optional list of the utterance's PCM chunks
+        parser: CommandParser of the language spoken; the microphone's by default
     """
     if not transcript:
         return None
+    parser = parser or command_parser
+    
+    started = time.perf_counter()
     
     # Log the command
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    command_log = {
-        "timestamp": timestamp,
-        "transcript": transcript,
-        "result": None,
-        "command": None,
-        "confidence": 0
-    }
-    
-    # Parse the command
-    handler_name, confidence = command_parser.parse_command(transcript)
-    command_log["command"] = handler_name
-    command_log["confidence"] = confidence
-    
-    if handler_name and confidence > 0.5:  # Only execute if confidence is high enough
-        try:
-            # Execute the command
-            result = command_parser.execute_command(handler_name, command_text=transcript)
-            command_log["result"] = result
-            command_logs.append(command_log)
-            return result
-        except Exception as e:
-            logger.error(f"Error executing {handler_name} command: {e}")
-            command_log["result"] = f"Error: {str(e)}"
-            command_logs.append(command_log)
+    command_log = CommandLogRecord(timestamp, transcript)
+    
+    with tracing.span("dispatch", transcript=transcript):
+        # Parse the command
+        handler_name, confidence = parser.parse_command(transcript)
+        command_log.command = handler_name
+        command_log.confidence = confidence
+        
+        if handler_name and confidence > 0.5:  # Only execute if confidence is high enough
+            metrics.command_invocations.inc(handler_name)
+            try:
+                # Execute the command
+                result = parser.execute_command(handler_name, command_text=transcript)
+                command_log.result = result
+                command_log.status = result_status(result)
+                if command_log.status == STATUS_ERROR:
+                    metrics.command_errors.inc(handler_name)
+                record_command(command_log, started, audio)
+                return result
+            except Exception as e:
+                logger.error(f"Error executing {handler_name} command: {e}")
+                command_log.result = f"Error: {str(e)}"
+                command_log.status = STATUS_ERROR
+                metrics.command_errors.inc(handler_name)
+                record_command(command_log, started, audio)
+                return None
+        else:
+            # Log unrecognized commands
+            command_log.result = "Command not recognized or confidence too low"
+            command_log.status = STATUS_REJECTED
+            record_command(command_log, started, audio)
+            logger.info(f"No command matched in transcript: {transcript}")
             return None
-    else:
-        # Log unrecognized commands
-        command_log["result"] = "Command not recognized or confidence too low"
-        command_logs.append(command_log)
-        logger.info(f"No command matched in transcript: {transcript}")
-        return None
 
 def download_model():
     """
     Download the Vosk model if it doesn't exist
     """
-    import requests
-    import zipfile
-    import io
+    if MODEL_URL is None and not os.path.exists(MODEL_PATH):
+        logger.error(f"Unknown model '{MODEL_NAME}'; install it to {MODEL_PATH} or set NO_ALT_TAB_MODEL_URL")
+        return False
+    return install_model(MODEL_URL, MODEL_PATH, sha256=os.getenv("NO_ALT_TAB_MODEL_SHA256"))
+
+def ensure_model():
+    """
+    Download the model if needed
+
+    Returns:
+        True if the model is available
+    """
+    return os.path.exists(MODEL_PATH) or download_model()
+
+def load_local_model():
+    """
+    Load the model in this process after losing the recognition server
+
+    Returns:
+        The Model, or None if it could not be loaded
+    """
+    logger.warning("Recognition server is unavailable, loading the model in this process")
+    return ModelLoader(MODEL_PATH, prepare=ensure_model).start().wait()
+
+def load_language_model(language):
+    """
+    Load the model for a language, installing it first if it is a known model
     
-    model_path = "model"
-    model_url = "https://alphacephei.com/vosk/models/vosk-model-small-en-us-0.15.zip"
+    Returns:
+        The Model (a RemoteModel for the microphone's language if a recognition server runs)
     
-    if not os.path.exists(model_path):
-        logger.info(f"Downloading Vosk model from {model_url}")
-        logger.info("This may take a few minutes depending on your internet connection...")
-        
-        response = requests.get(model_url, stream=True)
-        if response.status_code == 200:
-            z = zipfile.ZipFile(io.BytesIO(response.content))
-            z.extractall()
-            # Rename the extracted folder to 'model'
-            extracted_dir = z.namelist()[0].split('/')[0]
-            if os.path.exists(extracted_dir) and extracted_dir != model_path:
-                os.rename(extracted_dir, model_path)
-            logger.info(f"Model downloaded and extracted to {model_path}")
-        else:
-            logger.error(f"Failed to download model: HTTP {response.status_code}")
-            return False
+    Raises:
+        RuntimeError: If the model is not available
+    """
+    if language == LANGUAGE:
+        loader = ModelLoader(MODEL_PATH, prepare=ensure_model, server_address=RECOGNITION_SERVER)
     else:
-        logger.info(f"Model already exists at {model_path}")
+        name = language_model(language)
+        path, url = model_path(name), model_url(name)
+        prepare = (lambda: install_model(url, path)) if url else (lambda: os.path.exists(path))
+        loader = ModelLoader(path, prepare=prepare)
+    model = loader.start().wait()
+    if model is None:
+        raise RuntimeError(f"No speech model for language '{language}': {loader.error}")
+    return model
+
+# Models of the languages in use, evicted least recently used first when
+# they take more memory than NO_ALT_TAB_MODEL_CACHE_MB. The microphone's
+# language is pinned: it is the fallback and must never be reloaded mid-session
+model_cache = ModelCache(load_language_model,
+                         budget_bytes=int(float(os.getenv("NO_ALT_TAB_MODEL_CACHE_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024),
+                         pinned=[LANGUAGE])
+unavailable_languages = set()
+
+def select_vocabulary(vocabulary):
+    """
+    Pick the language and parser for the active vocabulary profile
+    
+    Args:
+        vocabulary: VocabularyProfile chosen by the profile switcher
     
-    return True
+    Returns:
+        Tuple of (language, CommandParser with the same-named profile active).
+        The microphone's language is used while the profile's model loads in
+        the background, and for good if it can't be loaded.
+    """
+    language = vocabulary.language or LANGUAGE
+    if language != LANGUAGE:
+        if language in unavailable_languages:
+            return LANGUAGE, command_parser
+        try:
+            # Never load on this thread: the microphone would go unread and the heartbeat stop
+            if model_cache.get_nowait(language) is None:
+                return LANGUAGE, command_parser
+        except Exception as e:
+            logger.error(f"Using '{LANGUAGE}' instead: {e}")
+            unavailable_languages.add(language)
+            return LANGUAGE, command_parser
+    
+    parser = command_parsers.get(language)
+    if parser is None:
+        parser = command_parsers[language] = CommandParser(language_vocabulary_path(language))
+    if parser is not command_parser:
+        parser.set_profile(vocabulary.name if vocabulary.name in parser.profiles else parser.default_profile)
+    return language, parser
 
-def listen_with_vosk():
+def listen_with_vosk(model_loader=None):
     """
     Continuously listens to the microphone using Vosk for local speech recognition.
     Periodically releases the microphone to allow other applications to use it.
+    
+    Args:
+        model_loader: ModelLoader already loading the model in the background;
+                      one is started if not given
     """
-    # Ensure we have the model
-    if not os.path.exists("model"):
-        if not download_model():
-            logger.error("Failed to download speech recognition model. Exiting.")
-            return
+    # Imported here so the API can come up before these load
+    import pyaudio
     
-    logger.info("Starting voice command listener with Vosk...")
+    if model_loader is None:
+        model_loader = ModelLoader(MODEL_PATH, startup_report, prepare=ensure_model,
+                                   server_address=RECOGNITION_SERVER).start()
+    
+    logger.info("Waiting for the speech recognition model...")
+    model = model_loader.wait()
+    if model is None:
+        logger.error("Failed to load speech recognition model. Exiting.")
+        return
+    model_cache.add(LANGUAGE, model, model_loader.load_time or 0.0, model_loader.resident_bytes or 0)
     
-    # Initialize Vosk model
-    model = Model("model")
+    logger.info("Starting voice command listener with Vosk...")
     
     # Configure audio settings
     CHUNK = 4096
@@ -134,10 +316,44 @@ def listen_with_vosk():
     print("Microphone is shared with games - voice commands will work even while gaming")
     print("=========================================\n")
     
+    speculator = get_speculative_resolver()
+    recorder = UtteranceRecorder()
+    # Reads never raise on overflow, so drops are estimated from the wall clock
+    overflow = OverflowEstimator(RATE, tolerance_frames=CHUNK)
     running = True
     
+    # Decoding runs on this thread
+    if resource_governor is not None:
+        resource_governor.apply_to_current_thread()
+    
+    # Pause decoding after sustained silence (NO_ALT_TAB_DUTY_CYCLE=1)
+    duty_cycle = None
+    if os.getenv("NO_ALT_TAB_DUTY_CYCLE", "0") == "1":
+        duty_cycle = DutyCycle(idle_after=float(os.getenv("NO_ALT_TAB_IDLE_AFTER", DEFAULT_IDLE_AFTER)))
+    
+    # Only decode commands for a few seconds after a wake phrase (NO_ALT_TAB_WAKE_PHRASE)
+    wake_gate = None
+    if os.getenv("NO_ALT_TAB_WAKE_PHRASE"):
+        wake_gate = WakeWordGate(os.getenv("NO_ALT_TAB_WAKE_PHRASE"),
+                                 window=float(os.getenv("NO_ALT_TAB_WAKE_WINDOW", DEFAULT_WINDOW)))
+        logger.info(f"Wake phrase mode: say '{wake_gate.phrase}' before a command")
+    
     while running:
         try:
+            # Vocabulary, language and model for this listening cycle
+            profile = resource_governor.profile() if resource_governor is not None else FULL_PROFILE
+            language, parser = LANGUAGE, command_parser
+            if profile_switcher is not None:
+                # Decode only the phrases of the profile for the focused window, in its language
+                language, parser = select_vocabulary(profile_switcher.update())
+            # Never load on this thread; a model evicted since is reloaded in the background
+            model = model_cache.get_nowait(language)
+            if model is None:
+                language, parser = LANGUAGE, command_parser
+                model = model_cache.get_nowait(LANGUAGE)
+            if profile_switcher is not None:
+                profile = RecognitionProfile(parser.profile.name, parser.profile.grammar, partials=profile.partials)
+            
             # Initialize PyAudio for each listening cycle
             p = pyaudio.PyAudio()
             
@@ -147,9 +363,15 @@ def listen_with_vosk():
                             rate=RATE,
                             input=True,
                             frames_per_buffer=CHUNK)
+            overflow.start()
             
             # Create recognizer
-            rec = KaldiRecognizer(model, RATE)
+            rec = make_recognizer(model, RATE, profile.grammar)
+            if wake_gate is not None:
+                wake_gate.set_spotter(make_recognizer(model, RATE, wake_gate.grammar))
+            server_lost = False
+            metrics.recognizer_restarts.inc()
+            startup_report.mark(PHASE_FIRST_LISTEN)
             
             logger.info("Listening for commands...")
             print("Listening...", end="\r")
@@ -163,49 +385,112 @@ def listen_with_vosk():
             # Listen for LISTEN_DURATION seconds
             while time.time() - start_time < LISTEN_DURATION:
                 try:
-                    data = stream.read(CHUNK, exception_on_overflow=False)
+                    with tracing.span("capture"):
+                        data = stream.read(CHUNK, exception_on_overflow=False)
                     if len(data) == 0:
                         break
+                    metrics.audio_frames_read.inc(amount=len(data) // 2)
+                    overflow.read(len(data) // 2)
+                    listener_heartbeat.beat()
+                    recorder.add(data)
+                    
+                    if duty_cycle is not None:
+                        # While idle only the voice detector runs; on voice the pre-roll comes along
+                        data = duty_cycle.process(data)
+                        if data is None:
+                            metrics.audio_chunks_idle.inc()
+                            continue
+                    
+                    if wake_gate is not None:
+                        gate = wake_gate.accept(data)
+                        if gate == GATE_CLOSED:
+                            continue  # only the keyword spotter heard this chunk
+                        if gate == GATE_OPENED:
+                            rec.Reset()
+                            # The phrase was spotted late; the command may have started already
+                            for chunk in wake_gate.take_pre_roll():
+                                rec.AcceptWaveform(chunk)
                     
                     # Show partial results for better feedback
-                    partial = json.loads(rec.PartialResult())
-                    partial_text = partial.get("partial", "")
+                    partial_text = ""
+                    if profile.partials:
+                        partial_text = json.loads(rec.PartialResult()).get("partial", "")
                     if partial_text and partial_text != last_partial:
                         print(f"Hearing: {partial_text}                ", end="\r")
                         last_partial = partial_text
+                        # Start resolving likely command targets before the final result
+                        speculator.observe_partial(partial_text)
+                        if command_events.wants_partials():
+                            command_events.publish("partial", {"text": partial_text})
+                    
+                    decode_started = time.perf_counter()
+                    with tracing.span("decode") as span:
+                        final = rec.AcceptWaveform(data)
+                        span.set(final=final)
+                    metrics.recognition_latency.observe(time.perf_counter() - decode_started)
                     
-                    if rec.AcceptWaveform(data):
+                    if final:
                         result = json.loads(rec.Result())
                         transcript = result.get("text", "")
+                        if wake_gate is not None:
+                            transcript = wake_gate.strip(transcript)
+                        last_partial = ""
+                        audio = recorder.finish()
                         
                         if transcript:
                             print(f"\nRecognized: {transcript}")
                             logger.info(f"Raw transcript: {transcript}")
                             
                             # Process the command
-                            command_result = process_command(transcript)
+                            command_result = process_command(transcript, audio, parser)
                             if command_result:
                                 print(f"Result: {command_result}")
                                 logger.info(f"Command result: {command_result}")
                             else:
                                 print("Command not recognized. Try again.")
                             
+                            # One command per wake phrase
+                            if wake_gate is not None:
+                                wake_gate.close()
+                            
                             print("\nListening for next command...")
+                        
+                        speculator.end_utterance()
+                        tracing.begin_utterance()
                 
                 except KeyboardInterrupt:
                     print("\nStopping voice command listener...")
                     logger.info("Stopping voice command listener...")
                     running = False
                     break
+                except (EOFError, ConnectionError) as e:
+                    logger.error(f"Lost the recognition server: {e}")
+                    server_lost = True
+                    break
                 except Exception as e:
                     logger.error(f"Error processing audio: {e}")
                     time.sleep(0.1)  # Prevent tight loop in case of recurring errors
             
+            try:
+                buffered = stream.get_read_available()
+            except (IOError, OSError):
+                buffered = 0
+            dropped = overflow.finish(buffered)
+            if dropped:
+                metrics.audio_frames_dropped.inc(amount=dropped)
+            
             # Close the stream and release the microphone
             stream.stop_stream()
             stream.close()
             p.terminate()
             
+            if isinstance(model, RemoteModel):
+                rec.close()  # returns the recognizer to the server's pool
+                if wake_gate is not None:
+                    wake_gate.release_spotter().close()
+                if server_lost:
+                    model_cache.add(LANGUAGE, load_local_model() or model)
+            
             # Brief pause to allow other applications to access the microphone
             if running:
                 time.sleep(PAUSE_DURATION)
@@ -217,30 +502,80 @@ def listen_with_vosk():
         except Exception as e:
             logger.error(f"Error in voice command listener: {e}")
             print(f"\nError: {e}")
+            if isinstance(model, RemoteModel) and ping(model.address) is None:
+                model_cache.add(LANGUAGE, load_local_model() or model)
             time.sleep(1)  # Wait before retrying
 
 
 
-# REST API endpoints
-@app.route('/logs', methods=['GET'])
-def get_logs():
-    return jsonify(command_logs)
+# REST API; see agent/api.py for the server modes
+API_MODE = os.getenv("NO_ALT_TAB_API_MODE", "threaded")
+API_PORT = int(os.getenv("NO_ALT_TAB_API_PORT", DEFAULT_PORT))
+
+def start_api_server(mode=API_MODE, timeout=10):
+    """
+    Start the REST API and wait until it answers /health
+
+    Args:
+        mode: "dev", "threaded" or "process", see agent/api.py
+        timeout: Seconds to wait for the API to come up
+    """
+    if mode not in API_MODES:
+        logger.warning(f"Unknown API mode '{mode}', using 'threaded'")
+        mode = "threaded"
+    
+    if mode == "process":
+        # The separate process serves /logs and /stream from the SQLite history
+        audio_dir = audio_archive.directory if audio_archive is not None else None
+        server = start_api_process(command_history.path, DEFAULT_HOST, API_PORT, audio_dir)
+    else:
+        app = create_app(command_logs, command_history, command_events, command_stats, metrics.registry,
+                         health=lambda: dict(startup_report.to_dict(), heartbeat_age=listener_heartbeat.age(),
+                                             models=model_cache.stats()),
+                         audio_archive=audio_archive)
+        server = threading.Thread(target=serve, args=(app, mode, DEFAULT_HOST, API_PORT), name="api-server")
+        server.daemon = True
+        server.start()
+    
+    if wait_for(url_responds(f"http://127.0.0.1:{API_PORT}/health"), timeout=timeout, initial_interval=0.01):
+        startup_report.mark(PHASE_API)
+    else:
+        logger.warning(f"API did not answer within {timeout}s")
+    return server
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({'status': 'healthy'})
+def exit_on_sigterm(signum, frame):
+    """
+    Exit through sys.exit, so atexit hooks flush the command history and stop the API process
+    """
+    logger.info("Received SIGTERM, shutting down")
+    sys.exit(0)
 
-def start_api_server():
-    """Start the Flask API server"""
-    app.run(host='0.0.0.0', port=5000)
+def stop_when_supervisor_closes_stdin():
+    """
+    Stop as on Ctrl+C once the supervisor closes our stdin, which it does
+    before terminating us (on Windows there is no SIGTERM to catch)
+    """
+    # os.read rather than sys.stdin, whose lock would block interpreter shutdown
+    while os.read(sys.stdin.fileno(), 1024):
+        pass
+    logger.info("Supervisor asked the agent to stop")
+    _thread.interrupt_main()
 
 if __name__ == "__main__":
     logger.info("Game Agent starting up...")
     
-    # Start the API server in a separate thread
-    api_thread = threading.Thread(target=start_api_server)
-    api_thread.daemon = True
-    api_thread.start()
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+    if os.getenv(SUPERVISED_ENV) == "1" and sys.stdin is not None:
+        threading.Thread(target=stop_when_supervisor_closes_stdin, name="supervisor-pipe", daemon=True).start()
+    
+    start_audio_capture()
+    
+    # Load the model in the background while the API comes up
+    model_loader = ModelLoader(MODEL_PATH, startup_report, prepare=ensure_model,
+                               server_address=RECOGNITION_SERVER).start()
+    
+    # Start the API server in a thread or a separate process
+    start_api_server()
     
     # Use Vosk for local speech recognition
-    listen_with_vosk()
+    listen_with_vosk(model_loader)
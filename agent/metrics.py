@@ -0,0 +1,338 @@
+"""
+Lock-light metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are sharded per thread: each thread updates its own
+cells without taking a lock, and only registering a new thread or scraping
+the metrics touches shared state. Shards of threads that have ended are
+folded into a single retired shard, so short-lived request threads don't
+pile up.
+"""
+import os
+import sys
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger("game-agent")
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Sharded:
+    """
+    Per-thread storage; the owning thread is the only writer of its shard
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        # (owning thread, shard) pairs of the threads still running
+        self._shards = []
+        # Totals of threads that have ended; only changed under the lock
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            with self._lock:
+                self._reclaim()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _merge(self, into, shard):
+        """
+        Add the cells of shard to into
+        """
+        raise NotImplementedError
+
+    def _reclaim(self):
+        # A thread that has ended never writes its shard again, so it can be merged
+        running = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                running.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = running
+
+    def _snapshots(self):
+        with self._lock:
+            self._reclaim()
+            shards = [shard for _, shard in self._shards]
+            # dict.copy() runs without releasing the GIL, so it is a consistent view
+            return [self._retired.copy()] + [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    """
+    Monotonically increasing counter with optional labels
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, *labelvalues, amount=1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def _merge(self, into, shard):
+        for key, value in shard.items():
+            into[key] = into.get(key, 0) + value
+
+    def values(self):
+        """
+        Returns:
+            Dictionary of label values tuple -> total
+        """
+        totals = {}
+        for snapshot in self._snapshots():
+            for key, value in snapshot.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self):
+        lines = []
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Sharded):
+    """
+    Histogram with fixed buckets and optional labels
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues):
+        shard = self._shard()
+        cell = shard.get(labelvalues)
+        if cell is None:
+            # Bucket counts (non-cumulative, last one is +Inf) followed by the sum
+            cell = [0] * (len(self.buckets) + 1) + [0.0]
+            shard[labelvalues] = cell
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def _merge(self, into, shard):
+        for key, cell in shard.items():
+            total = into.setdefault(key, [0] * len(cell))
+            for i, value in enumerate(cell):
+                total[i] += value
+
+    def values(self):
+        """
+        Returns:
+            Dictionary of label values tuple -> (bucket counts, sum)
+        """
+        totals = {}
+        for snapshot in self._snapshots():
+            for key, cell in snapshot.items():
+                cell = list(cell)
+                total = totals.setdefault(key, [0] * len(cell))
+                for i, value in enumerate(cell):
+                    total[i] += value
+        return {key: (cell[:-1], cell[-1]) for key, cell in totals.items()}
+
+    def render(self):
+        lines = []
+        for key, (counts, total) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Metric whose value is read from a function at scrape time
+    """
+
+    def __init__(self, name, documentation, callback, kind="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.kind = kind
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.debug(f"Could not read metric {self.name}: {e}")
+            return []
+        if value is None:
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together for /metrics
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name, documentation, callback):
+        return self.register(CallbackMetric(name, documentation, callback, "gauge"))
+
+    def counter_callback(self, name, documentation, callback):
+        return self.register(CallbackMetric(name, documentation, callback, "counter"))
+
+    def render(self):
+        """
+        Returns:
+            All metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def process_cpu_seconds():
+    """
+    Returns:
+        User plus system CPU time consumed by this process
+    """
+    times = os.times()
+    return times.user + times.system
+
+
+def _windows_memory_counters(process=None):
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    if process is None:
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+    if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return counters
+    return None
+
+
+def process_rss_bytes():
+    """
+    Returns:
+        Resident set size of this process in bytes, or None if unavailable
+    """
+    if sys.platform == 'win32':
+        counters = _windows_memory_counters()
+        return counters.WorkingSetSize if counters is not None else None
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def process_peak_rss_bytes():
+    """
+    Returns:
+        Highest resident set size this process has reached, or None if unavailable
+    """
+    if sys.platform == 'win32':
+        counters = _windows_memory_counters()
+        return counters.PeakWorkingSetSize if counters is not None else None
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# Shared registry and the agent's metrics
+registry = MetricsRegistry()
+
+command_invocations = registry.counter(
+    "agent_command_invocations_total", "Command handler invocations", ("handler",))
+command_errors = registry.counter(
+    "agent_command_errors_total", "Command handler invocations that failed", ("handler",))
+recognition_latency = registry.histogram(
+    "agent_recognition_latency_seconds", "Time spent decoding one audio chunk")
+dispatch_latency = registry.histogram(
+    "agent_dispatch_latency_seconds", "Time from final transcript to handler result", ("handler",))
+audio_frames_read = registry.counter(
+    "agent_audio_frames_read_total", "Audio frames read from the microphone")
+audio_frames_dropped = registry.counter(
+    "agent_audio_frames_dropped_total", "Audio frames lost to input buffer overflows, estimated from the wall clock")
+recognizer_restarts = registry.counter(
+    "agent_recognizer_restarts_total", "Speech recognizers created by the listen loop")
+parse_cache_hits = registry.counter(
+    "agent_parse_cache_hits_total", "Transcripts parsed from the parse cache")
+parse_cache_misses = registry.counter(
+    "agent_parse_cache_misses_total", "Transcripts matched against the vocabulary")
+audio_chunks_idle = registry.counter(
+    "agent_audio_chunks_idle_total", "Audio chunks that arrived while decoding was paused for silence")
+
+registry.counter_callback("process_cpu_seconds_total", "User and system CPU time in seconds", process_cpu_seconds)
+registry.gauge_callback("process_resident_memory_bytes", "Resident memory size in bytes", process_rss_bytes)
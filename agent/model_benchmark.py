@@ -0,0 +1,226 @@
+"""
+Benchmark of the installed speech models on a local labeled corpus.
+
+The corpus is a directory of 16-bit mono WAV files, each with a .txt file
+of the same name holding what was said. Every model runs in its own
+subprocess, so its peak RSS is measured in isolation, and is reported
+with:
+
+- load time: seconds to load the model
+- RTF: decoding time divided by audio duration (below 1 is faster than real time)
+- WER: word error rate against the reference transcripts
+- command accuracy: share of utterances that parse to the same command as
+  their reference transcript
+
+    python -m agent.model_benchmark --corpus recordings/
+"""
+import os
+import sys
+import json
+import time
+import wave
+import argparse
+import subprocess
+from agent.metrics import process_peak_rss_bytes
+from agent.model_registry import list_models, model_path
+
+CHUNK_FRAMES = 4000
+
+# Models slower than this leave too little CPU for games
+DEFAULT_MAX_RTF = 0.3
+
+
+def load_corpus(directory):
+    """
+    Returns:
+        List of (wav_path, reference transcript) pairs, sorted by file name
+    """
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".wav"):
+            continue
+        wav_path = os.path.join(directory, name)
+        text_path = os.path.splitext(wav_path)[0] + ".txt"
+        if not os.path.exists(text_path):
+            continue
+        with open(text_path, encoding="utf-8") as f:
+            corpus.append((wav_path, f.read().strip().lower()))
+    return corpus
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Returns:
+        Word-level edit distance divided by the number of reference words
+    """
+    ref = reference.split()
+    hyp = hypothesis.split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref) if ref else float(len(hyp) > 0)
+
+
+def transcribe(recognizer, wav):
+    """
+    Returns:
+        Transcript of an open wave file
+    """
+    texts = []
+    while True:
+        data = wav.readframes(CHUNK_FRAMES)
+        if not data:
+            break
+        if recognizer.AcceptWaveform(data):
+            texts.append(json.loads(recognizer.Result()).get("text", ""))
+    texts.append(json.loads(recognizer.FinalResult()).get("text", ""))
+    return " ".join(t for t in texts if t)
+
+
+def _load_vosk(path):
+    from vosk import Model, KaldiRecognizer, SetLogLevel
+    SetLogLevel(-1)
+    model = Model(path)
+    return lambda rate: KaldiRecognizer(model, rate)
+
+
+def benchmark_model(path, corpus, load=_load_vosk, parser=None):
+    """
+    Run the corpus through one model in this process
+
+    Args:
+        path: Model directory
+        corpus: List of (wav_path, reference) pairs, see load_corpus()
+        load: Callable loading the model at path and returning a recognizer factory (rate)
+        parser: CommandParser used for command accuracy
+
+    Returns:
+        Dictionary of the measurements
+    """
+    if parser is None:
+        from agent.command_parser import CommandParser
+        parser = CommandParser()
+
+    started = time.perf_counter()
+    make_recognizer = load(path)
+    load_time = time.perf_counter() - started
+
+    audio_seconds = decode_seconds = errors = 0.0
+    words = commands = correct_commands = 0
+    for wav_path, reference in corpus:
+        with wave.open(wav_path, "rb") as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                raise ValueError(f"{wav_path} is not 16-bit mono")
+            audio_seconds += wav.getnframes() / wav.getframerate()
+            recognizer = make_recognizer(wav.getframerate())
+            started = time.perf_counter()
+            hypothesis = transcribe(recognizer, wav)
+            decode_seconds += time.perf_counter() - started
+
+        ref_words = len(reference.split())
+        errors += word_error_rate(reference, hypothesis) * ref_words
+        words += ref_words
+        expected, _ = parser.parse_command(reference)
+        if expected is not None:
+            commands += 1
+            correct_commands += parser.parse_command(hypothesis)[0] == expected
+
+    return {
+        "path": path,
+        "utterances": len(corpus),
+        "load_time": round(load_time, 3),
+        "rtf": round(decode_seconds / audio_seconds, 4) if audio_seconds else None,
+        "wer": round(errors / words, 4) if words else None,
+        "command_accuracy": round(correct_commands / commands, 4) if commands else None,
+        "peak_rss_bytes": process_peak_rss_bytes(),
+    }
+
+
+def run_isolated(path, corpus_dir, timeout=None):
+    """
+    Benchmark a model in a fresh subprocess so its memory use is its own
+
+    Returns:
+        The measurements, or a dictionary with an "error" key
+    """
+    process = subprocess.run([sys.executable, "-m", "agent.model_benchmark", "--worker", path, "--corpus", corpus_dir],
+                             capture_output=True, text=True, timeout=timeout)
+    if process.returncode != 0:
+        return {"path": path, "error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else
+                f"exit code {process.returncode}"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def recommend(results, max_rtf=DEFAULT_MAX_RTF, max_rss_bytes=None):
+    """
+    Pick the most accurate model that is fast and small enough
+
+    Returns:
+        Name of the recommended model, or None if none qualifies
+    """
+    candidates = [
+        (name, result) for name, result in results.items()
+        if "error" not in result and result["rtf"] is not None and result["rtf"] <= max_rtf
+        and (max_rss_bytes is None or (result["peak_rss_bytes"] or 0) <= max_rss_bytes)
+    ]
+    if not candidates:
+        return None
+    # Command accuracy first, then WER, then the cheaper model
+    return min(candidates, key=lambda item: (-(item[1]["command_accuracy"] or 0), item[1]["wer"] or 0,
+                                             item[1]["rtf"]))[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the installed speech models on a labeled WAV corpus")
+    parser.add_argument("--corpus", required=True, help="Directory of .wav files with matching .txt transcripts")
+    parser.add_argument("--models", nargs="*", help="Model names or directories (default: all installed)")
+    parser.add_argument("--max-rtf", type=float, default=DEFAULT_MAX_RTF, help="Slowest acceptable real-time factor")
+    parser.add_argument("--max-rss-mb", type=float, default=None, help="Largest acceptable peak RSS")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if args.worker:
+        print(json.dumps(benchmark_model(args.worker, corpus)))
+        return
+    if not corpus:
+        sys.exit(f"No .wav files with .txt transcripts in {args.corpus}")
+
+    if args.models:
+        models = {name: model_path(name) for name in args.models}
+    else:
+        models = {model.name: model.path for model in list_models()}
+    if not models:
+        sys.exit("No models installed; see agent/model_registry.py")
+
+    results = {}
+    for name, path in models.items():
+        print(f"Benchmarking {name} on {len(corpus)} utterances...", file=sys.stderr)
+        results[name] = run_isolated(path, args.corpus)
+
+    max_rss = args.max_rss_mb * 1024 * 1024 if args.max_rss_mb else None
+    best = recommend(results, args.max_rtf, max_rss)
+    if args.json:
+        print(json.dumps({"results": results, "recommended": best}, indent=2))
+        return
+
+    print(f"\n{'model':<32} {'load s':>7} {'RTF':>7} {'RSS MB':>8} {'WER':>7} {'cmd acc':>8}")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<32} failed: {result['error']}")
+            continue
+        rss = result["peak_rss_bytes"] / 1024 / 1024 if result["peak_rss_bytes"] else float("nan")
+        print(f"{name:<32} {result['load_time']:>7.2f} {result['rtf']:>7.3f} {rss:>8.0f} "
+              f"{result['wer'] or 0:>7.3f} {result['command_accuracy'] or 0:>8.1%}")
+    if best:
+        print(f"\nRecommended: {best}  (set NO_ALT_TAB_MODEL={best})")
+    else:
+        print(f"\nNo model decodes faster than RTF {args.max_rtf} within the memory limit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Speech models for several languages, kept resident within a memory budget.
+
+Models are loaded on first use. When the models in the cache take more
+resident memory than the budget, the least recently used languages are
+evicted until it fits again; the language just requested, and pinned
+languages such as the microphone's, always stay.
+get_nowait() loads on a background thread instead, so the listen loop keeps
+reading the microphone (and beating its heartbeat) while a model loads or
+downloads.
+Load latency and the resident memory each model added are kept per
+language for /health.
+
+NO_ALT_TAB_MODEL_CACHE_MB sets the budget.
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from agent.metrics import process_rss_bytes
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_BUDGET_MB = 1024
+
+
+class CachedModel:
+    """
+    A loaded model and what it cost
+    """
+
+    __slots__ = ("language", "model", "load_time", "resident_bytes", "last_used")
+
+    def __init__(self, language, model, load_time, resident_bytes, last_used):
+        self.language = language
+        self.model = model
+        self.load_time = load_time
+        self.resident_bytes = resident_bytes
+        self.last_used = last_used
+
+
+class ModelCache:
+    """
+    LRU cache of models by language with a resident memory budget
+    """
+
+    def __init__(self, load, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024, rss=process_rss_bytes,
+                 clock=time.monotonic, pinned=()):
+        """
+        Args:
+            load: Callable loading the model for a language; raises if it cannot
+            budget_bytes: Resident memory the cached models may take; None for no limit
+            rss: Callable returning the process's resident memory, used to measure each load
+            pinned: Languages never evicted to make room, e.g. the microphone's
+        """
+        self._load = load
+        self.budget_bytes = budget_bytes
+        self.pinned = frozenset(pinned)
+        self._rss = rss
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # Per language: loads, evictions and the last load time, kept after eviction
+        self._history = {}
+        # Background loads in progress, and errors of finished ones not yet reported
+        self._pending = set()
+        self._errors = {}
+
+    def _history_of(self, language):
+        return self._history.setdefault(language, {"loads": 0, "evictions": 0, "load_seconds": None})
+
+    def _touch(self, language):
+        with self._lock:
+            entry = self._entries.get(language)
+            if entry is not None:
+                self._entries.move_to_end(language)
+                entry.last_used = self._clock()
+            return entry
+
+    def get(self, language):
+        """
+        Returns:
+            The model for the language, loading it (and evicting others) if needed
+        """
+        entry = self._touch(language)
+        if entry is not None:
+            return entry.model
+
+        # One load at a time; another thread may have loaded it meanwhile
+        with self._load_lock:
+            entry = self._touch(language)
+            if entry is not None:
+                return entry.model
+            rss_before = self._rss() or 0
+            started = time.perf_counter()
+            model = self._load(language)
+            load_time = time.perf_counter() - started
+            resident = max(0, (self._rss() or 0) - rss_before)
+            logger.info(f"Loaded the '{language}' speech model in {load_time:.2f}s "
+                        f"({resident / (1024 * 1024):.0f} MB resident)")
+            self.add(language, model, load_time, resident)
+            return model
+
+    def get_nowait(self, language):
+        """
+        Returns:
+            The model for the language if it is resident, else None after
+            starting to load it on a background thread
+
+        Raises:
+            The loader's error, once, if the background load failed
+        """
+        entry = self._touch(language)
+        if entry is not None:
+            return entry.model
+        with self._lock:
+            if language in self._errors:
+                raise self._errors.pop(language)
+            if language in self._pending:
+                return None
+            self._pending.add(language)
+        logger.info(f"Loading the '{language}' speech model in the background")
+        threading.Thread(target=self._load_in_background, args=(language,),
+                         name=f"model-cache-{language}", daemon=True).start()
+        return None
+
+    def _load_in_background(self, language):
+        try:
+            self.get(language)
+        except Exception as e:
+            with self._lock:
+                self._errors[language] = e
+        finally:
+            with self._lock:
+                self._pending.discard(language)
+
+    def add(self, language, model, load_time=0.0, resident_bytes=0):
+        """
+        Put an already loaded model in the cache, e.g. the one loaded at startup
+        """
+        with self._lock:
+            self._entries[language] = CachedModel(language, model, load_time, resident_bytes, self._clock())
+            self._entries.move_to_end(language)
+            history = self._history_of(language)
+            history["loads"] += 1
+            history["load_seconds"] = round(load_time, 3)
+            self._evict_over_budget(keep=language)
+
+    def _evict_over_budget(self, keep):
+        if self.budget_bytes is None:
+            return
+        for language in list(self._entries):
+            if self._resident_bytes() <= self.budget_bytes:
+                break
+            if language == keep or language in self.pinned:
+                continue
+            entry = self._entries.pop(language)
+            self._history_of(language)["evictions"] += 1
+            logger.info(f"Evicted the idle '{language}' speech model "
+                        f"({entry.resident_bytes / (1024 * 1024):.0f} MB)")
+
+    def _resident_bytes(self):
+        return sum(entry.resident_bytes for entry in self._entries.values())
+
+    def evict(self, language):
+        """
+        Drop a language's model; returns True if it was loaded
+        """
+        with self._lock:
+            if self._entries.pop(language, None) is None:
+                return False
+            self._history_of(language)["evictions"] += 1
+            return True
+
+    def languages(self):
+        """
+        Returns:
+            Languages with a resident model, least recently used first
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self):
+        """
+        Returns:
+            Dict of the budget, the resident total and per language: whether it is
+            loaded, loads, evictions, last load time, resident bytes and idle seconds
+        """
+        with self._lock:
+            now = self._clock()
+            languages = {}
+            for language, history in self._history.items():
+                entry = self._entries.get(language)
+                languages[language] = dict(
+                    history,
+                    loaded=entry is not None,
+                    resident_bytes=entry.resident_bytes if entry is not None else 0,
+                    idle_seconds=round(now - entry.last_used, 1) if entry is not None else None,
+                )
+            return {
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self._resident_bytes(),
+                "languages": languages,
+            }
@@ -0,0 +1,223 @@
+"""
+Download and installation of the Vosk speech model.
+
+The archive is streamed to a .part file next to the model directory, so an
+interrupted download resumes with an HTTP Range request instead of starting
+over. It is then verified, extracted member by member into a temporary
+directory and renamed into place, so a half-installed model is never seen
+at the model path.
+
+Run it directly to install the model, e.g. in the Docker build:
+    python -m agent.model_installer --model-path model
+"""
+import os
+import sys
+import time
+import shutil
+import hashlib
+import logging
+import zipfile
+import argparse
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_MODEL_URL = "https://alphacephei.com/vosk/models/vosk-model-small-en-us-0.15.zip"
+DEFAULT_MODEL_PATH = "model"
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_RETRIES = 5
+DEFAULT_TIMEOUT = 30
+
+
+class ModelInstallError(Exception):
+    """
+    The model could not be downloaded, verified or extracted
+    """
+
+
+def log_progress(interval=5.0):
+    """
+    Returns:
+        A progress callback (done, total) that logs at most every interval seconds
+    """
+    last = [0.0]
+
+    def progress(done, total):
+        now = time.monotonic()
+        if now - last[0] < interval and done != total:
+            return
+        last[0] = now
+        if total:
+            logger.info(f"Downloaded {done / 1e6:.1f} of {total / 1e6:.1f} MB ({100 * done / total:.0f}%)")
+        else:
+            logger.info(f"Downloaded {done / 1e6:.1f} MB")
+
+    return progress
+
+
+def _sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest
+
+
+def download(url, path, progress=None, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT):
+    """
+    Stream url to path, resuming from whatever path already holds
+
+    Args:
+        url: URL of the file
+        path: Destination; an existing partial file is continued with a Range request
+        progress: Optional callable (bytes_done, bytes_total or None)
+        retries: Attempts after a dropped connection before giving up
+        timeout: Socket timeout in seconds
+
+    Returns:
+        SHA-256 hash object of the complete file
+    """
+    for attempt in range(retries + 1):
+        done = os.path.getsize(path) if os.path.exists(path) else 0
+        request = urllib.request.Request(url, headers={"Range": f"bytes={done}-"} if done else {})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                if done and response.status != 206:
+                    # The server ignored the Range header; start over
+                    logger.info("Server does not support resuming, restarting the download")
+                    done = 0
+                elif done:
+                    logger.info(f"Resuming download at {done / 1e6:.1f} MB")
+                length = response.headers.get("Content-Length")
+                total = done + int(length) if length is not None else None
+
+                digest = _sha256_of(path) if done else hashlib.sha256()
+                with open(path, "ab" if done else "wb") as f:
+                    while True:
+                        block = response.read(CHUNK_SIZE)
+                        if not block:
+                            break
+                        f.write(block)
+                        digest.update(block)
+                        done += len(block)
+                        if progress is not None:
+                            progress(done, total)
+                if total is not None and done < total:
+                    raise ConnectionError(f"Connection closed after {done} of {total} bytes")
+                return digest
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and done:
+                # Nothing left to fetch: the partial file is already complete
+                return _sha256_of(path)
+            raise ModelInstallError(f"Failed to download model: HTTP {e.code}") from e
+        except (urllib.error.URLError, OSError) as e:
+            if attempt == retries:
+                raise ModelInstallError(f"Failed to download model: {e}") from e
+            delay = min(2 ** attempt, 30)
+            logger.warning(f"Download interrupted ({e}), retrying in {delay}s")
+            time.sleep(delay)
+
+
+def verify(path, digest, sha256=None):
+    """
+    Check the archive against the expected SHA-256, or its CRCs without one
+
+    Raises:
+        ModelInstallError: The archive is corrupt or does not match
+    """
+    if sha256:
+        if digest.hexdigest() != sha256.lower():
+            raise ModelInstallError(f"Checksum mismatch: expected {sha256}, got {digest.hexdigest()}")
+        return
+    try:
+        with zipfile.ZipFile(path) as archive:
+            bad = archive.testzip()
+    except zipfile.BadZipFile as e:
+        raise ModelInstallError(f"Downloaded model is not a valid zip file: {e}") from e
+    if bad is not None:
+        raise ModelInstallError(f"Downloaded model is corrupt ({bad} fails its CRC check)")
+
+
+def extract(path, target):
+    """
+    Extract the archive to target one member at a time.
+
+    An archive with a single top-level directory (as the Vosk models are) has
+    that directory's contents placed directly in target.
+
+    Raises:
+        ModelInstallError: A member would be written outside target
+    """
+    root = os.path.realpath(target)
+    with zipfile.ZipFile(path) as archive:
+        members = [m for m in archive.infolist() if not m.is_dir()]
+        tops = {m.filename.split("/", 1)[0] for m in members}
+        strip = len(tops) == 1 and all("/" in m.filename for m in members)
+
+        for member in members:
+            name = member.filename.split("/", 1)[1] if strip else member.filename
+            destination = os.path.realpath(os.path.join(root, name))
+            if os.path.commonpath([root, destination]) != root:
+                raise ModelInstallError(f"Refusing to extract {member.filename} outside the model directory")
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            with archive.open(member) as source, open(destination, "wb") as f:
+                shutil.copyfileobj(source, f, CHUNK_SIZE)
+
+
+def install_model(url=DEFAULT_MODEL_URL, model_path=DEFAULT_MODEL_PATH, sha256=None, progress=None,
+                  retries=DEFAULT_RETRIES):
+    """
+    Download, verify and install the model unless model_path already exists
+
+    Args:
+        url: URL of the model zip
+        model_path: Directory to install the model to
+        sha256: Optional expected SHA-256 of the zip; without it the zip's CRCs are checked
+        progress: Optional callable (bytes_done, bytes_total or None); logs progress by default
+        retries: Attempts after a dropped connection before giving up
+
+    Returns:
+        True if the model is installed, False if installing failed
+    """
+    if os.path.exists(model_path):
+        logger.info(f"Model already exists at {model_path}")
+        return True
+
+    model_path = model_path.rstrip("/\\")
+    part_path = model_path + ".zip.part"
+    staging = f"{model_path}.tmp-{os.getpid()}"
+    logger.info(f"Downloading Vosk model from {url}")
+    try:
+        digest = download(url, part_path, progress or log_progress(), retries)
+        try:
+            verify(part_path, digest, sha256)
+        except ModelInstallError:
+            os.remove(part_path)  # resuming a bad file would not help
+            raise
+        extract(part_path, staging)
+        os.replace(staging, model_path)
+        os.remove(part_path)
+    except (ModelInstallError, OSError, zipfile.BadZipFile) as e:
+        logger.error(f"Failed to install model: {e}")
+        return False
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    logger.info(f"Model downloaded and extracted to {model_path}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download and install the Vosk speech model")
+    parser.add_argument("--url", default=DEFAULT_MODEL_URL, help="URL of the model zip")
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH, help="Directory to install the model to")
+    parser.add_argument("--sha256", default=os.getenv("NO_ALT_TAB_MODEL_SHA256"), help="Expected SHA-256 of the zip")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(0 if install_model(args.url, args.model_path, args.sha256) else 1)
+
+
+if __name__ == "__main__":
+    main()
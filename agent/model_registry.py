@@ -0,0 +1,145 @@
+"""
+Installed speech models, selected by name.
+
+Models live in models/<name>/. The original single model/ directory is
+still recognized and used by default. NO_ALT_TAB_MODEL picks another one,
+e.g. NO_ALT_TAB_MODEL=vosk-model-en-us-0.22-lgraph; run
+python -m agent.model_benchmark to see which one suits the machine.
+
+Each language has its own model. NO_ALT_TAB_LANGUAGE sets the language of
+the microphone and NO_ALT_TAB_MODEL_<LANGUAGE> (e.g. NO_ALT_TAB_MODEL_DE)
+the model used for another language.
+"""
+import os
+import logging
+from agent.model_installer import DEFAULT_MODEL_URL
+
+logger = logging.getLogger("game-agent")
+
+MODELS_DIR = "models"
+LEGACY_MODEL_PATH = "model"
+LEGACY_MODEL_NAME = "default"
+
+# Models that can be downloaded by name (see agent/model_installer.py)
+KNOWN_MODELS = {
+    "vosk-model-small-en-us-0.15": DEFAULT_MODEL_URL,
+    "vosk-model-en-us-0.22-lgraph": "https://alphacephei.com/vosk/models/vosk-model-en-us-0.22-lgraph.zip",
+    "vosk-model-en-us-0.22": "https://alphacephei.com/vosk/models/vosk-model-en-us-0.22.zip",
+    "vosk-model-small-de-0.15": "https://alphacephei.com/vosk/models/vosk-model-small-de-0.15.zip",
+}
+
+DEFAULT_LANGUAGE = "en"
+
+# Model used for each language unless NO_ALT_TAB_MODEL_<LANGUAGE> says otherwise
+LANGUAGE_MODELS = {
+    "de": "vosk-model-small-de-0.15",
+}
+
+
+class InstalledModel:
+    """
+    A model directory on disk
+    """
+
+    __slots__ = ("name", "path", "size_bytes")
+
+    def __init__(self, name, path, size_bytes):
+        self.name = name
+        self.path = path
+        self.size_bytes = size_bytes
+
+    def __repr__(self):
+        return f"InstalledModel({self.name!r}, {self.path!r}, {self.size_bytes})"
+
+
+def is_model_dir(path):
+    """
+    Returns:
+        True if path looks like a Vosk model (it has an am/ or conf/ directory)
+    """
+    return os.path.isdir(os.path.join(path, "am")) or os.path.isfile(os.path.join(path, "conf", "model.conf"))
+
+
+def _size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def list_models(models_dir=MODELS_DIR, legacy_path=LEGACY_MODEL_PATH):
+    """
+    Returns:
+        InstalledModel for each model directory, the legacy model/ first
+    """
+    models = []
+    if is_model_dir(legacy_path):
+        models.append(InstalledModel(LEGACY_MODEL_NAME, legacy_path, _size(legacy_path)))
+    if os.path.isdir(models_dir):
+        for name in sorted(os.listdir(models_dir)):
+            path = os.path.join(models_dir, name)
+            if is_model_dir(path):
+                models.append(InstalledModel(name, path, _size(path)))
+    return models
+
+
+def model_path(name=None, models_dir=MODELS_DIR, legacy_path=LEGACY_MODEL_PATH):
+    """
+    Directory of the named model, whether or not it is installed yet
+
+    Args:
+        name: Model name; None or "default" means the legacy model/ directory.
+              A path to a model directory is returned unchanged.
+
+    Returns:
+        Path to the model directory
+    """
+    if not name or name == LEGACY_MODEL_NAME:
+        return legacy_path
+    if is_model_dir(name) or os.sep in name or (os.altsep and os.altsep in name):
+        return name
+    return os.path.join(models_dir, name)
+
+
+def model_url(name=None):
+    """
+    Returns:
+        Download URL of the named model, or None if it is not a known model
+    """
+    if not name or name == LEGACY_MODEL_NAME:
+        return DEFAULT_MODEL_URL
+    return KNOWN_MODELS.get(name)
+
+
+def selected_model():
+    """
+    Returns:
+        Name of the model chosen with NO_ALT_TAB_MODEL, or None for the default
+    """
+    return os.getenv("NO_ALT_TAB_MODEL") or None
+
+
+def selected_language():
+    """
+    Returns:
+        Language of the microphone chosen with NO_ALT_TAB_LANGUAGE, "en" by default
+    """
+    return (os.getenv("NO_ALT_TAB_LANGUAGE") or DEFAULT_LANGUAGE).lower()
+
+
+def language_model(language):
+    """
+    Returns:
+        Name of the model for a language; None means the default model
+    """
+    configured = os.getenv(f"NO_ALT_TAB_MODEL_{language.upper()}")
+    if configured:
+        return configured
+    if language == DEFAULT_LANGUAGE:
+        return selected_model()
+    # Other languages are looked for in models/<language>/
+    return LANGUAGE_MODELS.get(language, language)
@@ -0,0 +1,140 @@
+"""
+Polling utilities for waiting until a launched application is ready
+"""
+import time
+import logging
+from agent import tracing
+
+logger = logging.getLogger("game-agent")
+
+
+class WaitResult:
+    """
+    Outcome of a wait_for call
+    """
+
+    def __init__(self, ready, value, elapsed, attempts):
+        self.ready = ready
+        self.value = value
+        self.elapsed = elapsed
+        self.attempts = attempts
+
+    def __bool__(self):
+        return self.ready
+
+    def __repr__(self):
+        return f"WaitResult(ready={self.ready}, value={self.value!r}, elapsed={self.elapsed:.3f}, attempts={self.attempts})"
+
+
+def wait_for(condition, timeout=5.0, initial_interval=0.05, max_interval=0.5, backoff=2.0,
+             abort=None, clock=time.monotonic, sleep=time.sleep):
+    """
+    Poll a condition with exponential backoff until it holds or the deadline passes
+
+    Args:
+        condition: Callable returning a truthy value once the target is ready
+        timeout: Seconds to wait before giving up
+        initial_interval: First delay between polls in seconds
+        max_interval: Upper bound for the delay between polls
+        backoff: Factor the delay grows by after every failed poll
+        abort: Optional callable; stop waiting early once it returns True
+        clock: Monotonic clock function, replaceable in tests
+        sleep: Sleep function, replaceable in tests
+
+    Returns:
+        WaitResult with the last value returned by the condition and the time
+        it took to become ready
+    """
+    with tracing.span("launch_wait", timeout=timeout) as span:
+        result = _poll(condition, timeout, initial_interval, max_interval, backoff, abort, clock, sleep)
+        span.set(ready=result.ready, attempts=result.attempts)
+    return result
+
+
+def _poll(condition, timeout, initial_interval, max_interval, backoff, abort, clock, sleep):
+    start = clock()
+    deadline = start + timeout
+    interval = initial_interval
+    attempts = 0
+
+    while True:
+        attempts += 1
+        value = condition()
+        now = clock()
+        if value:
+            return WaitResult(True, value, now - start, attempts)
+        if now >= deadline or (abort is not None and abort()):
+            return WaitResult(False, value, now - start, attempts)
+        sleep(min(interval, deadline - now))
+        interval = min(interval * backoff, max_interval)
+
+
+def window_appears(pattern, index=None):
+    """
+    Build a condition that holds once a window whose title contains pattern is visible
+
+    The window index snapshot is invalidated before every poll so each attempt
+    sees the current desktop.
+
+    Returns:
+        Callable returning the window handle or None
+    """
+    if index is None:
+        from agent.window_index import get_window_index
+        index = get_window_index()
+
+    def condition():
+        index.invalidate()
+        return index.find_first(pattern)
+
+    return condition
+
+
+def process_alive(process):
+    """
+    Build a condition that holds while a subprocess.Popen process has not exited
+
+    Returns:
+        Callable returning True if the process is still running
+    """
+    def condition():
+        return process.poll() is None
+
+    return condition
+
+
+def process_failed(process):
+    """
+    Build a condition that holds once a subprocess.Popen process exited with an error
+
+    Launchers that hand off to another process and exit cleanly do not count
+    as failures.
+    """
+    def condition():
+        return process.poll() not in (None, 0)
+
+    return condition
+
+
+def url_responds(url, timeout=1.0):
+    """
+    Build a condition that holds once an HTTP endpoint answers 200 OK, e.g. /health
+
+    Returns:
+        Callable returning the decoded JSON body (or True for other bodies), or None
+    """
+    import json
+    import urllib.request
+
+    def condition():
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                body = response.read()
+        except (OSError, ValueError):
+            return None
+        try:
+            return json.loads(body) or True
+        except ValueError:
+            return True
+
+    return condition
@@ -0,0 +1,451 @@
+"""
+Long-lived speech recognition server.
+
+The server process loads the Vosk model once and keeps a pool of warm
+recognizers. Agents and test scripts attach over a local socket (a Unix
+socket, or a named pipe on Windows). They get a RemoteRecognizer that
+behaves like KaldiRecognizer, so restarting the agent does not reload the
+model.
+
+The socket, and the random key each end must prove it knows, live in a
+directory only the current user may use ($XDG_RUNTIME_DIR, or a 0700
+directory in the temp dir whose owner is checked). Either end refuses a
+socket, key or directory that another user could have planted. Messages are
+a JSON header plus raw audio bytes; nothing received is unpickled.
+
+Start it with:
+    python -m agent.recognition_server --model model
+"""
+import os
+import sys
+import json
+import time
+import stat
+import getpass
+import logging
+import argparse
+import tempfile
+import threading
+from functools import partial
+from multiprocessing.connection import Listener, Client
+from agent.model_registry import selected_language, language_model, model_path
+from agent.resource_governor import apply_thread_scheduling, scheduling_from_env
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_RATE = 16000
+
+# Largest message accepted; an audio chunk is a few kilobytes
+MAX_FRAME_BYTES = 1024 * 1024
+
+_EMPTY_PARTIAL = '{"partial" : ""}'
+
+
+def _user_tag():
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "default"
+
+
+def _private_dir():
+    """
+    Returns:
+        Directory for the socket and key that only the current user may use
+    """
+    if sys.platform == 'win32':
+        # The user's profile is protected by its ACL
+        return os.path.join(os.getenv("LOCALAPPDATA") or tempfile.gettempdir(), "no-alt-tab")
+    runtime = os.getenv("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, "no-alt-tab")
+    return os.path.join(tempfile.gettempdir(), f"no-alt-tab-{os.getuid()}")
+
+
+def default_address():
+    """
+    Returns:
+        Socket address of the recognition server for the current user
+    """
+    address = os.getenv("NO_ALT_TAB_RECOGNIZER_ADDRESS")
+    if address:
+        return address
+    if sys.platform == 'win32':
+        return rf"\\.\pipe\no-alt-tab-recognizer-{_user_tag()}"
+    return os.path.join(_private_dir(), "recognizer.sock")
+
+
+def _key_path(address):
+    if sys.platform == 'win32':
+        return os.path.join(_private_dir(), "recognizer.key")
+    return address + ".key"
+
+
+def _check_private(path, info=None):
+    """
+    Raises:
+        PermissionError: If the path is not owned by this user or others may use it
+    """
+    if sys.platform == 'win32':
+        return
+    info = info or os.lstat(path)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must belong to this user with no group or other access")
+
+
+def _prepare_dir(address):
+    directory = os.path.dirname(_key_path(address))
+    if sys.platform == 'win32':
+        os.makedirs(directory, exist_ok=True)
+        return
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    _check_private(directory)
+
+
+def _write_key(address):
+    # A random key readable only by this user; both ends must know it to connect
+    key = os.urandom(32)
+    path = _key_path(address)
+    try:
+        os.remove(path)  # stale key from a previous run
+    except FileNotFoundError:
+        pass
+    # O_EXCL: never write into a file someone else created meanwhile
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def _read_key(address):
+    path = _key_path(address)
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    with os.fdopen(fd, "rb") as f:
+        _check_private(path, os.fstat(f.fileno()))
+        return f.read()
+
+
+def _send(connection, message, payload=b""):
+    """
+    Send a JSON message, followed by raw bytes such as audio, as one frame
+    """
+    connection.send_bytes(json.dumps(message).encode() + b"\n" + payload)
+
+
+def _recv(connection):
+    """
+    Returns:
+        Tuple of (message, payload bytes) of the next frame
+    """
+    header, _, payload = connection.recv_bytes(MAX_FRAME_BYTES).partition(b"\n")
+    return json.loads(header), payload
+
+
+class RecognizerPool:
+    """
+    Warm recognizers per (rate, grammar), reset and reused between sessions
+    """
+
+    def __init__(self, factory, max_idle=DEFAULT_POOL_SIZE):
+        self.factory = factory
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def warm(self, rate, grammar=None, count=DEFAULT_POOL_SIZE):
+        for _ in range(count):
+            self.release(self.factory(rate, grammar), rate, grammar)
+            self.created += 1
+
+    def acquire(self, rate, grammar=None):
+        with self._lock:
+            idle = self._idle.get((rate, grammar))
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.created += 1
+        return self.factory(rate, grammar)
+
+    def release(self, recognizer, rate, grammar=None):
+        recognizer.Reset()
+        with self._lock:
+            idle = self._idle.setdefault((rate, grammar), [])
+            if len(idle) < self.max_idle:
+                idle.append(recognizer)
+
+
+class RecognitionServer:
+    """
+    Serves recognizer sessions, one per client connection
+    """
+
+    def __init__(self, factory, address=None, pool_size=DEFAULT_POOL_SIZE, info=None, session_setup=None):
+        """
+        Args:
+            factory: Callable (rate, grammar) -> recognizer with the KaldiRecognizer interface
+            address: Socket address, see default_address()
+            pool_size: Warm recognizers kept per (rate, grammar)
+            info: Dictionary reported to clients that ping the server
+            session_setup: Callable run first on each session thread, which does the
+                           decoding, e.g. to lower its priority
+        """
+        self.address = address or default_address()
+        self.session_setup = session_setup
+        self.pool = RecognizerPool(factory, pool_size)
+        self.info = dict(info or {})
+        self.sessions = 0
+        self._listener = None
+        self._closed = False
+
+    def start(self):
+        """
+        Bind the socket; call serve_forever() afterwards
+        """
+        _prepare_dir(self.address)
+        if sys.platform != 'win32':
+            if os.path.lexists(self.address):
+                os.remove(self.address)  # stale socket from a previous run
+        key = _write_key(self.address)
+        self._listener = Listener(self.address, authkey=key)
+        if sys.platform != 'win32':
+            os.chmod(self.address, 0o600)
+        logger.info(f"Recognition server listening on {self.address}")
+        return self
+
+    def serve_forever(self):
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except Exception as e:
+                if self._closed:
+                    break
+                logger.warning(f"Rejected recognition client: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(connection,), name="recognizer-session", daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        if self._listener is not None:
+            self._listener.close()
+            try:
+                os.remove(_key_path(self.address))
+            except OSError:
+                pass
+
+    def _serve(self, connection):
+        recognizer = None
+        rate = grammar = None
+        try:
+            if self.session_setup is not None:
+                self.session_setup()
+            while True:
+                message, payload = _recv(connection)
+                command = message[0]
+                if command in ("accept", "final", "reset") and recognizer is None:
+                    _send(connection, ["error", "no recognizer open"])
+                elif command == "accept":
+                    if recognizer.AcceptWaveform(payload):
+                        _send(connection, [True, recognizer.Result()])
+                    else:
+                        _send(connection, [False, recognizer.PartialResult()])
+                elif command == "open":
+                    _, rate, grammar = message
+                    if recognizer is not None or not isinstance(rate, int) or not (
+                            grammar is None or all(isinstance(phrase, str) for phrase in grammar)):
+                        _send(connection, ["error", "bad open request"])
+                        continue
+                    grammar = tuple(grammar) if grammar else None  # pool key
+                    recognizer = self.pool.acquire(rate, grammar)
+                    self.sessions += 1
+                    _send(connection, ["ok", None])
+                elif command == "final":
+                    _send(connection, ["ok", recognizer.FinalResult()])
+                elif command == "reset":
+                    recognizer.Reset()
+                    _send(connection, ["ok", None])
+                elif command == "ping":
+                    _send(connection, ["ok", dict(self.info, sessions=self.sessions,
+                                                  created=self.pool.created, reused=self.pool.reused)])
+                elif command == "close":
+                    break
+                else:
+                    _send(connection, ["error", f"unknown command {command!r}"])
+        except (EOFError, OSError):
+            pass  # client went away
+        except Exception as e:
+            logger.error(f"Recognition session failed: {e}")
+        finally:
+            if recognizer is not None:
+                self.pool.release(recognizer, rate, grammar)
+            connection.close()
+
+
+def _connect(address):
+    address = address or default_address()
+    if sys.platform != 'win32':
+        # Only talk to a socket this user created, in a directory no one else can write to
+        _check_private(os.path.dirname(address))
+        info = os.lstat(address)
+        if not stat.S_ISSOCK(info.st_mode):
+            raise PermissionError(f"{address} is not a socket")
+        _check_private(address, info)
+    return Client(address, authkey=_read_key(address))
+
+
+def ping(address=None):
+    """
+    Returns:
+        Server info dictionary, or None if no server is reachable
+    """
+    try:
+        connection = _connect(address)
+    except PermissionError as e:
+        logger.warning(f"Not attaching to the recognition server: {e}")
+        return None
+    except Exception:
+        return None
+    try:
+        _send(connection, ["ping"])
+        return _recv(connection)[0][1]
+    except Exception:
+        return None
+    finally:
+        connection.close()
+
+
+class RemoteModel:
+    """
+    Stands in for vosk.Model when recognition runs in the server
+    """
+
+    def __init__(self, address=None, info=None):
+        self.address = address or default_address()
+        self.info = info or {}
+
+
+class RemoteRecognizer:
+    """
+    KaldiRecognizer-compatible client of the recognition server.
+
+    Each AcceptWaveform is one round trip; the reply carries the result or
+    partial result, so Result() and PartialResult() answer locally.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, address=None, grammar=None):
+        self._connection = _connect(address)
+        _send(self._connection, ["open", rate, list(grammar) if grammar else None])
+        self._check(_recv(self._connection)[0])
+        self._result = '{"text" : ""}'
+        self._partial = _EMPTY_PARTIAL
+
+    @staticmethod
+    def _check(reply):
+        if reply[0] == "error":
+            raise RuntimeError(f"Recognition server error: {reply[1]}")
+        return reply[1]
+
+    def AcceptWaveform(self, data):
+        _send(self._connection, ["accept"], bytes(data))
+        final, text = _recv(self._connection)[0]
+        if final:
+            self._result = text
+            self._partial = _EMPTY_PARTIAL
+        else:
+            self._partial = text
+        return final
+
+    def Result(self):
+        return self._result
+
+    def PartialResult(self):
+        return self._partial
+
+    def FinalResult(self):
+        _send(self._connection, ["final"])
+        self._partial = _EMPTY_PARTIAL
+        return self._check(_recv(self._connection)[0])
+
+    def Reset(self):
+        _send(self._connection, ["reset"])
+        self._partial = _EMPTY_PARTIAL
+        self._check(_recv(self._connection)[0])
+
+    def close(self):
+        try:
+            _send(self._connection, ["close"])
+        except OSError:
+            pass
+        self._connection.close()
+
+    def __del__(self):
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+
+
+def make_recognizer(model, rate, grammar=None):
+    """
+    Create a recognizer for a local vosk.Model or a RemoteModel
+
+    Args:
+        model: vosk.Model or RemoteModel
+        rate: Sample rate of the audio
+        grammar: Optional list of phrases to restrict recognition to
+    """
+    if isinstance(model, RemoteModel):
+        return RemoteRecognizer(rate, model.address, grammar)
+    from vosk import KaldiRecognizer
+    if grammar is None:
+        return KaldiRecognizer(model, rate)
+    return KaldiRecognizer(model, rate, json.dumps(grammar))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the Vosk model loaded and serve recognizers over a local socket")
+    parser.add_argument("--model", default=language_model(selected_language()),
+                        help="Model name or directory (default: the model for NO_ALT_TAB_LANGUAGE)")
+    parser.add_argument("--address", default=None, help="Socket path or named pipe")
+    parser.add_argument("--pool", type=int, default=DEFAULT_POOL_SIZE, help="Warm recognizers per configuration")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from vosk import Model, KaldiRecognizer
+    path = model_path(args.model)
+    started = time.perf_counter()
+    model = Model(path)
+    load_time = time.perf_counter() - started
+    logger.info(f"Loaded speech model from {path} in {load_time:.2f}s")
+
+    def factory(rate, grammar):
+        if grammar is None:
+            return KaldiRecognizer(model, rate)
+        return KaldiRecognizer(model, rate, json.dumps(list(grammar)))
+
+    # Decoding runs on the session threads, so the governor's settings apply there
+    scheduling = scheduling_from_env()
+    if scheduling is not None:
+        logger.info(f"Decoding at niceness +{scheduling['nice']} on cores {scheduling['cores'] or 'any'}")
+    server = RecognitionServer(factory, args.address, args.pool,
+                               info={"model": os.path.abspath(path), "load_time": round(load_time, 3),
+                                     "pid": os.getpid()},
+                               session_setup=partial(apply_thread_scheduling, **scheduling) if scheduling else None)
+    server.pool.warm(DEFAULT_RATE, count=args.pool)
+    server.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Keeps speech recognition out of the way of a running game.
+
+The governor lowers the scheduling priority of the decoding thread, can pin
+it to configured cores, and watches for configured game processes or window
+titles. While a game runs it selects a cheaper recognition profile: decoding
+restricted to the command phrases and no partial results. When the agent
+attaches to a recognition server, decoding happens in the server's session
+threads; the server applies the same priority and cores to them.
+
+Configuration (environment):
+    NO_ALT_TAB_GOVERNOR=1               enable the governor
+    NO_ALT_TAB_NICE=10                  niceness added to the decoding thread
+    NO_ALT_TAB_DECODE_CORES=2,3         cores the decoding thread may run on
+    NO_ALT_TAB_GAMES=cs2.exe,eldenring  process names that count as a game
+    NO_ALT_TAB_GAME_WINDOWS=Minecraft   window title patterns that count as a game
+"""
+import os
+import sys
+import time
+import logging
+import threading
+import subprocess
+from agent.vocabulary_profiles import compile_grammar
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_NICE = 10
+DEFAULT_CHECK_INTERVAL = 5.0
+
+# Windows thread priority used instead of niceness
+THREAD_PRIORITY_BELOW_NORMAL = -1
+THREAD_PRIORITY_LOWEST = -2
+
+
+class RecognitionProfile:
+    """
+    How much work the recognizer does per utterance
+    """
+
+    __slots__ = ("name", "grammar", "partials")
+
+    def __init__(self, name, grammar=None, partials=True):
+        """
+        Args:
+            name: Profile name, e.g. "full" or "cheap"
+            grammar: Phrases to restrict decoding to, or None for the full language model
+            partials: Whether partial results are requested while speaking
+        """
+        self.name = name
+        self.grammar = grammar
+        self.partials = partials
+
+    def __repr__(self):
+        return f"RecognitionProfile({self.name!r})"
+
+
+FULL_PROFILE = RecognitionProfile("full")
+
+
+def cheap_profile(phrases):
+    """
+    Profile decoding only the given command phrases (and the names open-ended
+    handlers accept), without partial results
+
+    Args:
+        phrases: Mapping of phrase to handler
+
+    Returns:
+        RecognitionProfile named "cheap"
+    """
+    return RecognitionProfile("cheap", compile_grammar(phrases), partials=False)
+
+
+def list_process_names():
+    """
+    Returns:
+        Set of lower-cased executable names of the running processes
+    """
+    if sys.platform == 'win32':
+        return _list_process_names_win32()
+    if os.path.isdir("/proc"):
+        names = set()
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/comm") as f:
+                        names.add(f.read().strip().lower())
+                except OSError:
+                    pass
+        return names
+    output = subprocess.run(["ps", "-axo", "comm="], capture_output=True, text=True).stdout
+    return {os.path.basename(line.strip()).lower() for line in output.splitlines() if line.strip()}
+
+
+def _list_process_names_win32():
+    import ctypes
+    from ctypes import wintypes
+
+    psapi = ctypes.windll.psapi
+    kernel32 = ctypes.windll.kernel32
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+
+    pids = (wintypes.DWORD * 4096)()
+    returned = wintypes.DWORD()
+    if not psapi.EnumProcesses(ctypes.byref(pids), ctypes.sizeof(pids), ctypes.byref(returned)):
+        return set()
+
+    names = set()
+    buffer = ctypes.create_unicode_buffer(260)
+    for pid in pids[:returned.value // ctypes.sizeof(wintypes.DWORD)]:
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            continue
+        try:
+            size = wintypes.DWORD(len(buffer))
+            if kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+                names.add(os.path.basename(buffer.value).lower())
+        finally:
+            kernel32.CloseHandle(handle)
+    return names
+
+
+def lower_thread_priority(nice=DEFAULT_NICE):
+    """
+    Lower the scheduling priority of the calling thread only
+
+    Returns:
+        True if the priority was changed
+    """
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            level = THREAD_PRIORITY_LOWEST if nice >= 10 else THREAD_PRIORITY_BELOW_NORMAL
+            return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), level))
+        # On Linux the niceness of a thread id applies to that thread alone
+        tid = threading.get_native_id()
+        os.setpriority(os.PRIO_PROCESS, tid, min(19, os.getpriority(os.PRIO_PROCESS, tid) + nice))
+        return True
+    except (OSError, AttributeError) as e:
+        logger.warning(f"Could not lower decoding priority: {e}")
+        return False
+
+
+def pin_thread(cores):
+    """
+    Restrict the calling thread to the given CPU cores
+
+    Returns:
+        True if the affinity was changed
+    """
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+            mask = sum(1 << core for core in cores)
+            return bool(kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask))
+        # Thread id 0 is the calling thread
+        os.sched_setaffinity(0, set(cores))
+        return True
+    except (OSError, AttributeError, ValueError) as e:
+        logger.warning(f"Could not pin decoding to cores {sorted(cores)}: {e}")
+        return False
+
+
+def parse_cores(value):
+    """
+    Returns:
+        Set of core numbers from "2,3" or "4-7" style text, or None if empty
+    """
+    if not value:
+        return None
+    cores = set()
+    for part in value.split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cores.update(range(int(first), int(last) + 1))
+        elif part:
+            cores.add(int(part))
+    return cores or None
+
+
+def apply_thread_scheduling(nice=DEFAULT_NICE, cores=None):
+    """
+    Lower the priority of, and pin, the calling (decoding) thread
+
+    Args:
+        nice: Niceness added; 0 leaves the priority alone
+        cores: Cores the thread may run on; None leaves the affinity alone
+    """
+    if nice:
+        lower_thread_priority(nice)
+    if cores:
+        pin_thread(cores)
+
+
+def scheduling_from_env():
+    """
+    Returns:
+        Dict of the nice and cores for decoding threads, or None unless NO_ALT_TAB_GOVERNOR=1
+    """
+    if os.getenv("NO_ALT_TAB_GOVERNOR", "0") != "1":
+        return None
+    return {"nice": int(os.getenv("NO_ALT_TAB_NICE", DEFAULT_NICE)),
+            "cores": parse_cores(os.getenv("NO_ALT_TAB_DECODE_CORES"))}
+
+
+def _env_list(name):
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+class ResourceGovernor:
+    """
+    Chooses the recognition profile and scheduling of the decoding thread
+    """
+
+    def __init__(self, cheap, games=(), game_windows=(), nice=DEFAULT_NICE, cores=None,
+                 check_interval=DEFAULT_CHECK_INTERVAL, list_processes=list_process_names,
+                 window_index=None, clock=time.monotonic):
+        """
+        Args:
+            cheap: RecognitionProfile used while a game is running
+            games: Process names (e.g. "cs2.exe") that count as a running game
+            game_windows: Window title patterns that count as a running game
+            nice: Niceness added to the decoding thread; 0 leaves it alone
+            cores: Cores the decoding thread may run on; None leaves it alone
+            check_interval: Seconds between checks for running games
+            list_processes: Callable returning the running process names
+            window_index: WindowIndex for game_windows; the shared one by default
+        """
+        self.cheap = cheap
+        self.games = {name.lower() for name in games}
+        self.game_windows = list(game_windows)
+        self.nice = nice
+        self.cores = cores
+        self.check_interval = check_interval
+        self._list_processes = list_processes
+        self._window_index = window_index
+        self._clock = clock
+        self._checked_at = None
+        self.active_game = None
+
+    @classmethod
+    def from_env(cls, phrases):
+        """
+        Args:
+            phrases: The parser's mapping of phrase to handler
+
+        Returns:
+            ResourceGovernor configured from the environment, or None if disabled
+        """
+        scheduling = scheduling_from_env()
+        if scheduling is None:
+            return None
+        return cls(cheap_profile(phrases),
+                   games=_env_list("NO_ALT_TAB_GAMES"),
+                   game_windows=_env_list("NO_ALT_TAB_GAME_WINDOWS"),
+                   **scheduling)
+
+    def apply_to_current_thread(self):
+        """
+        Lower the priority of, and pin, the calling (decoding) thread
+        """
+        apply_thread_scheduling(self.nice, self.cores)
+
+    def _find_game(self):
+        if self.games:
+            running = self.games & self._list_processes()
+            if running:
+                return sorted(running)[0]
+        if self.game_windows:
+            if self._window_index is None:
+                from agent.window_index import get_window_index
+                self._window_index = get_window_index()
+            for pattern in self.game_windows:
+                match = self._window_index.find_first(pattern)
+                if match is not None:
+                    return pattern
+        return None
+
+    def profile(self):
+        """
+        Returns:
+            The cheap profile while a configured game is running, otherwise FULL_PROFILE
+        """
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            game = self._find_game()
+            if game != self.active_game:
+                if game:
+                    logger.info(f"Game '{game}' is running, switching to the {self.cheap.name} recognition profile")
+                else:
+                    logger.info("No game running, switching to the full recognition profile")
+                self.active_game = game
+        return self.cheap if self.active_game else FULL_PROFILE
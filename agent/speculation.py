@@ -0,0 +1,228 @@
+"""
+Speculative pre-resolution of command targets from partial transcripts.
+
+While the user is still speaking, partial results such as "open ch" already
+tell us which handler will run and narrow down its target. Handlers that take
+a target register a slot template; the expensive lookup for each candidate
+target (application path search, window enumeration) starts in the
+background and the handler picks up the finished result when the final
+transcript arrives.
+"""
+import time
+import logging
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("game-agent")
+
+# Leading verbs of parameterized commands and the handlers that own the slot
+SLOT_TEMPLATES = {
+    "open": "open_application",
+    "launch": "open_application",
+    "start": "open_application",
+    "run": "open_application",
+    "close": "close_specific_window",
+}
+
+# Shortest slot prefix worth speculating on
+MIN_PREFIX_LENGTH = 2
+
+# Speculation is skipped if the prefix is still this ambiguous
+MAX_CANDIDATES = 3
+
+
+class SpeculativeEntry:
+    """
+    A background resolution of one (handler, target) pair
+    """
+
+    __slots__ = ("future", "started", "finished", "expires")
+
+    def __init__(self, future, started, expires):
+        self.future = future
+        self.started = started
+        self.finished = None
+        self.expires = expires
+
+
+class SpeculativeResolver:
+    """
+    Starts target resolution from partial transcripts and serves the results to handlers
+    """
+
+    def __init__(self, templates=None, max_workers=2, clock=time.perf_counter):
+        """
+        Args:
+            templates: Mapping of leading verb -> handler module name
+            max_workers: Number of background resolver threads
+            clock: Monotonic clock function, replaceable in tests
+        """
+        self.templates = SLOT_TEMPLATES if templates is None else templates
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._observed = set()
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.saved_seconds = 0.0
+
+    def _handler_module(self, handler):
+        return importlib.import_module(f"agent.commands.{handler}")
+
+    def observe_partial(self, text):
+        """
+        Look at a partial transcript and start resolving likely targets
+
+        Args:
+            text: Partial transcript from the recognizer
+        """
+        words = text.lower().split()
+        if len(words) < 2 or words[0] not in self.templates:
+            return
+
+        handler = self.templates[words[0]]
+        slot = " ".join(w for w in words[1:] if w != "the")
+        if len(slot) < MIN_PREFIX_LENGTH:
+            return
+
+        with self._lock:
+            if (handler, slot) in self._observed:
+                return
+            self._observed.add((handler, slot))
+
+        self._executor.submit(self._speculate, handler, slot)
+
+    def _speculate(self, handler, prefix):
+        try:
+            module = self._handler_module(handler)
+            candidates = module.speculative_candidates(prefix)
+        except Exception as e:
+            logger.debug(f"Speculation for {handler} '{prefix}' failed: {e}")
+            return
+
+        if not candidates or len(candidates) > MAX_CANDIDATES:
+            return
+
+        ttl = getattr(module, "SPECULATION_TTL", 5.0)
+        for target in candidates:
+            self._start(handler, target, module.resolve_target, ttl)
+
+    def _start(self, handler, target, resolve, ttl):
+        key = (handler, target)
+        with self._lock:
+            self._expire()
+            if key in self._entries:
+                return
+            now = self._clock()
+            entry = SpeculativeEntry(None, now, now + ttl)
+            entry.future = self._executor.submit(self._timed, entry, resolve, target)
+            self._entries[key] = entry
+
+        logger.debug(f"Speculatively resolving {handler} target '{target}'")
+
+    def _timed(self, entry, resolve, target):
+        try:
+            return resolve(target)
+        finally:
+            entry.finished = self._clock()
+
+    def _expire(self):
+        # Called with the lock held
+        now = self._clock()
+        for key in [k for k, e in self._entries.items() if e.expires < now]:
+            del self._entries[key]
+            self.wasted += 1
+            logger.info(f"Speculative resolution of {key[0]} '{key[1]}' was never used ({self.summary()})")
+
+    def end_utterance(self):
+        """
+        Forget which partials were seen so the next utterance speculates afresh
+        """
+        with self._lock:
+            self._observed.clear()
+
+    def resolve(self, handler, target, resolve):
+        """
+        Get a handler target, reusing a speculative result if one exists
+
+        Args:
+            handler: Handler module name
+            target: Normalized target name from the final transcript
+            resolve: Function computing the result when there is nothing to reuse
+
+        Returns:
+            The resolved target
+        """
+        key = (handler, target)
+        with self._lock:
+            self._expire()
+            entry = self._entries.pop(key, None)
+            # Drop sibling candidates of the same handler; the final transcript decided
+            for other in [k for k in self._entries if k[0] == handler]:
+                del self._entries[other]
+                self.wasted += 1
+
+        if entry is not None:
+            requested = self._clock()
+            try:
+                result = entry.future.result()
+            except Exception as e:
+                logger.warning(f"Speculative resolution of {handler} '{target}' failed: {e}")
+            else:
+                finished = entry.finished or self._clock()
+                saved = min(requested, finished) - entry.started
+                with self._lock:
+                    self.hits += 1
+                    self.saved_seconds += saved
+                logger.info(f"Speculation hit for {handler} '{target}': saved {saved * 1000:.1f} ms ({self.summary()})")
+                return result
+
+        with self._lock:
+            self.misses += 1
+        return resolve(target)
+
+    def summary(self):
+        return (f"hits {self.hits}, misses {self.misses}, wasted {self.wasted}, "
+                f"saved {self.saved_seconds * 1000:.1f} ms total")
+
+    def stats(self):
+        """
+        Returns:
+            Dictionary of speculation counters
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "wasted": self.wasted,
+                "saved_ms": round(self.saved_seconds * 1000, 3),
+            }
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_speculative_resolver():
+    """
+    Returns:
+        The shared SpeculativeResolver, created on first use
+    """
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = SpeculativeResolver()
+    return _resolver
+
+
+def set_speculative_resolver(resolver):
+    """
+    Replace the shared SpeculativeResolver, e.g. in tests
+    """
+    global _resolver
+    with _resolver_lock:
+        _resolver = resolver
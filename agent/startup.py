@@ -0,0 +1,153 @@
+"""
+Startup phase tracking and background speech model loading
+"""
+import os
+import time
+import logging
+import threading
+from agent.metrics import process_rss_bytes
+
+logger = logging.getLogger("game-agent")
+
+# Startup phases in the order they normally complete
+PHASE_API = "api"
+PHASE_MODEL_READY = "model_ready"
+PHASE_FIRST_LISTEN = "first_listen"
+PHASES = (PHASE_API, PHASE_MODEL_READY, PHASE_FIRST_LISTEN)
+
+
+class StartupReport:
+    """
+    Seconds from process start until each startup phase completed
+    """
+
+    def __init__(self, start=None, clock=time.perf_counter):
+        self._clock = clock
+        self.start = clock() if start is None else start
+        self.phases = {}
+        self.error = None
+
+    def mark(self, phase):
+        """
+        Record that a phase completed now; later marks of the same phase are ignored
+        """
+        if phase in self.phases:
+            return
+        self.phases[phase] = round(self._clock() - self.start, 3)
+        logger.info(f"Startup: {phase} after {self.phases[phase]:.2f}s")
+        if all(p in self.phases for p in PHASES):
+            logger.info("Startup report: " + ", ".join(f"{p} {self.phases[p]:.2f}s" for p in PHASES))
+
+    def fail(self, error):
+        self.error = str(error)
+
+    @property
+    def phase(self):
+        """
+        Current state: "failed", "starting", "loading_model", "waiting_for_microphone" or "listening"
+        """
+        if self.error:
+            return "failed"
+        if PHASE_FIRST_LISTEN in self.phases:
+            return "listening"
+        if PHASE_MODEL_READY in self.phases:
+            return "waiting_for_microphone"
+        if PHASE_API in self.phases:
+            return "loading_model"
+        return "starting"
+
+    def to_dict(self):
+        report = {
+            "phase": self.phase,
+            "ready": PHASE_FIRST_LISTEN in self.phases and not self.error,
+            "startup": {phase: self.phases.get(phase) for phase in PHASES},
+        }
+        if self.error:
+            report["status"] = "unhealthy"
+            report["error"] = self.error
+        return report
+
+
+class ModelLoader:
+    """
+    Loads the Vosk model on a background thread.
+
+    vosk is imported on that thread too, so the rest of the agent starts
+    without paying for it.
+    """
+
+    def __init__(self, model_path="model", report=None, prepare=None, server_address=None):
+        """
+        Args:
+            model_path: Directory of the Vosk model
+            report: Optional StartupReport to mark PHASE_MODEL_READY in
+            prepare: Optional callable run first, returning False if the
+                     model cannot be made available (e.g. a failed download)
+            server_address: Recognition server to attach to instead of loading
+                            the model, if one answers there (see
+                            agent/recognition_server.py); None loads locally
+        """
+        self.model_path = model_path
+        self.report = report
+        self.prepare = prepare
+        self.server_address = server_address
+        self.model = None
+        self.error = None
+        self.load_time = None
+        self.resident_bytes = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            if self.server_address is not None and self._attach():
+                return
+            if self.prepare is not None and not self.prepare():
+                raise RuntimeError("Speech recognition model is not available")
+            if not os.path.exists(self.model_path):
+                raise RuntimeError(f"No speech recognition model at {self.model_path}")
+            from vosk import Model
+            rss_before = process_rss_bytes() or 0
+            self.model = Model(self.model_path)
+            self.load_time = time.perf_counter() - started
+            self.resident_bytes = max(0, (process_rss_bytes() or 0) - rss_before)
+            logger.info(f"Loaded speech model from {self.model_path} in {self.load_time:.2f}s")
+            if self.report is not None:
+                self.report.mark(PHASE_MODEL_READY)
+        except Exception as e:
+            self.error = e
+            logger.error(f"Failed to load speech model: {e}")
+            if self.report is not None:
+                self.report.fail(e)
+        finally:
+            self._done.set()
+
+    def _attach(self):
+        from agent.recognition_server import ping, RemoteModel
+        info = ping(self.server_address)
+        if info is None:
+            logger.info("No recognition server running, loading the model in this process")
+            return False
+        self.model = RemoteModel(self.server_address, info)
+        self.load_time = 0.0
+        self.resident_bytes = 0
+        logger.info(f"Attached to recognition server at {self.model.address} (model {info.get('model')})")
+        if self.report is not None:
+            self.report.mark(PHASE_MODEL_READY)
+        return True
+
+    def wait(self, timeout=None):
+        """
+        Wait for loading to finish
+
+        Returns:
+            The Model (a RemoteModel when attached to a recognition server),
+            or None if loading failed or timed out
+        """
+        self._done.wait(timeout)
+        return self.model
@@ -0,0 +1,215 @@
+"""
+Incrementally maintained command statistics over sliding time windows.
+
+Each processed transcript updates a few counters and a quantile sketch in the
+current time bucket, so reporting costs a merge of a fixed number of buckets
+no matter how many commands the agent has handled.
+"""
+import math
+import time
+import threading
+from agent.command_log import STATUS_OK, STATUS_ERROR, STATUS_REJECTED
+
+# Sliding windows: name -> (span in seconds, number of buckets)
+DEFAULT_WINDOWS = {
+    "1m": (60, 12),
+    "1h": (3600, 60),
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class QuantileSketch:
+    """
+    Streaming quantile estimate with bounded relative error.
+
+    Values are counted in logarithmically sized buckets (as in DDSketch), so
+    any reported quantile is within relative_accuracy of a true sample value
+    and two sketches merge by adding bucket counts.
+    """
+
+    __slots__ = ("relative_accuracy", "_log_gamma", "_buckets", "_zeros", "count")
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(gamma)
+        self._buckets = {}
+        self._zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self._zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self._zeros += other._zeros
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+
+    def quantile(self, q):
+        """
+        Returns:
+            Estimated value at quantile q (0-1), or None if the sketch is empty
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket in the relative sense
+                return 2 * math.exp(index * self._log_gamma) / (1 + math.exp(self._log_gamma))
+        return None
+
+
+class _HandlerStats:
+    __slots__ = ("count", "ok", "error", "latency")
+
+    def __init__(self):
+        self.count = 0
+        self.ok = 0
+        self.error = 0
+        self.latency = QuantileSketch()
+
+    def merge(self, other):
+        self.count += other.count
+        self.ok += other.ok
+        self.error += other.error
+        self.latency.merge(other.latency)
+
+
+class StatsAggregate:
+    """
+    Counts and latency sketches for a set of processed transcripts
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.rejected = 0
+        self.overall = _HandlerStats()
+        self.handlers = {}
+
+    def add(self, handler, status, latency):
+        self.total += 1
+        if status == STATUS_REJECTED:
+            self.rejected += 1
+            return
+        for stats in (self.overall, self.handlers.setdefault(handler, _HandlerStats())):
+            stats.count += 1
+            if status == STATUS_OK:
+                stats.ok += 1
+            elif status == STATUS_ERROR:
+                stats.error += 1
+            stats.latency.add(latency)
+
+    def merge(self, other):
+        self.total += other.total
+        self.rejected += other.rejected
+        self.overall.merge(other.overall)
+        for handler, stats in other.handlers.items():
+            self.handlers.setdefault(handler, _HandlerStats()).merge(stats)
+
+    @staticmethod
+    def _describe(stats):
+        latency = {}
+        for q in QUANTILES:
+            value = stats.latency.quantile(q)
+            latency[f"p{round(q * 100)}"] = None if value is None else round(value * 1000, 2)
+        return {
+            "count": stats.count,
+            "success_rate": round(stats.ok / stats.count, 4) if stats.count else None,
+            "error_rate": round(stats.error / stats.count, 4) if stats.count else None,
+            "latency_ms": latency,
+        }
+
+    def to_dict(self):
+        recognized = self.total - self.rejected
+        summary = self._describe(self.overall)
+        summary.update({
+            "transcripts": self.total,
+            "recognized": recognized,
+            "rejected": self.rejected,
+            "recognized_ratio": round(recognized / self.total, 4) if self.total else None,
+            "handlers": {name: self._describe(stats) for name, stats in sorted(self.handlers.items())},
+        })
+        return summary
+
+
+class SlidingWindow:
+    """
+    Ring of time buckets covering the last span seconds
+    """
+
+    def __init__(self, span, buckets):
+        self.width = span / buckets
+        self._slots = [(None, None)] * buckets
+
+    def add(self, now, handler, status, latency):
+        bucket = int(now // self.width)
+        slot = bucket % len(self._slots)
+        start, aggregate = self._slots[slot]
+        if start != bucket:
+            aggregate = StatsAggregate()
+            self._slots[slot] = (bucket, aggregate)
+        aggregate.add(handler, status, latency)
+
+    def snapshot(self, now):
+        current = int(now // self.width)
+        merged = StatsAggregate()
+        for bucket, aggregate in self._slots:
+            if bucket is not None and current - bucket < len(self._slots):
+                merged.merge(aggregate)
+        return merged
+
+
+class CommandStats:
+    """
+    Per-handler and overall command statistics for each sliding window and the session
+    """
+
+    def __init__(self, windows=None, clock=time.monotonic):
+        """
+        Args:
+            windows: Mapping of window name -> (span seconds, bucket count)
+            clock: Monotonic clock function, replaceable in tests
+        """
+        windows = DEFAULT_WINDOWS if windows is None else windows
+        self._windows = {name: SlidingWindow(span, buckets) for name, (span, buckets) in windows.items()}
+        self._session = StatsAggregate()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def record(self, handler, status, latency):
+        """
+        Account one processed transcript
+
+        Args:
+            handler: Matched handler name, None if rejected
+            status: STATUS_OK, STATUS_ERROR or STATUS_REJECTED
+            latency: Seconds from final transcript to result
+        """
+        now = self._clock()
+        with self._lock:
+            self._session.add(handler, status, latency)
+            for window in self._windows.values():
+                window.add(now, handler, status, latency)
+
+    def snapshot(self):
+        """
+        Returns:
+            Dictionary of window name -> statistics, including "session"
+        """
+        now = self._clock()
+        with self._lock:
+            result = {name: window.snapshot(now).to_dict() for name, window in self._windows.items()}
+            result["session"] = self._session.to_dict()
+        return result
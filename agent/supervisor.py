@@ -0,0 +1,365 @@
+"""
+Supervisor that keeps the agent process running.
+
+The supervisor launches the agent, waits for /health to answer (readiness),
+then polls it (liveness) while sampling the child's CPU and RSS. A child
+that exits, stops answering, or whose listen loop stops beating is
+restarted with exponential backoff. Too many crashes in a short window stop
+the restarts (a crash loop), so a broken install does not spin forever.
+"""
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+import subprocess
+from collections import deque
+from agent.readiness import wait_for, url_responds
+
+logger = logging.getLogger("game-agent")
+
+# Supervisor states, as shown in the tray
+STATE_STOPPED = "stopped"
+STATE_STARTING = "starting"
+STATE_RUNNING = "running"
+STATE_RESTARTING = "restarting"
+STATE_CRASH_LOOP = "crash_loop"
+
+DEFAULT_START_TIMEOUT = 15
+DEFAULT_CHECK_INTERVAL = 5
+DEFAULT_LIVENESS_FAILURES = 3
+DEFAULT_HEARTBEAT_TIMEOUT = 30
+DEFAULT_BACKOFF_INITIAL = 1
+DEFAULT_BACKOFF_MAX = 60
+DEFAULT_CRASH_LOOP_RESTARTS = 5
+DEFAULT_CRASH_LOOP_WINDOW = 300
+
+# A child that stayed up this long resets the backoff
+STABLE_UPTIME = 60
+
+# Set in the child's environment. The supervisor closes the child's stdin to
+# ask it to stop, since TerminateProcess on Windows can't be caught
+SUPERVISED_ENV = "NO_ALT_TAB_SUPERVISED"
+
+
+class Heartbeat:
+    """
+    Timestamp the agent's listen loop refreshes, so a hung loop can be told
+    apart from a busy API
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._last = None
+
+    def beat(self):
+        self._last = self._clock()
+
+    def age(self):
+        """
+        Returns:
+            Seconds since the last beat, or None before the first one
+        """
+        if self._last is None:
+            return None
+        return round(self._clock() - self._last, 3)
+
+
+def process_usage(pid):
+    """
+    CPU time and memory of another process
+
+    Returns:
+        Tuple of (cpu_seconds, rss_bytes), or None if the process can't be read
+    """
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+        from agent.metrics import _windows_memory_counters
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        # PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ
+        handle = kernel32.OpenProcess(0x1000 | 0x0010, False, pid)
+        if not handle:
+            return None
+        try:
+            times = [wintypes.FILETIME() for _ in range(4)]
+            if not kernel32.GetProcessTimes(handle, *(ctypes.byref(t) for t in times)):
+                return None
+            kernel, user = ((t.dwHighDateTime << 32 | t.dwLowDateTime) / 1e7 for t in times[2:])
+            counters = _windows_memory_counters(handle)
+            return kernel + user, counters.WorkingSetSize if counters is not None else None
+        finally:
+            kernel32.CloseHandle(handle)
+
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            resident = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    # utime and stime are the 14th and 15th fields of stat
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return cpu, resident * os.sysconf("SC_PAGE_SIZE")
+
+
+class Supervisor:
+    """
+    Runs a child process and restarts it when it crashes or hangs
+    """
+
+    def __init__(self, command, health_url, cwd=None, env=None, log_dir=None, name="agent",
+                 start_timeout=DEFAULT_START_TIMEOUT, check_interval=DEFAULT_CHECK_INTERVAL,
+                 liveness_failures=DEFAULT_LIVENESS_FAILURES, heartbeat_timeout=DEFAULT_HEARTBEAT_TIMEOUT,
+                 backoff_initial=DEFAULT_BACKOFF_INITIAL, backoff_max=DEFAULT_BACKOFF_MAX,
+                 crash_loop_restarts=DEFAULT_CRASH_LOOP_RESTARTS, crash_loop_window=DEFAULT_CRASH_LOOP_WINDOW,
+                 on_change=None):
+        """
+        Args:
+            command: Argument list of the child process
+            health_url: URL of the child's /health endpoint
+            cwd: Working directory of the child
+            env: Environment of the child; None inherits this process's
+            log_dir: Directory for <name>_stdout.log and <name>_stderr.log; None discards output
+            name: Name used in logs and log file names
+            start_timeout: Seconds for /health to first answer before the start counts as failed
+            check_interval: Seconds between liveness checks and resource samples
+            liveness_failures: Consecutive failed checks before the child is restarted
+            heartbeat_timeout: Seconds without a listen loop heartbeat before a check fails
+            backoff_initial, backoff_max: Delay before a restart, doubling per restart
+            crash_loop_restarts, crash_loop_window: Give up after this many restarts within
+                                                    this many seconds
+            on_change: Optional callable invoked with the status dictionary on every update
+        """
+        self.command = command
+        self.health_url = health_url
+        self.cwd = cwd
+        self.env = env
+        self.log_dir = log_dir
+        self.name = name
+        self.start_timeout = start_timeout
+        self.check_interval = check_interval
+        self.liveness_failures = liveness_failures
+        self.heartbeat_timeout = heartbeat_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.crash_loop_restarts = crash_loop_restarts
+        self.crash_loop_window = crash_loop_window
+        self.on_change = on_change
+
+        self.state = STATE_STOPPED
+        self.process = None
+        self.restarts = 0
+        self.last_exit_code = None
+        self.health = None
+        self.cpu_percent = None
+        self.rss_bytes = None
+        self._started_at = None
+        self._crashes = deque()
+        self._backoff = backoff_initial
+        self._log_files = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._crashes.clear()
+        self._backoff = self.backoff_initial
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-supervisor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """
+        Stop supervising and terminate the child
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout + 5)
+            self._thread = None
+        self._terminate(timeout)
+        self._set_state(STATE_STOPPED)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self):
+        """
+        Returns:
+            Dictionary of the state, restart count and latest resource readings
+        """
+        uptime = None
+        if self._started_at is not None and self.process is not None and self.process.poll() is None:
+            uptime = round(time.monotonic() - self._started_at, 1)
+        return {
+            "state": self.state,
+            "pid": self.process.pid if self.process is not None else None,
+            "restarts": self.restarts,
+            "last_exit_code": self.last_exit_code,
+            "uptime": uptime,
+            "phase": (self.health or {}).get("phase"),
+            "cpu_percent": self.cpu_percent,
+            "rss_bytes": self.rss_bytes,
+        }
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.info(f"Supervisor: {self.name} {self.state} -> {state}")
+            self.state = state
+        self._notify()
+
+    def _notify(self):
+        if self.on_change is not None:
+            try:
+                self.on_change(self.status())
+            except Exception as e:
+                logger.warning(f"Supervisor status callback failed: {e}")
+
+    def _launch(self):
+        if self.log_dir is not None:
+            stdout = open(os.path.join(self.log_dir, f"{self.name}_stdout.log"), "a")
+            stderr = open(os.path.join(self.log_dir, f"{self.name}_stderr.log"), "a")
+            self._log_files = [stdout, stderr]
+        else:
+            stdout = stderr = subprocess.DEVNULL
+        env = dict(self.env if self.env is not None else os.environ)
+        env[SUPERVISED_ENV] = "1"
+        self.process = subprocess.Popen(
+            self.command,
+            cwd=self.cwd,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=stdout,
+            stderr=stderr,
+            # Don't create a console window
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+        self._started_at = time.monotonic()
+        self.health = None
+        self.cpu_percent = self.rss_bytes = None
+        logger.info(f"Supervisor: started {self.name} with PID {self.process.pid}")
+
+    def _close_logs(self):
+        for f in self._log_files:
+            f.close()
+        self._log_files = []
+
+    def _terminate(self, timeout=5):
+        process = self.process
+        if process is not None and process.poll() is None:
+            # Try to stop gracefully first, so the child's atexit hooks run
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            if sys.platform == 'win32':
+                # TerminateProcess can't be caught; give the child time to exit on its own
+                try:
+                    process.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    process.terminate()
+            else:
+                os.kill(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if process is not None:
+            self.last_exit_code = process.returncode
+        self._close_logs()
+
+    def _wait_ready(self):
+        result = wait_for(url_responds(self.health_url), timeout=self.start_timeout,
+                          abort=lambda: self._stop.is_set() or self.process.poll() is not None)
+        if result:
+            self.health = result.value if isinstance(result.value, dict) else None
+            logger.info(f"Supervisor: {self.name} answered /health after {result.elapsed:.2f}s")
+        return bool(result)
+
+    def _alive(self):
+        """
+        Liveness check: /health answers, and the listen loop beats once it is listening
+        """
+        health = url_responds(self.health_url, timeout=self.check_interval)()
+        if health is None:
+            return False
+        if isinstance(health, dict):
+            self.health = health
+            age = health.get("heartbeat_age")
+            if health.get("ready") and age is not None and age > self.heartbeat_timeout:
+                logger.warning(f"Supervisor: {self.name} listen loop silent for {age:.0f}s")
+                return False
+        return True
+
+    def _sample(self, previous):
+        usage = process_usage(self.process.pid)
+        now = time.monotonic()
+        if usage is None:
+            return previous
+        cpu, self.rss_bytes = usage
+        if previous is not None:
+            self.cpu_percent = round(100 * (cpu - previous[0]) / max(now - previous[1], 1e-6), 1)
+        return cpu, now
+
+    def _watch(self):
+        """
+        Monitor a ready child until it exits or fails its liveness checks
+        """
+        failures = 0
+        sample = self._sample(None)
+        self._set_state(STATE_RUNNING)
+        while not self._stop.wait(self.check_interval):
+            if self.process.poll() is not None:
+                logger.warning(f"Supervisor: {self.name} exited with code {self.process.returncode}")
+                return
+            if self._alive():
+                failures = 0
+            else:
+                failures += 1
+                logger.warning(f"Supervisor: {self.name} failed liveness check ({failures}/{self.liveness_failures})")
+                if failures >= self.liveness_failures:
+                    return
+            sample = self._sample(sample)
+            self._notify()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._set_state(STATE_STARTING)
+            try:
+                self._launch()
+            except OSError as e:
+                logger.error(f"Supervisor: failed to start {self.name}: {e}")
+            else:
+                if self._wait_ready():
+                    self._watch()
+                elif not self._stop.is_set() and self.process.poll() is None:
+                    logger.warning(f"Supervisor: {self.name} did not answer within {self.start_timeout}s")
+                self._terminate()
+            if self._stop.is_set():
+                break
+
+            now = time.monotonic()
+            if self._started_at is not None and now - self._started_at >= STABLE_UPTIME:
+                self._backoff = self.backoff_initial
+            self._crashes.append(now)
+            while self._crashes and now - self._crashes[0] > self.crash_loop_window:
+                self._crashes.popleft()
+            if len(self._crashes) > self.crash_loop_restarts:
+                logger.error(f"Supervisor: {self.name} crashed {len(self._crashes)} times within "
+                             f"{self.crash_loop_window}s, not restarting")
+                self._set_state(STATE_CRASH_LOOP)
+                return
+
+            self._set_state(STATE_RESTARTING)
+            logger.info(f"Supervisor: restarting {self.name} in {self._backoff:.1f}s (exit code {self.last_exit_code})")
+            if self._stop.wait(self._backoff):
+                break
+            self._backoff = min(self._backoff * 2, self.backoff_max)
+            self.restarts += 1
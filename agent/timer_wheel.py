@@ -0,0 +1,147 @@
+"""
+Hashed timer wheel for scheduling callbacks with millisecond-level delays
+"""
+import math
+import time
+import logging
+import threading
+
+logger = logging.getLogger("game-agent")
+
+
+class Timer:
+    """
+    Handle for a scheduled callback
+    """
+
+    __slots__ = ("deadline", "callback", "rounds", "cancelled")
+
+    def __init__(self, deadline, callback, rounds):
+        self.deadline = deadline
+        self.callback = callback
+        self.rounds = rounds
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Single-threaded timer wheel.
+
+    Timers are hashed into slots by their deadline tick, so scheduling and
+    expiring are O(1) regardless of how many timers are pending. The wheel
+    thread only ticks while timers are pending and sleeps otherwise.
+    Callbacks run on the wheel thread and must return quickly; hand long work
+    off to another thread.
+    """
+
+    def __init__(self, tick=0.002, slots=512, clock=time.perf_counter):
+        """
+        Args:
+            tick: Wheel resolution in seconds
+            slots: Number of slots; delays longer than tick * slots take extra rounds
+            clock: Monotonic high-resolution clock function
+        """
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._start = clock()
+        self._current_tick = 0
+        self._thread = None
+        self._running = False
+
+    def _tick_of(self, deadline):
+        return math.ceil((deadline - self._start) / self.tick)
+
+    def schedule(self, delay, callback):
+        """
+        Schedule a callback to run after a delay
+
+        Args:
+            delay: Seconds from now
+            callback: Callable invoked with the Timer's deadline
+
+        Returns:
+            Timer handle that can be cancelled
+        """
+        deadline = self._clock() + max(0.0, delay)
+        with self._condition:
+            if self._pending == 0:
+                # Move the cursor past the ticks skipped while the wheel was idle
+                self._current_tick = max(self._current_tick, self._tick_of(self._clock()) - 1)
+            target_tick = max(self._tick_of(deadline), self._current_tick + 1)
+            ticks_ahead = target_tick - self._current_tick
+            timer = Timer(deadline, callback, (ticks_ahead - 1) // len(self.slots))
+            self.slots[target_tick % len(self.slots)].append(timer)
+            self._pending += 1
+            self._ensure_thread()
+            self._condition.notify()
+        return timer
+
+    def _ensure_thread(self):
+        # A thread stopped but still sleeping through its last tick keeps running
+        self._running = True
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="timer-wheel", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending == 0:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                next_tick = self._current_tick + 1
+
+            wait = self._start + next_tick * self.tick - self._clock()
+            if wait > 0:
+                time.sleep(wait)
+
+            due = []
+            with self._condition:
+                self._current_tick = next_tick
+                slot = self.slots[next_tick % len(self.slots)]
+                remaining = []
+                for timer in slot:
+                    if timer.cancelled:
+                        self._pending -= 1
+                    elif timer.rounds > 0:
+                        timer.rounds -= 1
+                        remaining.append(timer)
+                    else:
+                        self._pending -= 1
+                        due.append(timer)
+                self.slots[next_tick % len(self.slots)] = remaining
+
+            for timer in due:
+                try:
+                    timer.callback(timer.deadline)
+                except Exception as e:
+                    logger.error(f"Error in timer callback: {e}")
+
+
+_wheel = None
+_wheel_lock = threading.Lock()
+
+
+def get_timer_wheel():
+    """
+    Returns:
+        The shared TimerWheel, created on first use
+    """
+    global _wheel
+    if _wheel is None:
+        with _wheel_lock:
+            if _wheel is None:
+                _wheel = TimerWheel()
+    return _wheel
@@ -0,0 +1,229 @@
+"""
+Optional per-utterance tracing in the Chrome trace-event format.
+
+When tracing is enabled, spans (capture, decode, parse, handler import,
+window enumeration, launch wait, ...) are queued to a writer thread that
+appends them to a rotating JSON file. That file can be opened in
+chrome://tracing or https://ui.perfetto.dev to see one slow command on a
+timeline. When tracing is disabled, span() returns a shared no-op object,
+so an instrumented call site costs one function call.
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_TRACE_FILE = "agent_trace.json"
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+_STOP = object()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """
+    A timed section recorded as a complete ("X") trace event
+    """
+
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def set(self, **args):
+        """
+        Attach more arguments, e.g. a result known only at the end of the span
+        """
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.emit(self.name, self.category, self.start, end - self.start, self.args)
+        return False
+
+
+class Tracer:
+    """
+    Writes trace events to a rotating file from a background thread.
+
+    Files use the JSON array format without the closing bracket, which the
+    trace viewers accept, so events can be appended as they arrive.
+    """
+
+    def __init__(self, path=DEFAULT_TRACE_FILE, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.pid = os.getpid()
+        self.utterance = 0
+        self._epoch = time.perf_counter_ns()
+        self._queue = queue.SimpleQueue()
+        self._thread_names = {}
+        self._file = None
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def begin_utterance(self):
+        """
+        Start a new utterance; later spans are tagged with its number
+
+        Returns:
+            The utterance number
+        """
+        self.utterance += 1
+        self.instant("utterance", utterance=self.utterance)
+        return self.utterance
+
+    def emit(self, name, category, start_ns, duration_ns, args):
+        thread = threading.current_thread()
+        args["utterance"] = self.utterance
+        self._queue.put((name, category, start_ns, duration_ns, args, thread.ident, thread.name))
+
+    def instant(self, name, **args):
+        """
+        Record a point in time, e.g. the start of an utterance
+        """
+        self.emit(name, "marker", time.perf_counter_ns(), None, args)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join(5)
+
+    def _open(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self._size = 2
+        # Thread names have to be repeated in every file
+        for tid, thread_name in self._thread_names.items():
+            self._write_event({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                               "args": {"name": thread_name}})
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._open()
+
+    def _write_event(self, event):
+        line = json.dumps(event, default=str) + ",\n"
+        self._file.write(line)
+        self._size += len(line)
+
+    def _run(self):
+        try:
+            self._open()
+        except OSError as e:
+            logger.error(f"Could not open trace file {self.path}: {e}")
+            return
+
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            name, category, start_ns, duration_ns, args, tid, thread_name = item
+            if tid not in self._thread_names:
+                self._thread_names[tid] = thread_name
+                self._write_event({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                                   "args": {"name": thread_name}})
+            event = {"name": name, "cat": category, "pid": self.pid, "tid": tid,
+                     "ts": (start_ns - self._epoch) / 1000, "args": args}
+            if duration_ns is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=duration_ns / 1000)
+            self._write_event(event)
+
+            if self._size >= self.max_bytes:
+                self._rotate()
+            elif self._queue.empty():
+                self._file.flush()
+        self._file.close()
+
+
+_tracer = None
+
+
+def span(name, category="agent", **args):
+    """
+    Time a block as a trace span:
+
+        with span("parse", transcript=text):
+            ...
+
+    Returns:
+        A context manager; a shared no-op one while tracing is disabled
+    """
+    if _tracer is None:
+        return _NOOP_SPAN
+    return Span(_tracer, name, category, args)
+
+
+def begin_utterance():
+    """
+    Mark the start of a new utterance in the trace, if tracing is enabled
+    """
+    if _tracer is not None:
+        _tracer.begin_utterance()
+
+
+def enable_tracing(path=DEFAULT_TRACE_FILE, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+    """
+    Start recording spans to a rotating trace file
+
+    Returns:
+        The Tracer
+    """
+    global _tracer
+    disable_tracing()
+    _tracer = Tracer(path, max_bytes, backup_count)
+    logger.info(f"Tracing enabled, writing {path}")
+    return _tracer
+
+
+def disable_tracing():
+    """
+    Stop tracing and close the trace file
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+
+
+atexit.register(disable_tracing)
@@ -0,0 +1,188 @@
+"""
+Vocabulary profiles: the subset of commands that makes sense in a context.
+
+command_vocabulary.json may define profiles such as "in-game" (inventory,
+mute, screenshot) and "desktop" (open and close applications), each listing
+its handlers and the window titles it applies to. Every profile is compiled
+up front into its own phrase index and recognizer grammar, so switching is a
+pointer swap on the CommandParser. A ProfileSwitcher follows the foreground
+window and activates the first profile whose window patterns match it.
+A profile may also name the language spoken while it is active, e.g. for a
+game played on a German server; the agent then decodes with that language's
+model and matches the same-named profile of that language's vocabulary.
+
+Enable switching with NO_ALT_TAB_PROFILES=1.
+"""
+import os
+import time
+import logging
+import importlib
+from agent.macros import MACRO_PREFIX
+
+logger = logging.getLogger("game-agent")
+
+# Profile holding the whole vocabulary, active unless something switches
+ALL_PROFILE = "all"
+
+DEFAULT_CHECK_INTERVAL = 1.0
+
+# Handlers that take a name from the transcript ("open steam") rather than
+# matching a fixed phrase; their modules' grammar_phrases() list the names
+OPEN_ENDED_HANDLERS = ("open_application", "close_specific_window")
+
+
+def compile_grammar(phrases_to_handlers):
+    """
+    Recognizer grammar for a phrase mapping
+
+    Returns:
+        Sorted phrases, the names open-ended handlers among them accept, then [unk]
+    """
+    phrases = set(phrases_to_handlers)
+    handlers = set(phrases_to_handlers.values())
+    for handler in OPEN_ENDED_HANDLERS:
+        if handler in handlers:
+            phrases.update(importlib.import_module(f"agent.commands.{handler}").grammar_phrases())
+    # [unk] absorbs speech outside the grammar instead of forcing a command
+    return sorted(phrases) + ["[unk]"]
+
+
+class VocabularyProfile:
+    """
+    Precompiled phrase index and grammar for a subset of the vocabulary
+    """
+
+    __slots__ = ("name", "language", "windows", "phrases_to_handlers", "phrases", "grammar")
+
+    def __init__(self, name, phrases_to_handlers, windows=(), language=None):
+        """
+        Args:
+            name: Profile name, e.g. "in-game"
+            phrases_to_handlers: Mapping of lower-cased phrase to handler, in match order
+            windows: Window title patterns the profile applies to
+            language: Language spoken while the profile is active
+        """
+        self.name = name
+        self.language = language
+        self.windows = [pattern.lower() for pattern in windows]
+        self.phrases_to_handlers = phrases_to_handlers
+        self.phrases = list(phrases_to_handlers)
+        self.grammar = compile_grammar(phrases_to_handlers)
+
+    def matches(self, title):
+        """
+        Returns:
+            True if the lower-cased window title contains one of the profile's patterns
+        """
+        return any(pattern in title for pattern in self.windows)
+
+    def __repr__(self):
+        return f"VocabularyProfile({self.name!r}, {len(self.phrases)} phrases)"
+
+
+def compile_profile(definition, phrases_to_handlers, language=None):
+    """
+    Compile a profile definition from the command vocabulary
+
+    Handlers are command handler names or macro names.
+
+    Args:
+        definition: Profile object from command_vocabulary.json
+        phrases_to_handlers: The parser's full phrase mapping
+        language: Language of the vocabulary, unless the profile names another
+
+    Returns:
+        VocabularyProfile
+
+    Raises:
+        ValueError: If the definition has no name or names an unknown handler
+    """
+    name = definition.get("name")
+    if not name:
+        raise ValueError("Profile is missing a name")
+    if name == ALL_PROFILE:
+        raise ValueError(f"Profile name '{ALL_PROFILE}' is reserved for the whole vocabulary")
+
+    known = set(phrases_to_handlers.values())
+    handlers = set()
+    for handler in definition.get("handlers", []):
+        if handler not in known and MACRO_PREFIX + handler in known:
+            handler = MACRO_PREFIX + handler
+        if handler not in known:
+            raise ValueError(f"Profile '{name}' names unknown handler '{handler}'")
+        handlers.add(handler)
+
+    # Keep the full mapping's order so macro phrases still win over single commands
+    subset = {phrase: handler for phrase, handler in phrases_to_handlers.items() if handler in handlers}
+    return VocabularyProfile(name, subset, definition.get("windows", []), definition.get("language", language))
+
+
+class ProfileSwitcher:
+    """
+    Activates the vocabulary profile matching the foreground window
+    """
+
+    def __init__(self, parser, backend=None, check_interval=DEFAULT_CHECK_INTERVAL, clock=time.monotonic):
+        """
+        Args:
+            parser: CommandParser whose profile is switched
+            backend: WindowBackend reporting the foreground window; the platform's by default
+            check_interval: Seconds between looks at the foreground window
+        """
+        if backend is None:
+            from agent.window_index import create_default_backend
+            backend = create_default_backend()
+        self.parser = parser
+        self.backend = backend
+        self.check_interval = check_interval
+        self._clock = clock
+        self._checked_at = None
+        self.switches = 0
+
+    @classmethod
+    def from_env(cls, parser):
+        """
+        Returns:
+            ProfileSwitcher, or None unless NO_ALT_TAB_PROFILES=1 and the vocabulary defines profiles
+        """
+        if os.getenv("NO_ALT_TAB_PROFILES", "0") != "1":
+            return None
+        if len(parser.profiles) < 2:
+            logger.warning("NO_ALT_TAB_PROFILES is set but the vocabulary defines no profiles")
+            return None
+        return cls(parser)
+
+    def select(self, title):
+        """
+        Returns:
+            Name of the first profile matching the window title, else the default profile
+        """
+        if title:
+            title = title.lower()
+            for profile in self.parser.profiles.values():
+                if profile.matches(title):
+                    return profile.name
+        return self.parser.default_profile
+
+    def update(self):
+        """
+        Look at the foreground window if the interval has passed and switch if needed
+
+        Returns:
+            The active VocabularyProfile
+        """
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            try:
+                window = self.backend.foreground_window()
+            except Exception as e:
+                logger.warning(f"Could not get the foreground window: {e}")
+                window = None
+            name = self.select(window[1] if window else None)
+            if name != self.parser.profile.name:
+                logger.info(f"Foreground window {window[1] if window else None!r}, "
+                            f"switching to the '{name}' vocabulary profile")
+                self.parser.set_profile(name)
+                self.switches += 1
+        return self.parser.profile
@@ -0,0 +1,152 @@
+"""
+Wake phrase gate in front of full speech decoding.
+
+A keyword-spotting recognizer restricted to a grammar of the wake phrase
+(plus [unk] for everything else) hears every chunk. That is far cheaper
+than decoding with the full vocabulary. Only for a short window after the
+wake phrase do chunks reach the full recognizer and commands get
+dispatched, so game audio and teammates' voices are ignored the rest of the
+time. The spotter's partial results lag the audio, so the last chunks heard
+before the gate opened are kept and replayed into the full recognizer;
+otherwise the start of a command said right after the phrase would be lost.
+
+Enable with NO_ALT_TAB_WAKE_PHRASE, e.g. NO_ALT_TAB_WAKE_PHRASE="hey agent";
+NO_ALT_TAB_WAKE_WINDOW sets the window in seconds.
+"""
+import json
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger("game-agent")
+
+DEFAULT_WINDOW = 5.0
+
+# Chunks heard before the gate opened that are replayed into the full recognizer
+PRE_ROLL_CHUNKS = 2
+
+# Results of WakeWordGate.accept()
+GATE_CLOSED = "closed"
+GATE_OPENED = "opened"
+GATE_OPEN = "open"
+
+
+class WakeWordGate:
+    """
+    Lets audio through to full decoding only for a window after the wake phrase
+    """
+
+    def __init__(self, phrase, window=DEFAULT_WINDOW, pre_roll_chunks=PRE_ROLL_CHUNKS, clock=time.monotonic):
+        """
+        Args:
+            phrase: Wake phrase; its words must be in the model's vocabulary
+            window: Seconds full decoding stays on after the wake phrase
+            pre_roll_chunks: Chunks before the opening one kept for take_pre_roll()
+        """
+        self.phrase = " ".join(phrase.lower().split())
+        self.window = window
+        self._clock = clock
+        self._spotter = None
+        self._open_until = None
+        self._recent = deque(maxlen=pre_roll_chunks)
+        self._pre_roll = []
+        self.activations = 0
+        self.spotted_chunks = 0
+        self.passed_chunks = 0
+
+    @property
+    def grammar(self):
+        """
+        Grammar for the keyword-spotting recognizer
+        """
+        return [self.phrase, "[unk]"]
+
+    def set_spotter(self, recognizer):
+        """
+        Use a recognizer created with the grammar property for spotting
+        """
+        self._spotter = recognizer
+
+    def release_spotter(self):
+        """
+        Stop spotting, e.g. at the end of a listening cycle
+
+        Returns:
+            The recognizer set with set_spotter(), or None
+        """
+        spotter, self._spotter = self._spotter, None
+        return spotter
+
+    @property
+    def is_open(self):
+        return self._open_until is not None and self._clock() < self._open_until
+
+    def open(self):
+        self._open_until = self._clock() + self.window
+        self.activations += 1
+        logger.info(f"Wake phrase heard, listening for a command for {self.window:.0f}s")
+
+    def close(self):
+        """
+        End the window early, e.g. once a command was dispatched
+        """
+        self._open_until = None
+
+    def _spotted(self, data):
+        if self._spotter.AcceptWaveform(data):
+            text = json.loads(self._spotter.Result()).get("text", "")
+        else:
+            text = json.loads(self._spotter.PartialResult()).get("partial", "")
+        if self.phrase in text:
+            # Start from scratch so the same utterance doesn't trigger twice
+            self._spotter.Reset()
+            return True
+        return False
+
+    def accept(self, data):
+        """
+        Feed one chunk
+
+        Returns:
+            GATE_CLOSED if the chunk should not be decoded, GATE_OPENED if the
+            wake phrase was just heard (reset the full recognizer), GATE_OPEN
+            while the window lasts
+        """
+        if self.is_open:
+            self.passed_chunks += 1
+            return GATE_OPEN
+        self._open_until = None
+        self.spotted_chunks += 1
+        if self._spotter is not None and self._spotted(data):
+            self._pre_roll = list(self._recent)
+            self._recent.clear()
+            self.open()
+            self.passed_chunks += 1
+            return GATE_OPENED
+        self._recent.append(data)
+        return GATE_CLOSED
+
+    def take_pre_roll(self):
+        """
+        Returns:
+            The chunks heard just before the gate last opened, oldest first;
+            feed them to the full recognizer before the opening chunk
+        """
+        pre_roll, self._pre_roll = self._pre_roll, []
+        return pre_roll
+
+    def strip(self, transcript):
+        """
+        Returns:
+            The transcript after the wake phrase, or after the end of one
+        """
+        words = transcript.split()
+        lowered = [w.lower() for w in words]
+        phrase = self.phrase.split()
+        # The pre-roll may start before the wake phrase or midway through it
+        for start in range(len(phrase)):
+            tail = phrase[start:]
+            for i in range(len(lowered) - len(tail) + 1):
+                if lowered[i:i + len(tail)] == tail:
+                    return " ".join(words[i + len(tail):])
+        return " ".join(words)
@@ -0,0 +1,251 @@
+"""
+Cached index of visible top-level windows behind a platform-neutral backend
+"""
+import sys
+import time
+import logging
+import threading
+from agent import tracing
+
+logger = logging.getLogger("game-agent")
+
+# How long an enumeration of the desktop stays valid
+DEFAULT_TTL = 0.5
+
+
+class WindowBackend:
+    """
+    Interface for enumerating top-level windows on the current platform
+    """
+
+    def list_windows(self):
+        """
+        Enumerate visible top-level windows
+
+        Returns:
+            List of (window handle, window title) tuples in z-order
+        """
+        raise NotImplementedError
+
+    def foreground_window(self):
+        """
+        Returns:
+            (window handle, window title) of the window with keyboard focus, or None
+        """
+        raise NotImplementedError
+
+
+class Win32WindowBackend(WindowBackend):
+    """
+    Window backend using EnumWindows from user32.dll
+    """
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+        self._enum_proc_type = ctypes.WINFUNCTYPE(ctypes.c_bool, wintypes.HWND, wintypes.LPARAM)
+
+        self._enum_windows = user32.EnumWindows
+        self._enum_windows.argtypes = [self._enum_proc_type, wintypes.LPARAM]
+        self._enum_windows.restype = wintypes.BOOL
+
+        self._get_window_text = user32.GetWindowTextW
+        self._get_window_text.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+        self._get_window_text.restype = ctypes.c_int
+
+        self._get_window_text_length = user32.GetWindowTextLengthW
+        self._get_window_text_length.argtypes = [wintypes.HWND]
+        self._get_window_text_length.restype = ctypes.c_int
+
+        self._is_window_visible = user32.IsWindowVisible
+        self._is_window_visible.argtypes = [wintypes.HWND]
+        self._is_window_visible.restype = wintypes.BOOL
+
+        self._get_foreground_window = user32.GetForegroundWindow
+        self._get_foreground_window.argtypes = []
+        self._get_foreground_window.restype = wintypes.HWND
+
+        # One title buffer reused across calls, grown on demand; the profile switcher
+        # and window lookups may read titles from different threads
+        self._buffer = ctypes.create_unicode_buffer(256)
+        self._buffer_lock = threading.Lock()
+
+    def _window_title(self, hwnd, length):
+        with self._buffer_lock:
+            if length + 1 > len(self._buffer):
+                self._buffer = self._ctypes.create_unicode_buffer(length + 1)
+            self._get_window_text(hwnd, self._buffer, len(self._buffer))
+            return self._buffer.value
+
+    def list_windows(self):
+        windows = []
+
+        def enum_windows_callback(hwnd, lparam):
+            if self._is_window_visible(hwnd):
+                length = self._get_window_text_length(hwnd)
+                if length > 0:
+                    windows.append((hwnd, self._window_title(hwnd, length)))
+            return True
+
+        self._enum_windows(self._enum_proc_type(enum_windows_callback), 0)
+        return windows
+
+    def foreground_window(self):
+        hwnd = self._get_foreground_window()
+        if not hwnd:
+            return None
+        return hwnd, self._window_title(hwnd, self._get_window_text_length(hwnd))
+
+
+class FakeWindowBackend(WindowBackend):
+    """
+    In-memory window backend for tests and non-Windows platforms
+    """
+
+    def __init__(self, windows=None):
+        """
+        Args:
+            windows: Optional list of (window handle, window title) tuples
+        """
+        self.windows = list(windows or [])
+        self.enumerations = 0
+        self.foreground = None
+
+    def add_window(self, hwnd, title):
+        self.windows.append((hwnd, title))
+
+    def remove_window(self, hwnd):
+        self.windows = [(h, t) for h, t in self.windows if h != hwnd]
+
+    def focus(self, hwnd):
+        """
+        Make hwnd the foreground window; None for no focused window
+        """
+        self.foreground = hwnd
+
+    def list_windows(self):
+        self.enumerations += 1
+        return list(self.windows)
+
+    def foreground_window(self):
+        for hwnd, title in self.windows:
+            if hwnd == self.foreground:
+                return hwnd, title
+        return None
+
+
+class WindowIndex:
+    """
+    Short-lived snapshot of visible windows with a lowercase search index.
+
+    Repeated lookups within the TTL share a single enumeration, so a handler
+    that checks for the same window several times only walks the desktop once.
+    """
+
+    def __init__(self, backend, ttl=DEFAULT_TTL, clock=time.monotonic):
+        """
+        Args:
+            backend: WindowBackend used to enumerate windows
+            ttl: Seconds a snapshot stays valid before re-enumerating
+            clock: Monotonic clock function, replaceable in tests
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._snapshot_time = 0.0
+        self._queries = {}
+
+    def invalidate(self):
+        """
+        Drop the current snapshot, e.g. after closing or launching a window
+        """
+        with self._lock:
+            self._snapshot = None
+
+    def _current(self):
+        now = self._clock()
+        if self._snapshot is None or now - self._snapshot_time > self.ttl:
+            with tracing.span("window_enumeration") as span:
+                windows = self.backend.list_windows()
+                span.set(windows=len(windows))
+            self._snapshot = [(hwnd, title, title.lower()) for hwnd, title in windows if title]
+            self._snapshot_time = now
+            self._queries = {}
+        return self._snapshot
+
+    def windows(self):
+        """
+        Returns:
+            List of (window handle, window title) tuples for visible windows
+        """
+        with self._lock:
+            return [(hwnd, title) for hwnd, title, _ in self._current()]
+
+    def find(self, pattern):
+        """
+        Find windows whose title contains the pattern (case-insensitive)
+
+        Args:
+            pattern: Substring to look for in window titles
+
+        Returns:
+            List of (window handle, window title) tuples
+        """
+        pattern = pattern.lower()
+        with self._lock:
+            snapshot = self._current()
+            matches = self._queries.get(pattern)
+            if matches is None:
+                matches = [(hwnd, title) for hwnd, title, lowered in snapshot if pattern in lowered]
+                self._queries[pattern] = matches
+            return list(matches)
+
+    def find_first(self, pattern):
+        """
+        Returns:
+            Handle of the first window whose title contains the pattern, or None
+        """
+        matches = self.find(pattern)
+        return matches[0][0] if matches else None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def create_default_backend():
+    """
+    Pick the window backend for the current platform
+    """
+    if sys.platform == 'win32':
+        return Win32WindowBackend()
+    logger.warning("No native window backend for this platform, using an empty window list")
+    return FakeWindowBackend()
+
+
+def get_window_index():
+    """
+    Returns:
+        The shared WindowIndex, created on first use
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = WindowIndex(create_default_backend())
+    return _index
+
+
+def set_window_index(index):
+    """
+    Replace the shared WindowIndex, e.g. with one backed by FakeWindowBackend
+    """
+    global _index
+    with _index_lock:
+        _index = index
@@ -0,0 +1,195 @@
+"""
+Benchmark recognition latency while the REST API is under load, for each API server mode.
+
+Decodes audio chunks with the Vosk model in the main thread, as the listen
+loop does, while separate client processes hammer /logs and /stats. Reports
+per-chunk decode latency and how many requests the server answered.
+
+Without a Vosk model, --synthetic replaces decoding with pure-Python work
+on each chunk (energy over every sample). That holds the GIL the whole
+time, like the Python side of the listen loop, so it shows the contention
+with in-process API threads more starkly than the Vosk decoder, which
+releases the GIL while it runs.
+
+Usage:
+    python bench_api_modes.py [--modes none,dev,threaded,process] [--clients N] [--chunks N] [--synthetic]
+"""
+import os
+import sys
+import time
+import random
+import struct
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import urllib.request
+import multiprocessing
+from agent.api import create_app, serve, start_api_process
+from agent.history_store import HistoryStore
+from agent.command_log import CommandLogBuffer, CommandLogRecord
+from agent.stats import CommandStats
+
+CHUNK = 4096
+RATE = 16000
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def fill(history_path, entries):
+    history = HistoryStore(history_path)
+    logs = CommandLogBuffer(capacity=1000)
+    stats = CommandStats()
+    for i in range(entries):
+        record = logs.append(CommandLogRecord("2024-01-01 12:00:00", f"open the inventory please {i}",
+                                              "open_inventory", 1.0, "Inventory opened", "ok"))
+        history.add(record)
+        stats.record("open_inventory", "ok", 0.002)
+    history.close()
+    return logs, HistoryStore(history_path, writer=False), stats
+
+
+def wait_until_up(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1).read()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def client(port, stop, served):
+    paths = ["/logs?limit=500", "/logs?limit=100", "/stats", "/health"]
+    count = 0
+    while not stop.is_set():
+        path = paths[count % len(paths)]
+        request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", headers={"Accept-Encoding": "gzip"})
+        try:
+            urllib.request.urlopen(request, timeout=5).read()
+            count += 1
+        except OSError:
+            # /stats is not served by the separate process
+            count += 1
+    with served.get_lock():
+        served.value += count
+
+
+def decode_latencies(recognizer, chunks, audio):
+    timings = []
+    for i in range(chunks):
+        start = time.perf_counter()
+        if recognizer.AcceptWaveform(audio[i % len(audio)]):
+            recognizer.Result()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings
+
+
+class SyntheticRecognizer:
+    """
+    Stand-in for KaldiRecognizer doing GIL-bound Python work per chunk
+    """
+
+    def AcceptWaveform(self, data):
+        samples = struct.unpack(f"<{len(data) // 2}h", data)
+        energy = 0
+        for _ in range(4):
+            energy += sum(s * s for s in samples)
+        return energy < 0
+
+    def Result(self):
+        return "{}"
+
+
+def run_mode(mode, args, model, audio, logs, history, stats):
+    port = free_port()
+    process = None
+    if mode == "process":
+        process = start_api_process(history.path, "127.0.0.1", port)
+    elif mode != "none":
+        app = create_app(logs, history, None, stats)
+        threading.Thread(target=serve, args=(app, mode, "127.0.0.1", port), daemon=True).start()
+    if mode != "none" and not wait_until_up(port):
+        print(f"{mode}: server did not start")
+        return
+
+    stop = multiprocessing.Event()
+    served = multiprocessing.Value("i", 0)
+    clients = []
+    if mode != "none":
+        clients = [multiprocessing.Process(target=client, args=(port, stop, served)) for _ in range(args.clients)]
+        for c in clients:
+            c.start()
+        time.sleep(0.5)
+
+    started = time.perf_counter()
+    if model is None:
+        recognizer = SyntheticRecognizer()
+    else:
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(model, RATE)
+    timings = decode_latencies(recognizer, args.chunks, audio)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    for c in clients:
+        c.join()
+    if process is not None:
+        process.terminate()
+        process.wait()
+
+    def pct(q):
+        return timings[min(len(timings) - 1, int(q * len(timings)))] * 1000
+
+    print(f"{mode:<10}{pct(0.5):>10.2f}{pct(0.95):>10.2f}{pct(0.99):>10.2f}{timings[-1] * 1000:>10.2f}"
+          f"{served.value / elapsed:>14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", default="none,dev,threaded,process")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--chunks", type=int, default=300)
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--model", default="model")
+    parser.add_argument("--synthetic", action="store_true", help="Decode with pure-Python work instead of Vosk")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("waitress").setLevel(logging.ERROR)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    model = None
+    if not args.synthetic:
+        try:
+            from vosk import Model, SetLogLevel
+        except ImportError:
+            sys.exit("vosk is required for this benchmark, or pass --synthetic")
+        SetLogLevel(-1)
+        try:
+            model = Model(args.model)
+        except Exception:
+            sys.exit(f"Could not load the Vosk model at {args.model}, or pass --synthetic")
+
+    # Low-level noise, one buffer per chunk
+    rng = random.Random(1)
+    audio = [b"".join(rng.randint(-300, 300).to_bytes(2, "little", signed=True) for _ in range(CHUNK))
+             for _ in range(16)]
+
+    logs, history, stats = fill(os.path.join(tempfile.mkdtemp(), "history.db"), args.entries)
+
+    decoder = "synthetic decoder" if model is None else "Vosk decoder"
+    print(f"{args.chunks} chunks of {CHUNK} frames ({decoder}), {args.clients} client processes\n")
+    print(f"{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'requests/s':>14}")
+    for mode in args.modes.split(","):
+        run_mode(mode, args, model, audio, logs, history, stats)
+
+
+if __name__ == "__main__":
+    main()
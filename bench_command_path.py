@@ -0,0 +1,71 @@
+"""
+Benchmark the command path from transcript to injected input events.
+
+Runs entirely headless: input goes to the recording backend and windows come
+from the in-memory window backend, so it works on Linux without a desktop.
+
+Usage:
+    python bench_command_path.py [--iterations N]
+"""
+import time
+import argparse
+import logging
+from agent.command_parser import CommandParser
+from agent.input_backend import RecordingInputBackend, set_input_backend
+from agent.window_index import WindowIndex, FakeWindowBackend, set_window_index
+
+TRANSCRIPTS = [
+    "volume up",
+    "volume down",
+    "mute game",
+    "next track",
+    "previous track",
+    "open inventory",
+    "take screenshot",
+    "close active window",
+    "stop music",
+    "close discord",
+    "pause spotify",
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_benchmark(iterations):
+    backend = RecordingInputBackend()
+    set_input_backend(backend)
+    set_window_index(WindowIndex(FakeWindowBackend(
+        [(100 + i, f"Window {i}") for i in range(200)] +
+        [(1, "Spotify Premium"), (2, "#general - Discord")]
+    )))
+    parser = CommandParser()
+
+    print(f"{'transcript':<22}{'parse p50':>12}{'total p50':>12}{'total p95':>12}{'events':>8}")
+    for transcript in TRANSCRIPTS:
+        parse_times = []
+        total_times = []
+        events = 0
+        for _ in range(iterations):
+            backend.clear()
+            start = time.perf_counter()
+            handler, _ = parser.parse_command(transcript)
+            parsed = time.perf_counter()
+            parser.execute_command(handler, command_text=transcript)
+            done = time.perf_counter()
+            parse_times.append(parsed - start)
+            total_times.append(done - start)
+            events = len(backend.events)
+        print(f"{transcript:<22}{percentile(parse_times, 0.5) * 1000:>10.3f}ms"
+              f"{percentile(total_times, 0.5) * 1000:>10.3f}ms"
+              f"{percentile(total_times, 0.95) * 1000:>10.3f}ms{events:>8}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--iterations", type=int, default=20)
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    run_benchmark(args.iterations)
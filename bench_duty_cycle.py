@@ -0,0 +1,179 @@
+"""
+Benchmark the CPU saved by duty cycling over a long, mostly silent recording.
+
+The recording is replayed as fast as possible, once decoding every chunk and
+once through the duty cycle (voice detector plus decoding only around
+voice). CPU time is scaled to CPU-seconds per hour of audio. Without --wav a
+recording is synthesized: low background noise with a short burst of
+"speech" every minute. With --model the chunks are decoded by Vosk, which
+also compares the transcripts; otherwise a synthetic decoder costs a fixed
+real-time factor.
+
+Usage:
+    python bench_duty_cycle.py [--wav session.wav] [--model model] [--minutes 20] [--idle-after 30]
+"""
+import json
+import math
+import time
+import wave
+import array
+import random
+import argparse
+from agent.duty_cycle import DutyCycle, DEFAULT_IDLE_AFTER
+
+RATE = 16000
+CHUNK = 4096
+CHUNK_SECONDS = CHUNK / RATE
+
+
+def synthesize(minutes, utterance_every=60.0, utterance_seconds=1.5, seed=1):
+    """
+    Returns:
+        Tuple of (list of PCM chunks, indices of the chunks where an utterance starts)
+    """
+    rng = random.Random(seed)
+    chunks = []
+    onsets = []
+    total = int(minutes * 60 / CHUNK_SECONDS)
+    was_speaking = False
+    for index in range(total):
+        offset = (index * CHUNK_SECONDS + utterance_every / 2) % utterance_every
+        speaking = offset < utterance_seconds
+        if speaking and not was_speaking:
+            onsets.append(index)
+        was_speaking = speaking
+        amplitude = 4000 if speaking else 80
+        samples = array.array("h", (
+            max(-32768, min(32767, int(amplitude * math.sin(0.3 * i) * (0.6 + 0.4 * math.sin(i / 700))
+                                       + rng.gauss(0, 40))))
+            for i in range(CHUNK)))
+        chunks.append(samples.tobytes())
+    return chunks, onsets
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getframerate() != RATE:
+            raise SystemExit(f"{path} must be 16-bit mono at {RATE} Hz")
+        chunks = []
+        while True:
+            data = wav.readframes(CHUNK)
+            if not data:
+                return chunks
+            chunks.append(data)
+
+
+def spin(iterations):
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+
+class SyntheticRecognizer:
+    """
+    Decoder stand-in costing a fixed CPU time per second of audio
+    """
+
+    def __init__(self, rtf):
+        started = time.process_time()
+        spin(1_000_000)
+        self.per_sample = rtf * 1_000_000 / (time.process_time() - started) / RATE
+
+    def AcceptWaveform(self, data):
+        spin(int(self.per_sample * len(data) / 2))
+        return False
+
+    def Result(self):
+        return '{"text": ""}'
+
+    def FinalResult(self):
+        return '{"text": ""}'
+
+
+def replay(chunks, make_recognizer, duty=None, position=None):
+    """
+    Args:
+        duty: Optional DutyCycle deciding which chunks are decoded
+        position: Optional one-element list set to the replay position in seconds,
+                  for the duty cycle's clock
+
+    Returns:
+        Tuple of (CPU seconds, transcript, set of decoded chunk indices)
+    """
+    recognizer = make_recognizer()
+    texts = []
+    decoded = set()
+    held = []
+    started = time.process_time()
+    for index, chunk in enumerate(chunks):
+        data = chunk
+        if duty is not None:
+            position[0] = index * CHUNK_SECONDS
+            held.append(index)
+            data = duty.process(chunk)
+            if data is None:
+                del held[:-duty.pre_roll_chunks]
+                continue
+            # Chunks replayed from the pre-roll come along with this one
+            decoded.update(held[-(len(data) // len(chunk)):])
+            held.clear()
+        else:
+            decoded.add(index)
+        if recognizer.AcceptWaveform(data):
+            texts.append(json.loads(recognizer.Result()).get("text", ""))
+    texts.append(json.loads(recognizer.FinalResult()).get("text", ""))
+    return time.process_time() - started, " ".join(t for t in texts if t), decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU saved by duty cycling on a long recording")
+    parser.add_argument("--wav", help="16-bit mono 16 kHz recording to replay")
+    parser.add_argument("--model", help="Vosk model directory; a synthetic decoder is used without it")
+    parser.add_argument("--minutes", type=float, default=20, help="Length of the synthesized recording")
+    parser.add_argument("--rtf", type=float, default=0.15, help="Real-time factor of the synthetic decoder")
+    parser.add_argument("--idle-after", type=float, default=DEFAULT_IDLE_AFTER, help="Seconds of silence before idling")
+    args = parser.parse_args()
+
+    onsets = None
+    if args.wav:
+        chunks = read_wav(args.wav)
+    else:
+        chunks, onsets = synthesize(args.minutes)
+    hours = len(chunks) * CHUNK_SECONDS / 3600
+
+    if args.model:
+        from vosk import Model, KaldiRecognizer, SetLogLevel
+        SetLogLevel(-1)
+        model = Model(args.model)
+
+        def make_recognizer():
+            return KaldiRecognizer(model, RATE)
+    else:
+        recognizer = SyntheticRecognizer(args.rtf)
+
+        def make_recognizer():
+            return recognizer
+
+    full_cpu, full_text, _ = replay(chunks, make_recognizer)
+    # The duty cycle's clock follows the recording, not the wall clock
+    position = [0.0]
+    duty = DutyCycle(idle_after=args.idle_after, clock=lambda: position[0])
+    duty_cpu, duty_text, decoded = replay(chunks, make_recognizer, duty, position)
+
+    print(f"Recording: {len(chunks) * CHUNK_SECONDS / 60:.1f} minutes, decoder: "
+          f"{'vosk ' + args.model if args.model else f'synthetic RTF {args.rtf}'}")
+    print(f"{'mode':<12}{'CPU s':>9}{'CPU s/hour':>12}{'decoded':>10}")
+    print(f"{'always':<12}{full_cpu:>9.2f}{full_cpu / hours:>12.1f}{len(chunks):>10}")
+    print(f"{'duty cycle':<12}{duty_cpu:>9.2f}{duty_cpu / hours:>12.1f}{duty.decoded_chunks:>10}")
+    print(f"\nSaved {(full_cpu - duty_cpu) / hours:.1f} CPU-seconds per hour "
+          f"({100 * (1 - duty_cpu / full_cpu):.0f}%), {duty.wakeups} wake-ups")
+    if onsets is not None:
+        kept = sum(1 for onset in onsets if onset in decoded)
+        print(f"Utterance onsets decoded: {kept}/{len(onsets)}")
+    if args.model:
+        print(f"Transcripts identical: {full_text == duty_text}")
+
+
+if __name__ == "__main__":
+    main()
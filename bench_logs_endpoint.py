@@ -0,0 +1,72 @@
+"""
+Benchmark the /logs endpoint with a large command history.
+
+Compares serializing the full history (the old behaviour) with cursor polls
+that return only new entries, and with conditional polls answered by 304.
+
+Usage:
+    python bench_logs_endpoint.py [--entries N] [--rounds N]
+"""
+import os
+import time
+import json
+import argparse
+import logging
+import tempfile
+from agent.api import create_app
+from agent.history_store import HistoryStore
+from agent.command_log import CommandLogBuffer, CommandLogRecord
+
+
+def fill(entries):
+    logs = CommandLogBuffer(capacity=entries)
+    for i in range(entries):
+        logs.append(CommandLogRecord("2024-01-01 12:00:00", f"open the inventory please {i}",
+                                     "open_inventory", 1.0, "Inventory opened"))
+    return logs
+
+
+def measure(label, request, rounds):
+    timings = []
+    size = 0
+    status = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        response = request()
+        timings.append(time.perf_counter() - start)
+        size = len(response.get_data())
+        status = response.status_code
+    timings.sort()
+    print(f"{label:<34}{status:>6}{size:>12} B{timings[len(timings) // 2] * 1000:>10.2f} ms")
+
+
+def run_benchmark(entries, rounds):
+    command_logs = fill(entries)
+    history = HistoryStore(os.path.join(tempfile.mkdtemp(), "history.db"))
+    app = create_app(command_logs, history)
+    client = app.test_client()
+    last = command_logs.last_seq
+
+    print(f"{entries} entries in memory\n")
+    print(f"{'request':<34}{'status':>6}{'size':>14}{'median':>13}")
+
+    with app.test_request_context():
+        measure("full history (previous /logs)",
+                lambda: app.response_class(json.dumps(command_logs.to_list()), mimetype="application/json"),
+                rounds)
+
+    measure("GET /logs (newest 100)", lambda: client.get("/logs"), rounds)
+    measure("GET /logs?since=last-10", lambda: client.get(f"/logs?since={last - 10}"), rounds)
+
+    etag = client.get(f"/logs?since={last}").headers["ETag"]
+    measure("GET /logs?since=last (If-None-Match)",
+            lambda: client.get(f"/logs?since={last}", headers={"If-None-Match": etag}), rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    logging.getLogger("game-agent").setLevel(logging.WARNING)
+    run_benchmark(args.entries, args.rounds)
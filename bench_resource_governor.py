@@ -0,0 +1,191 @@
+"""
+Benchmark how much CPU the agent takes from a game running beside it.
+
+A synthetic game (one CPU-bound process per core) runs for a fixed time
+while a synthetic decoder consumes audio in real time: every 256 ms chunk
+costs a fixed amount of CPU work. The game's throughput is compared against
+a run without the decoder, with the decoder at normal priority, and with
+the decoder governed (lowered priority, optionally pinned to cores). The
+decoder's backlog shows whether it still kept up with the audio.
+
+The "server" runs cover the default setup, where the agent is attached to a
+recognition server and decoding happens in the server's session threads:
+"server" governs only the agent's listen thread, as the agent itself does,
+and "server-gov" also governs the session threads (what the server does
+with NO_ALT_TAB_GOVERNOR=1).
+
+Linux only (thread niceness and sched_setaffinity).
+
+Usage:
+    python bench_resource_governor.py [--seconds 10] [--decode-load 0.4] [--nice 19] [--cores 0]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from functools import partial
+from agent.resource_governor import apply_thread_scheduling, parse_cores
+from agent.recognition_server import RecognitionServer, RemoteRecognizer
+
+CHUNK_SECONDS = 4096 / 16000
+
+
+def spin(iterations):
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+
+def calibrate():
+    """
+    Returns:
+        spin() iterations per CPU second
+    """
+    started = time.process_time()
+    spin(2_000_000)
+    return 2_000_000 / (time.process_time() - started)
+
+
+def game(seconds, done):
+    deadline = time.monotonic() + seconds
+    frames = 0
+    while time.monotonic() < deadline:
+        spin(10_000)
+        frames += 1
+    done.put(frames)
+
+
+class SpinRecognizer:
+    """
+    Synthetic recognizer for the server: every chunk costs a fixed amount of CPU work
+    """
+
+    def __init__(self, work):
+        self.work = work
+
+    def AcceptWaveform(self, data):
+        spin(self.work)
+        return False
+
+    def Result(self):
+        return '{"text" : ""}'
+
+    def PartialResult(self):
+        return '{"partial" : ""}'
+
+    def FinalResult(self):
+        return '{"text" : ""}'
+
+    def Reset(self):
+        pass
+
+
+def recognition_server(address, work, nice, cores, ready, stop, result):
+    setup = partial(apply_thread_scheduling, nice, cores) if nice or cores else None
+    server = RecognitionServer(lambda rate, grammar: SpinRecognizer(work), address, session_setup=setup).start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ready.set()
+    stop.wait()
+    result.put(time.process_time())
+    server.close()
+
+
+def decoder(seconds, work, nice, cores, result, address=None):
+    apply_thread_scheduling(nice, cores)
+    recognizer = RemoteRecognizer(16000, address) if address else None
+    chunk = b"\0" * 8192
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    chunks = 0
+    # Audio arrives in real time; decode each chunk once it has arrived
+    while time.monotonic() - started < seconds:
+        arrival = started + chunks * CHUNK_SECONDS
+        delay = arrival - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if recognizer is not None:
+            recognizer.AcceptWaveform(chunk)
+        else:
+            spin(work)
+        chunks += 1
+    audio_seconds = chunks * CHUNK_SECONDS
+    backlog = max(0.0, (time.monotonic() - started) - audio_seconds)
+    if recognizer is not None:
+        recognizer.close()
+    result.put((time.process_time() - cpu_started, backlog))
+
+
+def run(args, mode, work, tmp):
+    done = multiprocessing.Queue()
+    games = [multiprocessing.Process(target=game, args=(args.seconds, done)) for _ in range(args.game_processes)]
+    agent = server = None
+    result = multiprocessing.Queue()
+    server_result = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    nice, cores = args.nice, parse_cores(args.cores)
+    if mode != "none":
+        address = None
+        if mode.startswith("server"):
+            # Decoding happens in the server; the agent only streams audio to it
+            address = os.path.join(tmp, f"{mode}.sock")
+            ready = multiprocessing.Event()
+            governed = mode == "server-gov"
+            server = multiprocessing.Process(target=recognition_server, args=(
+                address, work, nice if governed else 0, cores if governed else None, ready, stop, server_result))
+            server.start()
+            ready.wait(10)
+        governed = mode in ("governed", "server", "server-gov")
+        agent = multiprocessing.Process(target=decoder, args=(
+            args.seconds, work, nice if governed else 0, cores if governed else None, result, address))
+        agent.start()
+    for g in games:
+        g.start()
+    frames = sum(done.get() for _ in games)
+    for g in games:
+        g.join()
+    cpu = backlog = None
+    if agent is not None:
+        cpu, backlog = result.get()
+        agent.join()
+    if server is not None:
+        stop.set()
+        cpu += server_result.get()
+        server.join()
+    return frames, cpu, backlog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU the agent takes from a CPU-bound foreground workload")
+    parser.add_argument("--seconds", type=float, default=10, help="Length of each run")
+    parser.add_argument("--decode-load", type=float, default=0.4,
+                        help="Decoder CPU per second of audio when running alone (real-time factor)")
+    parser.add_argument("--game-processes", type=int, default=os.cpu_count(), help="Synthetic game processes")
+    parser.add_argument("--nice", type=int, default=19, help="Niceness added to the governed decoder")
+    parser.add_argument("--cores", default=None, help="Cores the governed decoder is pinned to, e.g. 0 or 2-3")
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        sys.exit("This benchmark needs Linux")
+
+    work = int(calibrate() * args.decode_load * CHUNK_SECONDS)
+    print(f"{args.game_processes} game processes, decoder at RTF {args.decode_load}, {args.seconds:.0f}s per run\n")
+    print(f"{'decoder':<10}{'game frames':>13}{'game loss':>11}{'decoder CPU s':>15}{'backlog s':>11}")
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("none", "default", "governed", "server", "server-gov"):
+            frames, cpu, backlog = run(args, mode, work, tmp)
+            if baseline is None:
+                baseline = frames
+            loss = 100 * (baseline - frames) / baseline
+            cpu_text = f"{cpu:.2f}" if cpu is not None else "-"
+            backlog_text = f"{backlog:.2f}" if backlog is not None else "-"
+            print(f"{mode:<10}{frames:>13}{loss:>10.1f}%{cpu_text:>15}{backlog_text:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark wake phrase gating against always-on decoding on recorded audio.
+
+The corpus is a directory of 16-bit mono WAV files with .txt transcripts,
+as for agent/model_benchmark.py. Utterances whose transcript starts with the
+wake phrase are meant for the agent; all others (game audio, teammates) are
+background. Each utterance is run through:
+
+- always-on: full decoding of every chunk, dispatching whatever parses as a command
+- wake phrase: keyword spotting on every chunk, full decoding only inside the window
+
+and the script reports CPU per hour of audio, false activations (commands
+dispatched for background audio) and missed commands.
+
+Usage:
+    python bench_wake_word.py --model model --corpus recordings/ [--phrase "hey agent"]
+"""
+import json
+import time
+import wave
+import argparse
+from agent.command_parser import CommandParser
+from agent.model_benchmark import load_corpus
+from agent.wake_word import WakeWordGate, GATE_CLOSED, GATE_OPENED, DEFAULT_WINDOW
+
+CHUNK = 4096
+
+
+def read_chunks(path):
+    with wave.open(path, "rb") as wav:
+        rate = wav.getframerate()
+        chunks = []
+        while True:
+            data = wav.readframes(CHUNK)
+            if not data:
+                return rate, chunks
+            chunks.append(data)
+
+
+def transcripts(recognizer):
+    final = json.loads(recognizer.FinalResult()).get("text", "")
+    return [final] if final else []
+
+
+def run_always_on(chunks, make_recognizer):
+    recognizer = make_recognizer(None)
+    texts = []
+    for data in chunks:
+        if recognizer.AcceptWaveform(data):
+            texts.append(json.loads(recognizer.Result()).get("text", ""))
+    return [t for t in texts + transcripts(recognizer) if t]
+
+
+def run_gated(chunks, make_recognizer, gate):
+    recognizer = make_recognizer(None)
+    gate.set_spotter(make_recognizer(gate.grammar))
+    gate.close()
+    texts = []
+    for data in chunks:
+        state = gate.accept(data)
+        if state == GATE_CLOSED:
+            continue
+        if state == GATE_OPENED:
+            recognizer.Reset()
+        if recognizer.AcceptWaveform(data):
+            texts.append(gate.strip(json.loads(recognizer.Result()).get("text", "")))
+    if gate.is_open:
+        texts += [gate.strip(t) for t in transcripts(recognizer)]
+    return [t for t in texts if t]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wake phrase gating versus always-on decoding")
+    parser.add_argument("--model", required=True, help="Vosk model directory")
+    parser.add_argument("--corpus", required=True, help="Directory of .wav files with matching .txt transcripts")
+    parser.add_argument("--phrase", default="hey agent", help="Wake phrase")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW, help="Seconds of full decoding after it")
+    args = parser.parse_args()
+
+    from vosk import Model, KaldiRecognizer, SetLogLevel
+    SetLogLevel(-1)
+    model = Model(args.model)
+    command_parser = CommandParser()
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit(f"No .wav files with .txt transcripts in {args.corpus}")
+
+    # The gate's clock follows the audio position, like the live loop's wall clock
+    position = [0.0]
+    gate = WakeWordGate(args.phrase, args.window, clock=lambda: position[0])
+    results = {"always-on": [0.0, 0, 0], "wake phrase": [0.0, 0, 0]}  # CPU s, false activations, misses
+    audio_seconds = 0.0
+    intended = 0
+
+    for wav_path, reference in corpus:
+        rate, chunks = read_chunks(wav_path)
+        audio_seconds += len(chunks) * CHUNK / rate
+        meant = reference.startswith(gate.phrase)
+        expected = command_parser.parse_command(gate.strip(reference))[0] if meant else None
+        intended += meant
+
+        def make_recognizer(grammar):
+            if grammar is None:
+                return KaldiRecognizer(model, rate)
+            return KaldiRecognizer(model, rate, json.dumps(grammar))
+
+        def timed_chunks():
+            for index, data in enumerate(chunks):
+                position[0] = index * CHUNK / rate
+                yield data
+
+        for mode, run in (("always-on", lambda: run_always_on(chunks, make_recognizer)),
+                          ("wake phrase", lambda: run_gated(timed_chunks(), make_recognizer, gate))):
+            started = time.process_time()
+            texts = run()
+            results[mode][0] += time.process_time() - started
+            handlers = [command_parser.parse_command(t)[0] for t in texts]
+            handlers = [h for h in handlers if h]
+            if not meant and handlers:
+                results[mode][1] += 1
+            if meant and expected not in handlers:
+                results[mode][2] += 1
+
+    background = len(corpus) - intended
+    hours = audio_seconds / 3600
+    print(f"{len(corpus)} utterances ({intended} with the wake phrase), {audio_seconds / 60:.1f} minutes of audio\n")
+    print(f"{'mode':<13}{'CPU s/hour':>12}{'false activations':>20}{'missed commands':>18}")
+    for mode, (cpu, false_activations, misses) in results.items():
+        false_rate = f"{false_activations}/{background}" if background else "-"
+        missed = f"{misses}/{intended}" if intended else "-"
+        print(f"{mode:<13}{cpu / hours:>12.1f}{false_rate:>20}{missed:>18}")
+
+
+if __name__ == "__main__":
+    main()
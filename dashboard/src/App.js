@@ -1,24 +1,37 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 import LogViewer from './components/LogViewer';
 import Header from './components/Header';
 
+// Number of log entries kept on screen
+const MAX_LOGS = 500;
+
 function App() {
   const [logs, setLogs] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const cursor = useRef(null);
 
   useEffect(() => {
     const fetchLogs = async () => {
       try {
-        setLoading(true);
+        // Only ask for entries newer than the last one we have; the browser
+        // revalidates with the ETag so an unchanged page costs a 304
+        const query = cursor.current === null
+          ? `limit=${MAX_LOGS}`
+          : `since=${cursor.current}&limit=${MAX_LOGS}`;
         // In production, replace with your actual API endpoint
-        const response = await fetch('http://localhost:5000/logs');
+        const response = await fetch(`http://localhost:5000/logs?${query}`, { cache: 'no-cache' });
         if (!response.ok) {
           throw new Error(`HTTP error! Status: ${response.status}`);
         }
         const data = await response.json();
-        setLogs(data);
+        const seen = cursor.current === null ? 0 : cursor.current;
+        const fresh = data.entries.filter((entry) => entry.seq > seen);
+        if (fresh.length > 0) {
+          setLogs((previous) => previous.concat(fresh).slice(-MAX_LOGS));
+        }
+        cursor.current = data.next_cursor;
         setError(null);
       } catch (err) {
         setError('Failed to fetch logs. Make sure the Game Agent is running.');
@@ -29,10 +42,33 @@ function App() {
     };
 
     fetchLogs();
-    // Poll for new logs every 5 seconds
-    const interval = setInterval(fetchLogs, 5000);
+
+    // New entries are pushed over Server-Sent Events; polling only runs while
+    // the stream is disconnected
+    const source = new EventSource('http://localhost:5000/stream');
+    source.addEventListener('command', (event) => {
+      const entry = JSON.parse(event.data);
+      if (cursor.current !== null && entry.seq <= cursor.current) {
+        return;
+      }
+      cursor.current = entry.seq;
+      setLogs((previous) => previous.concat([entry]).slice(-MAX_LOGS));
+      setError(null);
+    });
+    // Events were dropped because this tab fell behind; catch up from the cursor
+    source.addEventListener('dropped', fetchLogs);
+
+    // Poll for new logs every 5 seconds when the stream is down
+    const interval = setInterval(() => {
+      if (source.readyState !== EventSource.OPEN) {
+        fetchLogs();
+      }
+    }, 5000);
     
-    return () => clearInterval(interval);
+    return () => {
+      clearInterval(interval);
+      source.close();
+    };
   }, []);
 
   return (
@@ -14,12 +14,17 @@ function LogViewer({ logs }) {
           </tr>
         </thead>
         <tbody>
-          {logs.map((log, index) => (
-            <tr key={index}>
+          {logs.map((log) => (
+            <tr key={log.seq}>
               <td>{log.timestamp}</td>
               <td>{log.command}</td>
               <td>{log.transcript}</td>
-              <td>{log.result}</td>
+              <td>
+                {log.result}
+                {log.audio && (
+                  <audio controls preload="none" src={`http://localhost:5000/audio/${log.audio}`} />
+                )}
+              </td>
             </tr>
           ))}
         </tbody>
@@ -3,16 +3,17 @@ Run the No Alt Tab voice assistant as a background process with system tray icon
 """
 import os
 import sys
-import time
 import logging
 import threading
 import subprocess
-import signal
 import webbrowser
 from pathlib import Path
 import pystray
 from PIL import Image, ImageDraw
 import importlib.util
+from agent.readiness import wait_for
+from agent.recognition_server import ping
+from agent.supervisor import Supervisor
 
 # Check if required packages are installed
 required_packages = ['pystray', 'pillow']
@@ -44,8 +45,16 @@ logging.basicConfig(
 
 logger = logging.getLogger('no-alt-tab-background')
 
+# Seconds to wait for the agent's API after starting it
+AGENT_START_TIMEOUT = 15
+
+# Seconds to wait for the recognition server to load the model
+RECOGNITION_SERVER_START_TIMEOUT = 60
+
 # Global variables
-agent_process = None
+agent_supervisor = None
+tray_icon = None
+recognition_server_process = None
 dashboard_url = "http://localhost:5000"
 is_running = False
 
@@ -67,42 +76,79 @@ def create_icon():
     
     return image
 
-def start_agent():
-    """Start the No Alt Tab agent process"""
-    global agent_process, is_running
+def start_recognition_server():
+    """
+    Start the recognition server once, so agent restarts don't reload the model
+    """
+    global recognition_server_process
     
-    if is_running:
-        logger.info("Agent is already running")
+    if ping() is not None:
+        logger.info("Recognition server is already running")
         return
     
     try:
-        logger.info("Starting No Alt Tab agent...")
-        
-        # Get the directory of the current script
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # Start the agent as a subprocess
-        agent_process = subprocess.Popen(
-            [sys.executable, "-m", "agent.main"],
+        recognition_server_process = subprocess.Popen(
+            [sys.executable, "-m", "agent.recognition_server"],
             cwd=script_dir,
-            # Redirect output to log files
-            stdout=open(os.path.join(log_dir, 'agent_stdout.log'), 'a'),
-            stderr=open(os.path.join(log_dir, 'agent_stderr.log'), 'a'),
-            # Don't create a console window
+            stdout=open(os.path.join(log_dir, 'recognition_server.log'), 'a'),
+            stderr=subprocess.STDOUT,
             creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
         )
-        
-        is_running = True
-        logger.info("No Alt Tab agent started with PID: %s", agent_process.pid)
-        
-        # Wait a moment for the server to start
-        time.sleep(2)
+        # The agent loads the model itself if it starts before the server is up
+        ready = wait_for(
+            ping,
+            timeout=RECOGNITION_SERVER_START_TIMEOUT,
+            abort=lambda: recognition_server_process.poll() is not None
+        )
+        if ready:
+            logger.info("Recognition server ready after %.2fs", ready.elapsed)
+        else:
+            logger.warning("Recognition server is not available; the agent will load the model itself")
     except Exception as e:
-        logger.error("Failed to start agent: %s", e)
+        logger.error("Failed to start recognition server: %s", e)
+
+def stop_recognition_server():
+    """Stop the recognition server if this process started it"""
+    global recognition_server_process
+    
+    if recognition_server_process is not None and recognition_server_process.poll() is None:
+        recognition_server_process.terminate()
+        try:
+            recognition_server_process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            recognition_server_process.kill()
+    recognition_server_process = None
+
+def start_agent():
+    """Start the No Alt Tab agent under the supervisor, which restarts it on crashes and hangs"""
+    global agent_supervisor, is_running
+    
+    if is_running:
+        logger.info("Agent is already running")
+        return
+    
+    logger.info("Starting No Alt Tab agent...")
+    env = None
+    if os.getenv("NO_ALT_TAB_API_MODE") == "process":
+        # The API process can't report the listen loop's heartbeat, so hangs would go unnoticed
+        logger.warning("NO_ALT_TAB_API_MODE=process is not supported under the supervisor, using threaded")
+        env = dict(os.environ, NO_ALT_TAB_API_MODE="threaded")
+    agent_supervisor = Supervisor(
+        [sys.executable, "-m", "agent.main"],
+        f"{dashboard_url}/health",
+        env=env,
+        # Run from the directory of this script
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        log_dir=log_dir,
+        start_timeout=AGENT_START_TIMEOUT,
+        on_change=lambda status: refresh_tray()
+    ).start()
+    is_running = True
 
 def stop_agent():
     """Stop the No Alt Tab agent process"""
-    global agent_process, is_running
+    global agent_supervisor, is_running
     
     if not is_running:
         logger.info("Agent is not running")
@@ -110,29 +156,39 @@ def stop_agent():
     
     try:
         logger.info("Stopping No Alt Tab agent...")
-        
-        if agent_process:
-            # Try to terminate gracefully first
-            if sys.platform == 'win32':
-                agent_process.terminate()
-            else:
-                os.kill(agent_process.pid, signal.SIGTERM)
-            
-            # Wait for process to terminate
-            try:
-                agent_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                # Force kill if it doesn't terminate
-                if sys.platform == 'win32':
-                    agent_process.kill()
-                else:
-                    os.kill(agent_process.pid, signal.SIGKILL)
-            
-            agent_process = None
-            is_running = False
-            logger.info("No Alt Tab agent stopped")
+        agent_supervisor.stop()
+        logger.info("No Alt Tab agent stopped")
     except Exception as e:
         logger.error("Failed to stop agent: %s", e)
+    finally:
+        agent_supervisor = None
+        is_running = False
+        refresh_tray()
+
+def status_text(item=None):
+    """Tray status line: supervisor state, restarts and the agent's CPU and memory"""
+    if agent_supervisor is None:
+        return "Status: Stopped"
+    status = agent_supervisor.status()
+    text = f"Status: {status['state'].replace('_', ' ').capitalize()}"
+    if status["phase"] and status["state"] == "running":
+        text += f" ({status['phase'].replace('_', ' ')})"
+    details = []
+    if status["restarts"]:
+        details.append(f"{status['restarts']} restarts")
+    if status["cpu_percent"] is not None:
+        details.append(f"CPU {status['cpu_percent']:.0f}%")
+    if status["rss_bytes"] is not None:
+        details.append(f"{status['rss_bytes'] / 1024 / 1024:.0f} MB")
+    return text + (f" - {', '.join(details)}" if details else "")
+
+def refresh_tray():
+    """Re-render the tray menu so the status line is current"""
+    if tray_icon is not None:
+        try:
+            tray_icon.update_menu()
+        except Exception as e:
+            logger.debug("Could not refresh tray menu: %s", e)
 
 def open_dashboard():
     """Open the web dashboard in the default browser"""
@@ -145,6 +201,7 @@ def open_dashboard():
 def on_exit(icon):
     """Handle exit from system tray"""
     stop_agent()
+    stop_recognition_server()
     icon.stop()
 
 def setup_autostart():
@@ -221,13 +278,15 @@ def check_autostart():
 
 def run_tray_app():
     """Run the system tray application"""
+    global tray_icon
+    
     # Create the system tray icon
-    icon = pystray.Icon(
+    icon = tray_icon = pystray.Icon(
         "no-alt-tab",
         create_icon(),
         "No Alt Tab Voice Assistant",
         menu=pystray.Menu(
-            pystray.MenuItem("Status: Running" if is_running else "Status: Stopped", lambda: None, enabled=False),
+            pystray.MenuItem(status_text, lambda: None, enabled=False),
             pystray.MenuItem("Start Assistant", start_agent, enabled=lambda item: not is_running),
             pystray.MenuItem("Stop Assistant", stop_agent, enabled=lambda item: is_running),
             pystray.MenuItem("Open Dashboard", open_dashboard),
@@ -243,6 +302,7 @@ def run_tray_app():
     )
     
     # Start the agent automatically when the tray app starts
+    start_recognition_server()
     start_agent()
     
     # Run the system tray icon
@@ -0,0 +1,170 @@
+"""
+Test script for the REST API app factory and the gzip middleware
+"""
+import os
+import gzip
+import time
+import socket
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from werkzeug.test import Client
+from agent.api import create_app, create_server, GzipMiddleware, STREAM_MAX_SUBSCRIBERS, SERVER_THREADS
+from agent.event_stream import EventBroadcaster
+from agent.history_store import HistoryStore
+from agent.command_log import CommandLogBuffer, CommandLogRecord
+from agent.audio_capture import AudioArchive
+
+
+def make_history(tmp, count):
+    history = HistoryStore(os.path.join(tmp, "history.db"), flush_interval=0.01)
+    logs = CommandLogBuffer(capacity=10)
+    for i in range(count):
+        record = logs.append(CommandLogRecord("2024-01-01 12:00:00", f"volume up {i}", "volume_up", 1.0, "ok", "ok"))
+        history.add(record)
+    history.close()
+    return logs
+
+
+def test_history_only_app():
+    """
+    Without an in-memory ring, as in the separate API process, /logs pages through SQLite
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        make_history(tmp, 30)
+        client = create_app(None, HistoryStore(os.path.join(tmp, "history.db"), writer=False)).test_client()
+
+        latest = client.get("/logs?limit=5").get_json()
+        assert [e["seq"] for e in latest["entries"]] == [26, 27, 28, 29, 30]
+        assert latest["has_more"] is False
+
+        page = client.get("/logs?since=3&limit=4")
+        assert [e["seq"] for e in page.get_json()["entries"]] == [4, 5, 6, 7]
+        assert client.get("/logs?since=3&limit=4", headers={"If-None-Match": page.headers["ETag"]}).status_code == 304
+
+        # Endpoints without a data source are not served
+        assert client.get("/stats").status_code == 404
+        assert client.get("/health").get_json()["status"] == "healthy"
+
+
+def test_gzip_middleware():
+    """
+    Large responses are compressed for clients that accept gzip, small ones are not
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = make_history(tmp, 10)
+        app = create_app(logs, HistoryStore(os.path.join(tmp, "history.db"), writer=False))
+        client = Client(GzipMiddleware(app, min_size=200))
+
+        response = client.get("/logs", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert b'"volume up 9"' in gzip.decompress(response.get_data())
+
+        assert "Content-Encoding" not in client.get("/logs").headers
+        assert "Content-Encoding" not in client.get("/health", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_audio_only_for_local_clients():
+    """
+    Captured recordings are served to clients on this machine and refused to the network
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        make_history(tmp, 1)
+        archive = AudioArchive(os.path.join(tmp, "audio"))
+        name = archive.save_async([b"\0\0" * 4096])
+        archive.flush()
+        client = create_app(None, HistoryStore(os.path.join(tmp, "history.db"), writer=False),
+                            audio_archive=archive).test_client()
+
+        assert client.get(f"/audio/{name}").data[:4] == b"RIFF"
+        assert client.get(f"/audio/{name}", environ_base={"REMOTE_ADDR": "::1"}).status_code == 200
+        remote = client.get(f"/audio/{name}", environ_base={"REMOTE_ADDR": "192.168.1.20"})
+        assert remote.status_code == 403
+
+
+def test_stream_subscriber_limit():
+    """
+    Subscribers beyond the limit are refused with 503 and closed tabs free their slot
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        events = EventBroadcaster(max_subscribers=STREAM_MAX_SUBSCRIBERS)
+        client = create_app(None, HistoryStore(os.path.join(tmp, "history.db"), writer=False), events).test_client()
+
+        # Dashboard tabs already streaming
+        tabs = [events.subscribe() for _ in range(STREAM_MAX_SUBSCRIBERS)]
+        assert client.get("/stream").status_code == 503
+        assert client.get("/health").status_code == 200
+
+        # A closed tab frees its slot
+        events.unsubscribe(tabs.pop())
+        response = client.get("/stream", buffered=False)
+        assert response.status_code == 200 and next(response.response).startswith(b"retry:")
+        response.close()
+        assert events.subscriber_count == STREAM_MAX_SUBSCRIBERS - 1
+
+
+def read_until(stream, marker):
+    data = b""
+    while marker not in data:
+        line = stream.readline()
+        assert line, f"stream ended before {marker!r}"
+        data += line
+    return data
+
+
+def test_many_stream_clients_over_http(clients=24):
+    """
+    Many real /stream clients each keep a server thread, yet /health keeps answering quickly
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        events = EventBroadcaster(max_subscribers=clients)
+        app = create_app(None, HistoryStore(os.path.join(tmp, "history.db"), writer=False), events)
+        server = create_server(app, "127.0.0.1", 0, stream_clients=clients)
+        assert server.adj.threads == SERVER_THREADS + clients
+        base = f"http://127.0.0.1:{server.effective_port}"
+        server_thread = threading.Thread(target=server.run, name="api-test-server", daemon=True)
+        server_thread.start()
+
+        sockets = []
+        try:
+            for _ in range(clients):
+                sock = socket.create_connection(("127.0.0.1", server.effective_port), timeout=5)
+                sock.sendall(b"GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                sockets.append((sock, sock.makefile("rb")))
+            for _, stream in sockets:
+                assert b"text/event-stream" in read_until(stream, b"retry: 3000")
+            assert events.subscriber_count == clients
+
+            for _ in range(20):
+                started = time.perf_counter()
+                with urllib.request.urlopen(base + "/health", timeout=2) as response:
+                    assert response.status == 200
+                assert time.perf_counter() - started < 0.5
+
+            try:
+                urllib.request.urlopen(base + "/stream", timeout=2)
+                assert False, "expected 503 past the subscriber limit"
+            except urllib.error.HTTPError as e:
+                assert e.code == 503
+
+            # Every client gets the event
+            events.publish("command", {"text": "volume up"}, event_id=1)
+            for _, stream in sockets:
+                read_until(stream, b"volume up")
+        finally:
+            for sock, stream in sockets:
+                stream.close()
+                sock.close()
+            # Close the sockets from the server's own loop, which then returns
+            server.trigger.pull_trigger(lambda: server.asyncore.close_all(server._map))
+            server_thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    test_history_only_app()
+    test_stream_subscriber_limit()
+    test_many_stream_clients_over_http()
+    test_gzip_middleware()
+    test_audio_only_for_local_clients()
+    print("API tests passed")
@@ -0,0 +1,81 @@
+"""
+Test script for capturing rejected utterance audio under a size quota
+"""
+import os
+import gzip
+import wave
+import io
+import time
+import tempfile
+from agent.audio_capture import AudioArchive, UtteranceRecorder
+
+
+def chunk(value, frames=4096):
+    return value.to_bytes(2, "little", signed=True) * frames
+
+
+def test_recorder_pre_roll():
+    """
+    Each utterance starts with the last chunks of the previous one
+    """
+    recorder = UtteranceRecorder(pre_roll_chunks=1, max_chunks=3)
+    for value in range(5):
+        recorder.add(chunk(value, 1))
+    assert recorder.finish() == [chunk(2, 1), chunk(3, 1), chunk(4, 1)]
+    recorder.add(chunk(9, 1))
+    assert recorder.finish() == [chunk(4, 1), chunk(9, 1)]
+
+
+def test_archive_quota_and_lru():
+    """
+    Files are readable WAV and the least recently used ones are evicted first
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = AudioArchive(tmp, quota_bytes=10**9)
+        first = archive.save_async([chunk(v) for v in range(8)])
+        archive.flush()
+        size = archive.total_bytes
+
+        with wave.open(io.BytesIO(gzip.decompress(archive.open(first)))) as wav:
+            assert (wav.getframerate(), wav.getnframes()) == (16000, 8 * 4096)
+
+        # Room for three files; reading the first keeps it over the second
+        archive.quota_bytes = size * 3
+        second = archive.save_async([chunk(v) for v in range(8)])
+        archive.flush()
+        archive.open(first)
+        names = [archive.save_async([chunk(v) for v in range(8)]) for _ in range(2)]
+        archive.flush()
+
+        assert archive.names() == [first] + names
+        assert sorted(os.listdir(tmp)) == sorted([first] + names)
+        assert archive.open(second) is None
+        assert archive.open("../" + first) is None
+
+
+def test_save_does_not_block(count=100):
+    """
+    Queueing an utterance costs microseconds; encoding happens on the writer thread
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = AudioArchive(tmp, quota_bytes=2 * 1024 * 1024)
+        chunks = [chunk(v % 50) for v in range(20)]
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            archive.save_async(chunks)
+            timings.append(time.perf_counter() - start)
+            time.sleep(0.005)
+        archive.flush()
+        timings.sort()
+        assert archive.total_bytes <= archive.quota_bytes
+        assert archive.dropped == 0
+        print(f"save_async median {timings[len(timings) // 2] * 1e6:.1f} us, "
+              f"{archive.dropped} dropped, {len(archive.names())} files kept")
+
+
+if __name__ == "__main__":
+    test_recorder_pre_roll()
+    test_archive_quota_and_lru()
+    test_save_does_not_block()
+    print("Audio capture tests passed")
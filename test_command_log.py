@@ -0,0 +1,63 @@
+"""
+Test script for the command log ring buffer, including a memory soak test
+"""
+import os
+from agent.command_log import CommandLogBuffer, CommandLogRecord
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def make_record(i):
+    return CommandLogRecord("2024-01-01 00:00:00", f"please open the inventory number {i}",
+                            "open_inventory", 1.0, "Inventory opened")
+
+
+def test_ring_buffer():
+    """
+    The buffer keeps the newest records and spills the evicted ones in order
+    """
+    spilled = []
+    logs = CommandLogBuffer(capacity=3, spill=spilled.append, start_seq=11)
+    for i in range(1, 6):
+        logs.append(make_record(i))
+
+    assert len(logs) == 3
+    assert (logs.first_seq, logs.last_seq) == (13, 15)
+    assert [r["seq"] for r in logs.to_list()] == [13, 14, 15]
+    assert [r.seq for r in spilled] == [11, 12]
+    assert [r.seq for r in logs.since(13, 10)] == [14, 15]
+    assert [r.seq for r in logs.since(0, 2)] == [13, 14]
+    assert [r.seq for r in logs.latest(2)] == [14, 15]
+
+
+def test_soak_flat_memory(total=200000):
+    """
+    Memory stays flat while many more records than the capacity pass through
+    """
+    logs = CommandLogBuffer(capacity=1000)
+
+    for i in range(total // 4):
+        logs.append(make_record(i))
+    rss_warm = current_rss_bytes()
+    for i in range(total // 4, total):
+        logs.append(make_record(i))
+    rss_end = current_rss_bytes()
+
+    assert len(logs) == 1000
+    if rss_warm is not None:
+        growth = rss_end - rss_warm
+        print(f"RSS after warm-up {rss_warm / 1e6:.1f} MB, after {total} records {rss_end / 1e6:.1f} MB")
+        assert growth < 5 * 1024 * 1024
+
+
+if __name__ == "__main__":
+    test_ring_buffer()
+    test_soak_flat_memory(total=1000000)
+    print("Command log tests passed")
@@ -0,0 +1,69 @@
+"""
+Test script for adaptive duty cycling of decoding
+"""
+import math
+import array
+from agent.duty_cycle import DutyCycle, EnergyVAD, rms, STATE_ACTIVE, STATE_IDLE
+
+CHUNK = 4096
+
+
+def tone(amplitude, tag=0):
+    # The first sample carries a tag so chunks can be told apart after replay
+    samples = array.array("h", (int(amplitude * math.sin(i / 5)) for i in range(CHUNK)))
+    samples[0] = tag
+    return samples.tobytes()
+
+
+def test_energy_vad():
+    """
+    Loud chunks are voice, quiet ones only move the noise floor
+    """
+    assert rms(b"") == 0.0
+    assert abs(rms(tone(1000)) - 1000 / math.sqrt(2)) < 20
+
+    vad = EnergyVAD()
+    assert not vad.is_speech(tone(50))
+    assert not vad.is_speech(tone(60))
+    assert vad.is_speech(tone(5000))
+    # Steady loud noise raises the floor until it no longer counts as voice
+    vad = EnergyVAD(min_rms=0, adaptation=0.5)
+    vad.is_speech(tone(100))
+    assert vad.is_speech(tone(1000))
+    for _ in range(20):
+        vad.is_speech(tone(250))
+    assert not vad.is_speech(tone(400))
+
+
+def test_idle_and_wake_with_pre_roll():
+    """
+    Silence pauses decoding; voice resumes it and replays the pre-roll
+    """
+    clock = [0.0]
+    duty = DutyCycle(idle_after=1.0, pre_roll_chunks=2, clock=lambda: clock[0])
+
+    decoded = []
+    for tag in range(8):
+        clock[0] += 0.25
+        decoded.append(duty.process(tone(50, tag)))
+    # Active for the first second of silence, then idle
+    assert all(d is not None for d in decoded[:3]) and all(d is None for d in decoded[4:])
+    assert duty.state == STATE_IDLE
+
+    clock[0] += 0.25
+    replay = duty.process(tone(8000, 99))
+    assert duty.state == STATE_ACTIVE and duty.wakeups == 1
+    tags = array.array("h", replay)[::CHUNK]
+    assert list(tags) == [6, 7, 99]
+
+    # Voice keeps it active; nothing was double counted
+    clock[0] += 0.25
+    assert duty.process(tone(50, 100)) is not None
+    assert duty.decoded_chunks + duty.skipped_chunks == 10
+    assert duty.skipped_chunks == 3
+
+
+if __name__ == "__main__":
+    test_energy_vad()
+    test_idle_and_wake_with_pre_roll()
+    print("Duty cycle tests passed")
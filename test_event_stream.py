@@ -0,0 +1,63 @@
+"""
+Load test for the live event stream with many concurrent subscribers
+"""
+import time
+import threading
+from agent.event_stream import EventBroadcaster, format_sse
+
+
+def test_format_sse():
+    assert format_sse("command", {"seq": 1}, 1) == 'id: 1\nevent: command\ndata: {"seq": 1}\n\n'
+
+
+def test_many_subscribers(subscribers=200, events=2000):
+    """
+    Fast subscribers get every event, a stalled one is bounded, and the
+    publisher never waits on either
+    """
+    broadcaster = EventBroadcaster(max_subscribers=subscribers + 1)
+    received = [0] * subscribers
+    done = threading.Event()
+
+    def consume(index, subscription):
+        while not done.is_set() or subscription._events:
+            if subscription.get(timeout=0.05) is not None:
+                received[index] += 1
+
+    consumers = []
+    for i in range(subscribers):
+        subscription = broadcaster.subscribe(maxsize=events)
+        thread = threading.Thread(target=consume, args=(i, subscription), daemon=True)
+        thread.start()
+        consumers.append(thread)
+
+    # A dashboard tab that never reads
+    stalled = broadcaster.subscribe(maxsize=16)
+
+    publish_times = []
+    for i in range(events):
+        start = time.perf_counter()
+        broadcaster.publish("command", {"seq": i}, event_id=i)
+        publish_times.append(time.perf_counter() - start)
+        # Partial transcripts only go to subscribers that asked for them
+        broadcaster.publish("partial", {"text": "open ch"})
+
+    done.set()
+    for thread in consumers:
+        thread.join(timeout=10)
+
+    publish_times.sort()
+    p99 = publish_times[int(len(publish_times) * 0.99)]
+    print(f"{subscribers} subscribers: publish p50 {publish_times[len(publish_times) // 2] * 1e6:.0f} us, "
+          f"p99 {p99 * 1e6:.0f} us; stalled subscriber dropped {stalled.dropped}")
+
+    assert received == [events] * subscribers
+    assert len(stalled._events) == 16
+    assert stalled.dropped == events - 16
+    assert broadcaster.subscribe() is None  # subscriber limit reached
+
+
+if __name__ == "__main__":
+    test_format_sse()
+    test_many_subscribers(subscribers=500, events=5000)
+    print("Event stream tests passed")
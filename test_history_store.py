@@ -0,0 +1,53 @@
+"""
+Test script for the SQLite command history store
+"""
+import os
+import time
+import tempfile
+from agent.command_log import CommandLogRecord, CommandLogBuffer
+from agent.history_store import HistoryStore
+
+
+def test_history_store():
+    """
+    Records are written in the background and can be queried by time, handler and status
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        store = HistoryStore(path, batch_size=50, flush_interval=0.05)
+        logs = CommandLogBuffer(capacity=10, start_seq=store.last_seq() + 1)
+
+        start = time.perf_counter()
+        for i in range(120):
+            handler = "volume_up" if i % 3 else "open_application"
+            status = "error" if i % 10 == 0 else "ok"
+            record = CommandLogRecord(f"2024-01-01 12:{i // 60:02d}:{i % 60:02d}", f"command {i}",
+                                      handler, 1.0, "done", status)
+            logs.append(record)
+            store.add(record)
+        enqueue_time = time.perf_counter() - start
+        store.close()
+
+        print(f"Queued 120 records in {enqueue_time * 1000:.2f} ms")
+        assert store.written == 120
+
+        store = HistoryStore(path)
+        assert store.last_seq() == 120
+        assert len(store.query(limit=1000)) == 120
+        assert [r["seq"] for r in store.query(since=115)] == [116, 117, 118, 119, 120]
+        assert len(store.query(handler="open_application", limit=1000)) == 40
+        assert len(store.query(status="error", limit=1000)) == 12
+        # Without a cursor a filtered query returns the newest matches, oldest first
+        assert [r["seq"] for r in store.query(handler="open_application", limit=3)] == [112, 115, 118]
+        assert [r["seq"] for r in store.query(handler="open_application", since=100, limit=2)] == [103, 106]
+        in_range = store.query(start="2024-01-01 12:01:00", end="2024-01-01 12:01:10")
+        assert [r["seq"] for r in in_range] == list(range(61, 71))
+
+        # Numbering continues after a restart
+        assert CommandLogBuffer(start_seq=store.last_seq() + 1).append(CommandLogRecord("", "")).seq == 121
+        store.close()
+
+
+if __name__ == "__main__":
+    test_history_store()
+    print("History store tests passed")
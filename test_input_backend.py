@@ -0,0 +1,53 @@
+"""
+Test script for the command path from transcript to injected input events,
+using the recording input backend and the in-memory window backend
+"""
+from agent.command_parser import CommandParser
+from agent.input_backend import RecordingInputBackend, set_input_backend, WM_CLOSE, WM_APPCOMMAND
+from agent.window_index import WindowIndex, FakeWindowBackend, set_window_index
+
+
+def run_transcript(parser, transcript):
+    handler, confidence = parser.parse_command(transcript)
+    assert handler, f"No handler for '{transcript}'"
+    return parser.execute_command(handler, command_text=transcript)
+
+
+def test_command_path():
+    """
+    Test that spoken commands turn into the expected input events
+    """
+    backend = RecordingInputBackend()
+    set_input_backend(backend)
+    set_window_index(WindowIndex(FakeWindowBackend([
+        (101, "Spotify Premium"),
+        (202, "#general - Discord"),
+    ])))
+    parser = CommandParser()
+
+    expected = [
+        ("stop music", [("media_key", ("play_pause",))]),
+        ("volume up", [("media_key", ("volume_up",))]),
+        ("mute game", [("media_key", ("volume_mute",))]),
+        ("next track", [("media_key", ("next_track",))]),
+        ("open inventory", [("hotkey", ("i",))]),
+        ("take screenshot", [("hotkey", ("win+print screen",))]),
+        ("close active window", [("hotkey", ("alt+f4",))]),
+        ("play music", [("media_key", ("play",)), ("media_key", ("play_pause",))]),
+        ("close discord", [("send_message", (202, WM_CLOSE, 0, 0))]),
+        ("pause spotify", [("send_message", (101, WM_APPCOMMAND, 0, 0xE0001))]),
+    ]
+
+    for transcript, events in expected:
+        backend.clear()
+        result = run_transcript(parser, transcript)
+        print(f"'{transcript}' -> {result}")
+        assert backend.calls() == events, (transcript, backend.calls())
+
+    set_input_backend(None)
+    set_window_index(None)
+
+
+if __name__ == "__main__":
+    test_command_path()
+    print("Command path test passed")
@@ -0,0 +1,38 @@
+"""
+Test script for the input overflow estimate behind agent_audio_frames_dropped_total
+"""
+from agent.input_overflow import OverflowEstimator
+from agent import metrics
+
+
+def test_dropped_frames_from_the_clock():
+    """
+    Frames the clock says arrived but were neither read nor buffered are counted as dropped
+    """
+    clock = [0.0]
+    estimator = OverflowEstimator(16000, tolerance_frames=4096, clock=lambda: clock[0])
+
+    # Reading keeps up: the shortfall is within one chunk of latency
+    estimator.start()
+    for _ in range(3):
+        clock[0] += 0.256
+        estimator.read(4096)
+    clock[0] += 0.1
+    assert estimator.finish() == 0
+
+    # The loop stalled for two seconds; the buffer held only part of it
+    estimator.start()
+    clock[0] += 0.256
+    estimator.read(4096)
+    clock[0] += 2.0
+    estimator.read(4096)
+    assert estimator.finish(buffered=2000) == int(2.256 * 16000) - 8192 - 2000 - 4096
+
+    # Without start() there is nothing to estimate
+    assert estimator.finish() == 0
+    assert "agent_audio_frames_dropped_total" in metrics.registry.render()
+
+
+if __name__ == "__main__":
+    test_dropped_frames_from_the_clock()
+    print("Input overflow tests passed")
@@ -0,0 +1,74 @@
+"""
+Test script for macro compilation and timed execution
+"""
+import time
+import pytest
+from agent.command_parser import CommandParser
+from agent.macros import compile_macro, MacroRunner
+from agent.timer_wheel import TimerWheel
+from agent.input_backend import RecordingInputBackend, set_input_backend
+
+
+def test_compile_macro():
+    """
+    Waits are folded into the delay of the following step
+    """
+    macro = compile_macro({
+        "name": "test",
+        "steps": ["open_inventory", {"wait_ms": 100}, {"wait_ms": 50},
+                  {"handler": "open_application", "text": "open discord"}]
+    })
+    assert [(s.handler, s.command_text, round(s.delay, 6)) for s in macro.steps] == [
+        ("open_inventory", "open inventory", 0.0),
+        ("open_application", "open discord", 0.15),
+    ]
+
+    with pytest.raises(ValueError):
+        compile_macro({"name": "bad", "steps": ["no_such_handler"]})
+    with pytest.raises(ValueError):
+        compile_macro({"name": "empty", "steps": [{"wait_ms": 10}]})
+
+
+def test_timer_wheel_order():
+    """
+    Timers fire in deadline order, including delays longer than one wheel turn
+    """
+    wheel = TimerWheel(tick=0.001, slots=16)
+    fired = []
+    for delay in (0.05, 0.01, 0.03, 0.0):
+        wheel.schedule(delay, lambda deadline, delay=delay: fired.append(delay))
+    time.sleep(0.2)
+    wheel.stop()
+    assert fired == [0.0, 0.01, 0.03, 0.05]
+
+
+def test_macro_from_vocabulary():
+    """
+    A macro phrase starts the sequence without blocking and runs the steps in order
+    """
+    backend = RecordingInputBackend()
+    set_input_backend(backend)
+    parser = CommandParser()
+
+    handler, confidence = parser.parse_command("snap my inventory")
+    assert handler == "macro:inventory_snapshot"
+
+    runner = MacroRunner(wheel=TimerWheel(tick=0.001))
+    start = time.perf_counter()
+    run = runner.start(parser.macros[handler], parser.execute_command)
+    assert time.perf_counter() - start < 0.05
+    assert run.done.wait(2.0)
+
+    assert backend.calls() == [("hotkey", ("i",)), ("hotkey", ("win+print screen",)), ("hotkey", ("i",))]
+    timestamps = [event[2] for event in backend.events]
+    assert timestamps[1] - timestamps[0] >= 0.15
+    assert timestamps[2] - timestamps[1] >= 0.15
+    print("Step jitter (ms):", [round(j * 1000, 2) for j in run.jitter])
+    set_input_backend(None)
+
+
+if __name__ == "__main__":
+    test_compile_macro()
+    test_timer_wheel_order()
+    test_macro_from_vocabulary()
+    print("Macro tests passed")
@@ -0,0 +1,104 @@
+"""
+Test script for the agent metrics and their text exposition
+"""
+import threading
+from agent.metrics import MetricsRegistry, process_cpu_seconds
+from agent.command_parser import CommandParser
+from agent import metrics
+
+
+def test_counters_across_threads(threads=8, increments=20000):
+    """
+    Increments from many threads all land in the total
+    """
+    registry = MetricsRegistry()
+    counter = registry.counter("test_invocations_total", "Test counter", ("handler",))
+
+    def work():
+        for _ in range(increments):
+            counter.inc("volume_up")
+        counter.inc("mute_game", amount=2)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert counter.values() == {("volume_up",): threads * increments, ("mute_game",): threads * 2}
+    text = registry.render()
+    assert "# TYPE test_invocations_total counter" in text
+    assert f'test_invocations_total{{handler="volume_up"}} {threads * increments}' in text
+
+
+def test_shards_of_ended_threads_are_reclaimed():
+    """
+    Short-lived threads don't leave a shard each behind, and their counts are kept
+    """
+    registry = MetricsRegistry()
+    counter = registry.counter("test_requests_total", "Test counter")
+    histogram = registry.histogram("test_request_seconds", "Test histogram", buckets=(0.1,))
+
+    def request():
+        counter.inc()
+        histogram.observe(0.05)
+
+    for _ in range(50):
+        worker = threading.Thread(target=request)
+        worker.start()
+        worker.join()
+
+    assert counter.values() == {(): 50}
+    counts, total = histogram.values()[()]
+    assert counts == [50, 0] and abs(total - 2.5) < 1e-9
+    assert len(counter._shards) == 0 and len(histogram._shards) == 0
+    counter.inc()
+    assert counter.values() == {(): 51} and len(counter._shards) == 1
+
+
+def test_histogram_exposition():
+    """
+    Histogram buckets are cumulative and end with +Inf, _sum and _count
+    """
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_latency_seconds", "Test histogram", buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 2.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert 'test_latency_seconds_bucket{le="0.01"} 1' in lines
+    assert 'test_latency_seconds_bucket{le="0.1"} 3' in lines
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_latency_seconds_count 4" in lines
+    assert any(line.startswith("test_latency_seconds_sum 2.10") for line in lines)
+
+
+def test_process_metrics():
+    """
+    Process CPU is reported and the agent registry renders without errors
+    """
+    assert process_cpu_seconds() >= 0
+    text = metrics.registry.render()
+    assert "# TYPE process_cpu_seconds_total counter" in text
+    assert "agent_parse_cache_hits_total" in text
+
+
+def test_parse_cache_hits():
+    """
+    Repeated transcripts are served from the parse cache
+    """
+    parser = CommandParser()
+    before = sum(metrics.parse_cache_hits.values().values())
+    first = parser.parse_command("Volume  UP please")
+    second = parser.parse_command("volume up please")
+    assert first == second
+    assert sum(metrics.parse_cache_hits.values().values()) == before + 1
+
+
+if __name__ == "__main__":
+    test_counters_across_threads()
+    test_shards_of_ended_threads_are_reclaimed()
+    test_histogram_exposition()
+    test_process_metrics()
+    test_parse_cache_hits()
+    print("Metrics tests passed")
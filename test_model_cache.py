@@ -0,0 +1,167 @@
+"""
+Test script for the per-language model cache and language vocabularies
+"""
+import os
+import time
+import threading
+from agent.model_cache import ModelCache
+from agent.model_registry import language_model, selected_language, LANGUAGE_MODELS
+from agent.command_parser import CommandParser, language_vocabulary_path
+
+MB = 1024 * 1024
+
+
+class FakeProcess:
+    """
+    Resident memory that grows by a model's size when it is loaded
+    """
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.rss = 100 * MB
+        self.loaded = []
+
+    def load(self, language):
+        if language not in self.sizes:
+            raise RuntimeError(f"No model for '{language}'")
+        self.rss += self.sizes[language]
+        self.loaded.append(language)
+        return f"model-{language}"
+
+
+def test_lru_eviction_within_budget():
+    """
+    The least recently used languages are evicted once the budget is exceeded
+    """
+    clock = [0.0]
+    process = FakeProcess({"en": 300 * MB, "de": 200 * MB, "fr": 250 * MB})
+    cache = ModelCache(process.load, budget_bytes=600 * MB, rss=lambda: process.rss, clock=lambda: clock[0])
+
+    assert cache.get("en") == "model-en"
+    assert cache.get("de") == "model-de"
+    clock[0] += 10
+    assert cache.get("en") == "model-en"  # a hit, en is now the most recent
+    assert process.loaded == ["en", "de"]
+
+    # fr does not fit next to both, so the idle de goes
+    assert cache.get("fr") == "model-fr"
+    assert cache.languages() == ["en", "fr"]
+
+    stats = cache.stats()
+    assert stats["resident_bytes"] == 550 * MB and stats["budget_bytes"] == 600 * MB
+    de = stats["languages"]["de"]
+    assert (de["loaded"], de["loads"], de["evictions"], de["resident_bytes"]) == (False, 1, 1, 0)
+    assert de["load_seconds"] is not None and de["idle_seconds"] is None
+    assert stats["languages"]["en"]["resident_bytes"] == 300 * MB
+    assert stats["languages"]["en"]["idle_seconds"] == 0.0
+
+    # A model bigger than the budget is still kept while it is the one in use
+    process.sizes["ja"] = 700 * MB
+    cache.get("ja")
+    assert cache.languages() == ["ja"]
+
+    try:
+        cache.get("xx")
+        assert False, "expected the loader's error"
+    except RuntimeError:
+        pass
+    assert cache.evict("ja") and not cache.evict("ja")
+
+
+def test_pinned_language_stays():
+    """
+    Loading another language over budget never evicts a pinned one
+    """
+    process = FakeProcess({"en": 80 * MB, "de": 50 * MB, "fr": 40 * MB})
+    cache = ModelCache(process.load, budget_bytes=100 * MB, rss=lambda: process.rss, pinned=["en"])
+    cache.get("en")
+    cache.get("de")
+    assert cache.languages() == ["en", "de"]
+    # Still over budget, so the unpinned de goes to make room for fr
+    cache.get("fr")
+    assert cache.languages() == ["en", "fr"]
+    assert cache.get_nowait("en") == "model-en" and process.loaded == ["en", "de", "fr"]
+
+
+def wait_for(get, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = get()
+        if value is not None:
+            return value
+        time.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def test_background_load():
+    """
+    A slow load runs on its own thread; get_nowait() returns None meanwhile
+    """
+    release = threading.Event()
+    process = FakeProcess({"de": 200 * MB})
+
+    def slow_load(language):
+        release.wait(5)
+        return process.load(language)
+
+    cache = ModelCache(slow_load, budget_bytes=None, rss=lambda: process.rss)
+    started = time.perf_counter()
+    assert cache.get_nowait("de") is None
+    assert cache.get_nowait("de") is None  # the load already running is not started again
+    assert time.perf_counter() - started < 1.0
+    assert process.loaded == [] and cache.languages() == []
+
+    release.set()
+    assert wait_for(lambda: cache.get_nowait("de")) == "model-de"
+    assert process.loaded == ["de"]
+    assert cache.stats()["languages"]["de"]["resident_bytes"] == 200 * MB
+
+    # A failed background load is raised once; asking again retries it
+    assert cache.get_nowait("xx") is None
+    errors = []
+
+    def failed():
+        try:
+            cache.get_nowait("xx")
+        except RuntimeError as e:
+            errors.append(e)
+            return e
+    wait_for(failed)
+    assert len(errors) == 1 and cache.get_nowait("xx") is None
+
+
+def test_language_models_and_vocabularies():
+    """
+    Each language has a model name and its own vocabulary with the same profiles
+    """
+    saved = dict(os.environ)
+    try:
+        for name in ("NO_ALT_TAB_LANGUAGE", "NO_ALT_TAB_MODEL", "NO_ALT_TAB_MODEL_DE"):
+            os.environ.pop(name, None)
+        assert selected_language() == "en"
+        assert language_model("en") is None
+        assert language_model("de") == LANGUAGE_MODELS["de"]
+        assert language_model("fr") == "fr"
+        os.environ["NO_ALT_TAB_LANGUAGE"] = "DE"
+        os.environ["NO_ALT_TAB_MODEL_DE"] = "vosk-model-de-0.21"
+        assert selected_language() == "de" and language_model("de") == "vosk-model-de-0.21"
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+    english = CommandParser()
+    german = CommandParser(language_vocabulary_path("de"))
+    assert english.language == "en" and german.language == "de"
+    assert set(german.profiles) == set(english.profiles)
+    assert all(profile.language == "de" for profile in german.profiles.values())
+    assert german.parse_command("lautstärke hoch")[0] == "volume_up"
+    german.set_profile("in-game")
+    assert german.parse_command("inventar öffnen")[0] == "open_inventory"
+
+
+if __name__ == "__main__":
+    test_lru_eviction_within_budget()
+    test_pinned_language_stays()
+    test_background_load()
+    test_language_models_and_vocabularies()
+    print("Model cache tests passed")
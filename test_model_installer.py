@@ -0,0 +1,149 @@
+"""
+Test script for the model installer, against a local HTTP server with Range support
+"""
+import os
+import io
+import hashlib
+import zipfile
+import tempfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from agent.model_installer import install_model, download, extract, ModelInstallError
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+MODEL_ZIP = make_zip({
+    "vosk-model-test/README": b"test model",
+    "vosk-model-test/am/final.mdl": os.urandom(200000),
+    "vosk-model-test/conf/model.conf": b"--sample-frequency=16000",
+})
+
+
+class ModelServer(BaseHTTPRequestHandler):
+    data = MODEL_ZIP
+    cut_after = None  # drop the first connection after this many bytes
+    requests = []
+
+    def do_GET(self):
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(self.data) - 1}/{len(self.data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(self.data) - start))
+        self.end_headers()
+        type(self).requests.append(range_header)
+
+        body = self.data[start:]
+        if type(self).cut_after is not None:
+            body = body[:type(self).cut_after]
+            type(self).cut_after = None
+            self.close_connection = True
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    ModelServer.requests = []
+    server = HTTPServer(("127.0.0.1", 0), ModelServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/model.zip"
+
+
+def test_install_resumes_after_dropped_connection():
+    """
+    A connection dropped mid-download resumes with a Range request and the model lands in place
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        server, url = serve()
+        try:
+            ModelServer.cut_after = len(MODEL_ZIP) // 2
+            model_path = os.path.join(tmp, "model")
+            progress = []
+            sha256 = hashlib.sha256(MODEL_ZIP).hexdigest()
+            assert install_model(url, model_path, sha256=sha256, progress=lambda d, t: progress.append((d, t)))
+
+            assert ModelServer.requests == [None, f"bytes={len(MODEL_ZIP) // 2}-"]
+            assert progress[-1] == (len(MODEL_ZIP), len(MODEL_ZIP))
+            with open(os.path.join(model_path, "conf", "model.conf"), "rb") as f:
+                assert f.read() == b"--sample-frequency=16000"
+            # Only the model directory is left behind
+            assert os.listdir(tmp) == ["model"]
+
+            # Installing again is a no-op
+            assert install_model(url, model_path)
+            assert len(ModelServer.requests) == 2
+        finally:
+            server.shutdown()
+
+
+def test_checksum_mismatch():
+    """
+    A wrong checksum fails without creating the model directory or keeping the bad download
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        server, url = serve()
+        try:
+            model_path = os.path.join(tmp, "model")
+            assert not install_model(url, model_path, sha256="0" * 64, retries=0)
+            assert os.listdir(tmp) == []
+        finally:
+            server.shutdown()
+
+
+def test_download_complete_part_file():
+    """
+    A .part file that is already complete gets a 416 and is not downloaded again
+    """
+    class Complete(ModelServer):
+        def do_GET(self):
+            self.send_response(416)
+            self.end_headers()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = HTTPServer(("127.0.0.1", 0), Complete)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            path = os.path.join(tmp, "model.zip.part")
+            with open(path, "wb") as f:
+                f.write(MODEL_ZIP)
+            digest = download(f"http://127.0.0.1:{server.server_port}/model.zip", path)
+            assert digest.hexdigest() == hashlib.sha256(MODEL_ZIP).hexdigest()
+        finally:
+            server.shutdown()
+
+
+def test_extract_rejects_zip_slip():
+    """
+    Members that would escape the target directory are refused
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "evil.zip")
+        with open(path, "wb") as f:
+            f.write(make_zip({"README": b"ok", "../escaped": b"bad"}))
+        try:
+            extract(path, os.path.join(tmp, "model"))
+            assert False, "zip slip was not detected"
+        except ModelInstallError:
+            pass
+        assert not os.path.exists(os.path.join(tmp, "escaped"))
+
+
+if __name__ == "__main__":
+    test_install_resumes_after_dropped_connection()
+    test_checksum_mismatch()
+    test_download_complete_part_file()
+    test_extract_rejects_zip_slip()
+    print("Model installer tests passed")
@@ -0,0 +1,114 @@
+"""
+Test script for the model registry and the model benchmark
+"""
+import os
+import json
+import wave
+import tempfile
+from agent.model_registry import list_models, model_path, model_url, KNOWN_MODELS
+from agent.model_benchmark import load_corpus, word_error_rate, benchmark_model, recommend
+
+
+def make_model(path):
+    os.makedirs(os.path.join(path, "conf"))
+    with open(os.path.join(path, "conf", "model.conf"), "w") as f:
+        f.write("--sample-frequency=16000\n")
+
+
+def test_registry():
+    """
+    The legacy model/ and models/<name>/ directories are listed and resolved by name
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "model")
+        models_dir = os.path.join(tmp, "models")
+        make_model(legacy)
+        make_model(os.path.join(models_dir, "vosk-model-en-us-0.22-lgraph"))
+        os.makedirs(os.path.join(models_dir, "not-a-model"))
+
+        models = list_models(models_dir, legacy)
+        assert [m.name for m in models] == ["default", "vosk-model-en-us-0.22-lgraph"]
+        assert all(m.size_bytes > 0 for m in models)
+
+        assert model_path(None, models_dir, legacy) == legacy
+        assert model_path("default", models_dir, legacy) == legacy
+        assert model_path("large", models_dir, legacy) == os.path.join(models_dir, "large")
+        assert model_path(legacy, models_dir, legacy) == legacy
+        assert model_url("vosk-model-en-us-0.22") == KNOWN_MODELS["vosk-model-en-us-0.22"]
+        assert model_url("my-own-model") is None
+
+
+class TextRecognizer:
+    """
+    Fake recognizer whose "audio" is the ASCII text it should recognize
+    """
+
+    def __init__(self, rate):
+        self.data = b""
+
+    def AcceptWaveform(self, data):
+        self.data += data
+        return False
+
+    def Result(self):
+        return json.dumps({"text": ""})
+
+    def FinalResult(self):
+        return json.dumps({"text": self.data.decode().strip()})
+
+
+def write_utterance(directory, name, spoken, reference):
+    data = spoken.encode().ljust(len(spoken) + len(spoken) % 2)
+    with wave.open(os.path.join(directory, name + ".wav"), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(data)
+    with open(os.path.join(directory, name + ".txt"), "w") as f:
+        f.write(reference)
+
+
+def test_benchmark():
+    """
+    WER and command accuracy are measured against the reference transcripts
+    """
+    assert word_error_rate("volume up", "volume up") == 0
+    assert word_error_rate("take a screenshot", "take screenshot") == 1 / 3
+    assert word_error_rate("next track", "play next track now") == 1.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_utterance(tmp, "1", "volume up", "volume up")
+        write_utterance(tmp, "2", "volume up", "volume down")
+        write_utterance(tmp, "3", "hello there", "hello there")
+        corpus = load_corpus(tmp)
+        assert [ref for _, ref in corpus] == ["volume up", "volume down", "hello there"]
+
+        result = benchmark_model("fake", corpus, load=lambda path: TextRecognizer)
+        assert result["utterances"] == 3
+        assert result["wer"] == round(1 / 6, 4)
+        assert result["rtf"] is not None and result["peak_rss_bytes"] > 0
+        # The second utterance is misheard as another command; "hello there" is not a command
+        assert result["command_accuracy"] == 0.5
+
+
+def test_recommend():
+    """
+    The most accurate model within the CPU and memory limits is recommended
+    """
+    results = {
+        "small": {"rtf": 0.05, "wer": 0.2, "command_accuracy": 0.9, "peak_rss_bytes": 200e6},
+        "lgraph": {"rtf": 0.15, "wer": 0.1, "command_accuracy": 0.98, "peak_rss_bytes": 600e6},
+        "large": {"rtf": 0.8, "wer": 0.05, "command_accuracy": 1.0, "peak_rss_bytes": 4e9},
+        "broken": {"error": "failed to load"},
+    }
+    assert recommend(results) == "lgraph"
+    assert recommend(results, max_rss_bytes=300e6) == "small"
+    assert recommend(results, max_rtf=1.0) == "large"
+    assert recommend(results, max_rtf=0.01) is None
+
+
+if __name__ == "__main__":
+    test_registry()
+    test_benchmark()
+    test_recommend()
+    print("Model registry tests passed")
@@ -0,0 +1,67 @@
+"""
+Test script for the readiness polling utilities
+"""
+from agent.readiness import wait_for, window_appears
+from agent.window_index import WindowIndex, FakeWindowBackend
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_wait_for_backoff():
+    """
+    The poll interval grows exponentially and the result reports time-to-ready
+    """
+    fake = FakeTime()
+    result = wait_for(lambda: fake.now >= 0.3 and "ready", timeout=5.0,
+                      initial_interval=0.05, max_interval=0.5, clock=fake.clock, sleep=fake.sleep)
+
+    assert result.ready
+    assert result.value == "ready"
+    assert fake.sleeps == [0.05, 0.1, 0.2]
+    assert abs(result.elapsed - 0.35) < 1e-9
+    assert result.attempts == 4
+
+
+def test_wait_for_deadline_and_abort():
+    """
+    Waiting stops at the deadline, or earlier when the abort condition holds
+    """
+    fake = FakeTime()
+    result = wait_for(lambda: None, timeout=1.0, clock=fake.clock, sleep=fake.sleep)
+    assert not result.ready
+    assert abs(result.elapsed - 1.0) < 1e-9
+
+    fake = FakeTime()
+    result = wait_for(lambda: None, timeout=1.0, abort=lambda: fake.now > 0.1,
+                      clock=fake.clock, sleep=fake.sleep)
+    assert not result.ready
+    assert result.elapsed < 0.5
+
+
+def test_window_appears():
+    """
+    The window condition sees windows that appear after the first poll
+    """
+    backend = FakeWindowBackend()
+    condition = window_appears("spotify", WindowIndex(backend, ttl=60))
+    assert condition() is None
+    backend.add_window(7, "Spotify Free")
+    assert condition() == 7
+
+
+if __name__ == "__main__":
+    test_wait_for_backoff()
+    test_wait_for_deadline_and_abort()
+    test_window_appears()
+    print("Readiness tests passed")
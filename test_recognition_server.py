@@ -0,0 +1,204 @@
+"""
+Test script for the recognition server and its KaldiRecognizer-compatible client.
+
+A fake recognizer stands in for Vosk so no model is needed: it treats each
+chunk as text and finalizes on a chunk ending in a full stop.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from multiprocessing.connection import Client
+from agent.recognition_server import (RecognitionServer, RemoteRecognizer, RemoteModel, make_recognizer, ping,
+                                      _read_key)
+from agent.startup import ModelLoader
+
+
+class FakeRecognizer:
+    def __init__(self, rate, grammar=None):
+        self.rate = rate
+        self.words = []
+        self.text = ""
+
+    def AcceptWaveform(self, data):
+        word = data.decode()
+        if word.endswith("."):
+            self.text = " ".join(self.words + [word[:-1]])
+            self.words = []
+            return True
+        self.words.append(word)
+        return False
+
+    def Result(self):
+        return json.dumps({"text": self.text})
+
+    def PartialResult(self):
+        return json.dumps({"partial": " ".join(self.words)})
+
+    def FinalResult(self):
+        text, self.words = " ".join(self.words), []
+        return json.dumps({"text": text})
+
+    def Reset(self):
+        self.words = []
+
+
+unpickled = []
+
+
+def mark_unpickled():
+    unpickled.append("ran")
+
+
+class Payload:
+    """
+    Records being unpickled, as an attacker's payload would run code
+    """
+
+    def __reduce__(self):
+        return (mark_unpickled, ())
+
+
+def start_server(tmp, session_setup=None):
+    server = RecognitionServer(FakeRecognizer, os.path.join(tmp, "recognizer.sock"), pool_size=1,
+                               info={"model": "fake"}, session_setup=session_setup)
+    server.start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_remote_recognizer():
+    """
+    The client behaves like KaldiRecognizer and recognizers are reused between sessions
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(tmp)
+        try:
+            assert ping(server.address)["model"] == "fake"
+
+            rec = make_recognizer(RemoteModel(server.address), 16000)
+            assert rec.AcceptWaveform(b"volume") is False
+            assert json.loads(rec.PartialResult())["partial"] == "volume"
+            assert rec.AcceptWaveform(b"up.") is True
+            assert json.loads(rec.Result())["text"] == "volume up"
+            assert json.loads(rec.PartialResult())["partial"] == ""
+
+            rec.AcceptWaveform(b"next")
+            assert json.loads(rec.FinalResult())["text"] == "next"
+            rec.close()
+
+            # A second session gets the first session's recognizer back, reset
+            rec = RemoteRecognizer(16000, server.address)
+            rec.AcceptWaveform(b"mute")
+            assert json.loads(rec.PartialResult())["partial"] == "mute"
+            rec.close()
+            time.sleep(0.05)
+            info = ping(server.address)
+            assert info["sessions"] == 2 and info["created"] == 1 and info["reused"] == 1
+        finally:
+            server.close()
+
+
+def test_model_loader_attaches():
+    """
+    ModelLoader uses a running server and reports no load time
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(tmp)
+        try:
+            loader = ModelLoader(os.path.join(tmp, "missing-model"), server_address=server.address).start()
+            model = loader.wait(5)
+            assert isinstance(model, RemoteModel) and loader.load_time == 0.0
+        finally:
+            server.close()
+
+        # Without a server it falls back to loading the (here missing) local model
+        loader = ModelLoader(os.path.join(tmp, "missing-model"), server_address=server.address).start()
+        assert loader.wait(5) is None and loader.error is not None
+
+
+def test_session_setup_runs_on_decoding_thread():
+    """
+    session_setup (the governor's priority and cores) applies to the thread that decodes
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_threads = []
+        server = start_server(tmp, session_setup=lambda: setup_threads.append(threading.get_ident()))
+        decode_threads = []
+        accept = FakeRecognizer.AcceptWaveform
+
+        def recording_accept(recognizer, data):
+            decode_threads.append(threading.get_ident())
+            return accept(recognizer, data)
+
+        FakeRecognizer.AcceptWaveform = recording_accept
+        try:
+            rec = RemoteRecognizer(16000, server.address)
+            rec.AcceptWaveform(b"volume")
+            rec.close()
+        finally:
+            FakeRecognizer.AcceptWaveform = accept
+            server.close()
+        assert len(setup_threads) == 1 and decode_threads == setup_threads
+        assert setup_threads[0] != threading.get_ident()
+
+
+def test_nothing_is_unpickled():
+    """
+    A pickled message from a client that knows the key is rejected, not loaded
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(tmp)
+        try:
+            connection = Client(server.address, authkey=_read_key(server.address))
+            connection.send(Payload())
+            try:
+                connection.recv_bytes()
+            except (EOFError, OSError):
+                pass  # the server drops the session
+            connection.close()
+            time.sleep(0.05)
+            assert unpickled == []
+            assert ping(server.address)["model"] == "fake"
+        finally:
+            server.close()
+
+
+def test_refuses_files_others_could_plant():
+    """
+    Neither end uses a socket directory, socket or key that other users can touch
+    """
+    if sys.platform == 'win32':
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_server(tmp)
+        try:
+            os.chmod(server.address + ".key", 0o644)
+            assert ping(server.address) is None
+            os.chmod(server.address + ".key", 0o600)
+            os.chmod(server.address, 0o666)
+            assert ping(server.address) is None
+            os.chmod(server.address, 0o600)
+            assert ping(server.address)["model"] == "fake"
+        finally:
+            server.close()
+
+        shared = os.path.join(tmp, "shared")
+        os.mkdir(shared, 0o777)
+        os.chmod(shared, 0o777)
+        try:
+            RecognitionServer(FakeRecognizer, os.path.join(shared, "recognizer.sock")).start()
+            assert False, "expected the shared directory to be refused"
+        except PermissionError:
+            pass
+
+
+if __name__ == "__main__":
+    test_remote_recognizer()
+    test_model_loader_attaches()
+    test_session_setup_runs_on_decoding_thread()
+    test_nothing_is_unpickled()
+    test_refuses_files_others_could_plant()
+    print("Recognition server tests passed")
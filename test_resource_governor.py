@@ -0,0 +1,90 @@
+"""
+Test script for the resource governor
+"""
+import os
+import sys
+import threading
+from agent.resource_governor import (ResourceGovernor, FULL_PROFILE, cheap_profile, parse_cores,
+                                     lower_thread_priority, list_process_names, scheduling_from_env)
+from agent.window_index import WindowIndex, FakeWindowBackend
+
+
+def test_profile_follows_running_games():
+    """
+    The cheap profile is used while a configured game process or window exists
+    """
+    clock = [0.0]
+    processes = {"python3", "bash"}
+    windows = FakeWindowBackend([(1, "Notepad")])
+    governor = ResourceGovernor(cheap_profile({"volume up": "volume_up", "next track": "next_track"}),
+                                games=["CS2.exe"], game_windows=["Minecraft"], check_interval=5,
+                                list_processes=lambda: set(processes),
+                                window_index=WindowIndex(windows, ttl=0), clock=lambda: clock[0])
+    assert governor.profile() is FULL_PROFILE
+
+    processes.add("cs2.exe")
+    assert governor.profile() is FULL_PROFILE  # not checked again before the interval
+    clock[0] += 5
+    profile = governor.profile()
+    assert profile.name == "cheap" and not profile.partials
+    assert profile.grammar == ["next track", "volume up", "[unk]"]
+    assert governor.active_game == "cs2.exe"
+
+    processes.discard("cs2.exe")
+    windows.add_window(2, "Minecraft 1.20.4")
+    clock[0] += 5
+    assert governor.profile().name == "cheap" and governor.active_game == "Minecraft"
+
+    windows.remove_window(2)
+    clock[0] += 5
+    assert governor.profile() is FULL_PROFILE and governor.active_game is None
+
+
+def test_from_env():
+    """
+    The governor is off unless NO_ALT_TAB_GOVERNOR=1
+    """
+    saved = dict(os.environ)
+    try:
+        os.environ.pop("NO_ALT_TAB_GOVERNOR", None)
+        assert ResourceGovernor.from_env({"mute game": "mute_game"}) is None
+        assert scheduling_from_env() is None
+        os.environ.update(NO_ALT_TAB_GOVERNOR="1", NO_ALT_TAB_GAMES="game.exe, other.exe",
+                          NO_ALT_TAB_DECODE_CORES="1,4-5", NO_ALT_TAB_NICE="5")
+        governor = ResourceGovernor.from_env({"mute game": "mute_game"})
+        assert governor.games == {"game.exe", "other.exe"}
+        assert governor.cores == {1, 4, 5} and governor.nice == 5
+        # The recognition server reads the same settings for its session threads
+        assert scheduling_from_env() == {"nice": 5, "cores": {1, 4, 5}}
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    assert parse_cores("") is None and parse_cores("0-2") == {0, 1, 2}
+
+
+def test_thread_priority():
+    """
+    Lowering priority affects only the calling thread
+    """
+    if not sys.platform.startswith("linux"):
+        return
+    before = os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+    seen = []
+
+    def worker():
+        lower_thread_priority(5)
+        seen.append(os.getpriority(os.PRIO_PROCESS, threading.get_native_id()))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert seen == [min(19, before + 5)]
+    assert os.getpriority(os.PRIO_PROCESS, threading.get_native_id()) == before
+    assert list_process_names()
+
+
+if __name__ == "__main__":
+    test_profile_follows_running_games()
+    test_from_env()
+    test_thread_priority()
+    print("Resource governor tests passed")
@@ -0,0 +1,69 @@
+"""
+Test script for speculative target resolution from partial transcripts
+"""
+import time
+from agent.speculation import SpeculativeResolver
+from agent.commands import close_specific_window, open_application
+from agent.window_index import WindowIndex, FakeWindowBackend, set_window_index
+
+
+def test_candidates():
+    """
+    Handlers complete partial target names from their own knowledge
+    """
+    assert open_application.speculative_candidates("ch") == ["chrome"]
+    assert open_application.speculative_candidates("google ch") == ["chrome"]
+    assert open_application.canonical_app_name("chrome browser") == "chrome"
+
+    set_window_index(WindowIndex(FakeWindowBackend([(1, "#general - Discord"), (2, "Notepad")])))
+    assert close_specific_window.speculative_candidates("disc") == ["discord"]
+    assert close_specific_window.speculative_candidates("x") == []
+    set_window_index(None)
+
+
+def test_speculation_hit_and_waste():
+    """
+    A partial starts resolution in the background and the final dispatch reuses it
+    """
+    resolver = SpeculativeResolver()
+    calls = []
+
+    def slow_lookup(name):
+        calls.append(name)
+        time.sleep(0.05)
+        return f"/apps/{name}"
+
+    # Route resolution through the fake lookup
+    open_application_resolve = open_application.resolve_target
+    open_application.resolve_target = slow_lookup
+    try:
+        resolver.observe_partial("open ch")
+        resolver.observe_partial("open ch")  # the same partial twice is ignored
+        time.sleep(0.1)
+        assert calls == ["chrome"]
+
+        start = time.perf_counter()
+        assert resolver.resolve("open_application", "chrome", slow_lookup) == "/apps/chrome"
+        assert time.perf_counter() - start < 0.04
+        assert calls == ["chrome"]
+
+        # Speculated candidates that the final transcript does not use count as wasted
+        resolver.end_utterance()
+        resolver.observe_partial("open fire")
+        time.sleep(0.1)
+        assert resolver.resolve("open_application", "notepad", lambda name: "miss") == "miss"
+    finally:
+        open_application.resolve_target = open_application_resolve
+
+    stats = resolver.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["wasted"] == 1  # "firefox"
+    assert stats["saved_ms"] >= 40
+    print("Speculation stats:", stats)
+
+
+if __name__ == "__main__":
+    test_candidates()
+    test_speculation_hit_and_waste()
+    print("Speculation tests passed")
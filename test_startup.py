@@ -0,0 +1,56 @@
+"""
+Test script for startup phase reporting and background model loading
+"""
+import tempfile
+from agent.startup import StartupReport, ModelLoader, PHASE_API, PHASE_MODEL_READY, PHASE_FIRST_LISTEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_phases():
+    """
+    Phases are reported relative to process start and only the first mark counts
+    """
+    clock = FakeClock()
+    report = StartupReport(clock=clock)
+    assert report.to_dict()["phase"] == "starting"
+
+    clock.now = 0.2
+    report.mark(PHASE_API)
+    assert report.to_dict()["phase"] == "loading_model"
+
+    clock.now = 3.5
+    report.mark(PHASE_MODEL_READY)
+    clock.now = 3.6
+    report.mark(PHASE_FIRST_LISTEN)
+    clock.now = 9.0
+    report.mark(PHASE_FIRST_LISTEN)
+
+    status = report.to_dict()
+    assert status["phase"] == "listening" and status["ready"]
+    assert status["startup"] == {"api": 0.2, "model_ready": 3.5, "first_listen": 3.6}
+
+
+def test_loader_failure():
+    """
+    A model that cannot be prepared fails the report instead of blocking
+    """
+    report = StartupReport()
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = ModelLoader(tmp + "/missing", report, prepare=lambda: False).start()
+        assert loader.wait(timeout=5) is None
+    status = report.to_dict()
+    assert status["phase"] == "failed" and status["status"] == "unhealthy"
+    assert not status["ready"]
+
+
+if __name__ == "__main__":
+    test_phases()
+    test_loader_failure()
+    print("Startup tests passed")
@@ -0,0 +1,83 @@
+"""
+Test script for the incremental command statistics behind /stats
+"""
+import random
+import time
+from agent.stats import CommandStats, QuantileSketch
+from agent.command_log import STATUS_OK, STATUS_ERROR, STATUS_REJECTED
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sketch_accuracy():
+    """
+    Sketch quantiles stay within the relative accuracy of the exact ones
+    """
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-3, 1) for _ in range(50000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) / exact <= 0.02, q
+
+
+def test_sliding_windows():
+    """
+    Old commands leave the one-minute window but stay in the hour and session
+    """
+    clock = FakeClock()
+    stats = CommandStats(clock=clock)
+    stats.record("volume_up", STATUS_OK, 0.010)
+    stats.record("volume_up", STATUS_ERROR, 0.030)
+    stats.record(None, STATUS_REJECTED, 0.001)
+
+    clock.now += 120
+    stats.record("mute_game", STATUS_OK, 0.020)
+
+    snapshot = stats.snapshot()
+    assert snapshot["1m"]["transcripts"] == 1
+    assert list(snapshot["1m"]["handlers"]) == ["mute_game"]
+
+    hour = snapshot["1h"]
+    assert (hour["transcripts"], hour["recognized"], hour["rejected"]) == (4, 3, 1)
+    assert hour["recognized_ratio"] == 0.75
+    assert hour["handlers"]["volume_up"]["error_rate"] == 0.5
+    assert abs(hour["handlers"]["volume_up"]["latency_ms"]["p50"] - 10) < 0.2
+    assert snapshot["session"] == hour
+
+    clock.now += 7200
+    snapshot = stats.snapshot()
+    assert snapshot["1h"]["transcripts"] == 0
+    assert snapshot["session"]["transcripts"] == 4
+
+
+def test_snapshot_cost_is_flat(records=200000):
+    """
+    Reporting time does not grow with the number of recorded commands
+    """
+    stats = CommandStats()
+    handlers = ["volume_up", "volume_down", "mute_game", "take_screenshot"]
+    timings = []
+    for batch in range(2):
+        for i in range(records // 2):
+            stats.record(handlers[i % 4], STATUS_OK, 0.001 + (i % 100) / 1000)
+        start = time.perf_counter()
+        stats.snapshot()
+        timings.append(time.perf_counter() - start)
+    assert timings[1] < max(timings[0] * 3, 0.01)
+
+
+if __name__ == "__main__":
+    test_sketch_accuracy()
+    test_sliding_windows()
+    test_snapshot_cost_is_flat()
+    print("Stats tests passed")
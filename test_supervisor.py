@@ -0,0 +1,151 @@
+"""
+Test script for the agent supervisor, using small Python child processes
+"""
+import os
+import sys
+import time
+import socket
+import tempfile
+from agent.supervisor import Supervisor, Heartbeat, process_usage, STATE_RUNNING, STATE_CRASH_LOOP
+
+# Child serving /health; it exits after EXIT_AFTER seconds or hangs if HANG is set.
+# Like agent/main.py it stops through sys.exit on SIGTERM or when its stdin closes
+CHILD = r"""
+import os, sys, json, time, atexit, signal, _thread, threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+class Health(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if os.environ.get("HANG") and time.time() - started > 0.3:
+            time.sleep(60)
+        body = json.dumps({"status": "healthy", "phase": "listening", "ready": True,
+                           "heartbeat_age": 0.1}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    def log_message(self, *args):
+        pass
+
+started = time.time()
+print("child started", flush=True)
+atexit.register(lambda: print("child exited cleanly", flush=True))
+signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+if os.environ.get("NO_ALT_TAB_SUPERVISED") == "1":
+    def watch_stdin():
+        while os.read(sys.stdin.fileno(), 1024):
+            pass
+        _thread.interrupt_main()
+    threading.Thread(target=watch_stdin, daemon=True).start()
+server = HTTPServer(("127.0.0.1", int(sys.argv[1])), Health)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+time.sleep(float(os.environ.get("EXIT_AFTER", 60)))
+sys.exit(3)
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_supervisor(tmp, env, **kwargs):
+    port = free_port()
+    options = dict(env=dict(os.environ, **env), log_dir=tmp, start_timeout=5, check_interval=0.1, liveness_failures=2,
+                   backoff_initial=0.05, backoff_max=0.2)
+    options.update(kwargs)
+    return Supervisor([sys.executable, "-c", CHILD, str(port)], f"http://127.0.0.1:{port}/health", **options)
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_restarts_and_samples():
+    """
+    A child that exits is restarted; a running child's CPU and RSS are sampled
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        supervisor = make_supervisor(tmp, {"EXIT_AFTER": "1", "HANG": ""}, crash_loop_restarts=10)
+        supervisor.start()
+        try:
+            assert wait_until(lambda: supervisor.state == STATE_RUNNING and supervisor.rss_bytes)
+            first_pid = supervisor.status()["pid"]
+            status = supervisor.status()
+            assert status["phase"] == "listening" and status["rss_bytes"] > 0
+
+            assert wait_until(lambda: supervisor.restarts >= 1 and supervisor.state == STATE_RUNNING)
+            assert supervisor.status()["pid"] != first_pid
+            assert supervisor.last_exit_code == 3
+        finally:
+            supervisor.stop()
+        assert supervisor.process.poll() is not None
+        # The log files were closed and the children wrote to them
+        with open(os.path.join(tmp, "agent_stdout.log")) as f:
+            assert f.read().count("child started") >= 2
+
+
+def test_stop_runs_child_exit_hooks():
+    """
+    Stopping lets the child shut down through its atexit hooks instead of killing it
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        supervisor = make_supervisor(tmp, {"EXIT_AFTER": "60", "HANG": ""})
+        supervisor.start()
+        try:
+            assert wait_until(lambda: supervisor.state == STATE_RUNNING)
+        finally:
+            supervisor.stop()
+        with open(os.path.join(tmp, "agent_stdout.log")) as f:
+            assert "child exited cleanly" in f.read()
+
+
+def test_hang_and_crash_loop():
+    """
+    A child that stops answering is restarted, and repeated failures stop the restarts
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        states = []
+        supervisor = make_supervisor(tmp, {"EXIT_AFTER": "60", "HANG": "1"}, crash_loop_restarts=2,
+                                     on_change=lambda status: states.append(status["state"]))
+        supervisor.start()
+        try:
+            assert wait_until(lambda: supervisor.state == STATE_CRASH_LOOP, timeout=30)
+            assert supervisor.restarts == 2
+            transitions = [s for i, s in enumerate(states) if i == 0 or states[i - 1] != s]
+            assert transitions == ["starting", "running", "restarting"] * 2 + ["starting", "running", "crash_loop"]
+            # The hung child was terminated rather than left running
+            assert supervisor.process.poll() is not None
+        finally:
+            supervisor.stop()
+
+
+def test_heartbeat_and_usage():
+    """
+    Heartbeat ages follow the clock and this process's own usage can be read
+    """
+    clock = [100.0]
+    heartbeat = Heartbeat(clock=lambda: clock[0])
+    assert heartbeat.age() is None
+    heartbeat.beat()
+    clock[0] += 2.5
+    assert heartbeat.age() == 2.5
+
+    usage = process_usage(os.getpid())
+    if sys.platform.startswith("linux"):
+        cpu, rss = usage
+        assert cpu > 0 and rss > 0
+
+
+if __name__ == "__main__":
+    test_restarts_and_samples()
+    test_stop_runs_child_exit_hooks()
+    test_hang_and_crash_loop()
+    test_heartbeat_and_usage()
+    print("Supervisor tests passed")
@@ -0,0 +1,27 @@
+"""
+Test script for the timer wheel
+"""
+import threading
+from agent.timer_wheel import TimerWheel
+
+
+def test_schedule_after_stop():
+    """
+    A timer scheduled right after stop() still fires, even if the old wheel thread is still winding down
+    """
+    wheel = TimerWheel(tick=0.001)
+    fired = threading.Event()
+    wheel.schedule(0.001, lambda deadline: fired.set())
+    assert fired.wait(1)
+
+    for _ in range(20):
+        fired.clear()
+        wheel.stop()
+        wheel.schedule(0.001, lambda deadline: fired.set())
+        assert fired.wait(1), "timer scheduled after stop() never fired"
+    wheel.stop()
+
+
+if __name__ == "__main__":
+    test_schedule_after_stop()
+    print("Timer wheel tests passed")
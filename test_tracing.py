@@ -0,0 +1,79 @@
+"""
+Test script for per-utterance tracing in Chrome trace-event format
+"""
+import os
+import json
+import time
+import tempfile
+from agent import tracing
+from agent.command_parser import CommandParser
+
+
+def load_events(path):
+    # Trace files are JSON arrays without the closing bracket
+    with open(path, encoding="utf-8") as f:
+        return json.loads(f.read().rstrip().rstrip(",") + "]")
+
+
+def test_trace_file():
+    """
+    Spans end up as complete events tagged with their utterance
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.json")
+        tracing.enable_tracing(path)
+        try:
+            tracing.begin_utterance()
+            CommandParser().parse_command("volume up")
+            with tracing.span("decode") as span:
+                span.set(final=True)
+        finally:
+            tracing.disable_tracing()
+
+        events = load_events(path)
+        spans = {e["name"]: e for e in events if e["ph"] == "X"}
+        assert spans["parse"]["args"]["handler"] == "volume_up"
+        assert spans["parse"]["args"]["utterance"] == 1
+        assert spans["decode"]["args"]["final"] is True
+        assert spans["decode"]["dur"] >= 0
+        assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in events)
+
+
+def test_rotation():
+    """
+    The trace file rotates and every rotated file is loadable on its own
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.json")
+        tracing.enable_tracing(path, max_bytes=5000, backup_count=2)
+        try:
+            for i in range(200):
+                with tracing.span("capture", chunk=i):
+                    pass
+        finally:
+            tracing.disable_tracing()
+
+        assert sorted(os.listdir(tmp)) == ["trace.json", "trace.json.1", "trace.json.2"]
+        for name in os.listdir(tmp):
+            assert load_events(os.path.join(tmp, name))
+
+
+def test_disabled_overhead(count=200000):
+    """
+    A span costs well under a microsecond while tracing is disabled
+    """
+    tracing.disable_tracing()
+    start = time.perf_counter()
+    for _ in range(count):
+        with tracing.span("capture"):
+            pass
+    per_span = (time.perf_counter() - start) / count
+    print(f"{per_span * 1e9:.0f} ns per disabled span")
+    assert per_span < 2e-6
+
+
+if __name__ == "__main__":
+    test_trace_file()
+    test_rotation()
+    test_disabled_overhead()
+    print("Tracing tests passed")
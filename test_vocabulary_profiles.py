@@ -0,0 +1,100 @@
+"""
+Test script for vocabulary profiles switched by the foreground window
+"""
+import json
+import os
+import tempfile
+from agent.command_parser import CommandParser
+from agent.vocabulary_profiles import ProfileSwitcher, ALL_PROFILE
+from agent.window_index import FakeWindowBackend
+
+
+def test_default_vocabulary_profiles():
+    """
+    The shipped profiles keep game commands away from the desktop and vice versa
+    """
+    parser = CommandParser()
+    assert set(parser.profiles) == {ALL_PROFILE, "in-game", "desktop"}
+    assert parser.profile.name == ALL_PROFILE and parser.default_profile == "desktop"
+    assert parser.parse_command("open chrome")[0] == "open_application"
+
+    game = parser.set_profile("in-game")
+    assert game.grammar[-1] == "[unk]" and "open chrome" not in game.grammar
+    assert parser.parse_command("open chrome") == (None, 0)
+    # Macro phrases still win over the single commands they contain
+    assert parser.parse_command("snap my inventory")[0] == "macro:inventory_snapshot"
+
+    parser.set_profile("desktop")
+    assert parser.parse_command("open inventory")[0] != "open_inventory"
+    assert parser.parse_command("open chrome")[0] == "open_application"
+
+
+def test_grammar_keeps_application_names():
+    """
+    Profiles with the open and close handlers can still decode every known application name
+    """
+    from agent.commands.open_application import COMMON_APPS
+    from agent.resource_governor import cheap_profile
+    parser = CommandParser()
+    desktop = parser.profiles["desktop"].grammar
+    for app_key, app_info in COMMON_APPS.items():
+        for name in [app_key] + app_info["aliases"]:
+            assert f"open {name}" in desktop and f"launch {name}" in desktop and f"close {name}" in desktop
+    assert desktop[-1] == "[unk]" and desktop.count("open chrome") == 1
+    assert "open notepad" not in parser.profiles["in-game"].grammar
+    # The governor's cheap profile during a game keeps them too
+    assert "close google chrome" in cheap_profile(parser.phrases_to_handlers).grammar
+
+
+def test_switcher_follows_foreground_window():
+    """
+    The first profile matching the focused window title wins, otherwise the default
+    """
+    vocabulary = {
+        "commands": [
+            {"phrases": ["mute game"], "handler": "mute_game"},
+            {"phrases": ["open chrome"], "handler": "open_application"},
+            {"phrases": ["volume up"], "handler": "volume_up"},
+        ],
+        "profiles": [
+            {"name": "in-game", "windows": ["Minecraft"], "handlers": ["mute_game", "volume_up"]},
+            {"name": "desktop", "handlers": ["open_application", "volume_up"]},
+            {"name": "broken", "handlers": ["no_such_handler"]},
+        ],
+        "default_profile": "desktop",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "vocabulary.json")
+        with open(path, "w") as f:
+            json.dump(vocabulary, f)
+        parser = CommandParser(path)
+    # Invalid profiles are skipped like invalid macros
+    assert "broken" not in parser.profiles
+
+    clock = [0.0]
+    windows = FakeWindowBackend([(1, "Minecraft 1.20.4"), (2, "Notepad")])
+    switcher = ProfileSwitcher(parser, windows, check_interval=1.0, clock=lambda: clock[0])
+
+    windows.focus(1)
+    profile = switcher.update()
+    assert profile is parser.profiles["in-game"] and profile.grammar == ["mute game", "volume up", "[unk]"]
+    assert parser.parse_command("mute game")[0] == "mute_game"
+
+    # Not looked at again before the interval
+    windows.focus(2)
+    assert switcher.update().name == "in-game"
+    clock[0] += 1.0
+    assert switcher.update().name == "desktop"
+    # The parse cache is per profile
+    assert parser.parse_command("mute game", fuzzy_match=False) == (None, 0)
+
+    windows.focus(None)
+    clock[0] += 1.0
+    assert switcher.update().name == "desktop" and switcher.switches == 2
+
+
+if __name__ == "__main__":
+    test_default_vocabulary_profiles()
+    test_grammar_keeps_application_names()
+    test_switcher_follows_foreground_window()
+    print("Vocabulary profile tests passed")
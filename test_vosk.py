@@ -1,54 +1,41 @@
-import os
 import sys
 import json
 import wave
 import pyaudio
-import requests
-import zipfile
-import io
-from vosk import Model, KaldiRecognizer
+from agent.model_installer import install_model
+from agent.recognition_server import ping, RemoteRecognizer
 
 def download_model():
     """Download the Vosk model if it doesn't exist"""
-    model_path = "model"
-    model_url = "https://alphacephei.com/vosk/models/vosk-model-small-en-us-0.15.zip"
-    
-    if not os.path.exists(model_path):
-        print(f"Downloading Vosk model from {model_url}")
-        print("This may take a few minutes depending on your internet connection...")
-        
-        response = requests.get(model_url, stream=True)
-        if response.status_code == 200:
-            z = zipfile.ZipFile(io.BytesIO(response.content))
-            z.extractall()
-            # Rename the extracted folder to 'model'
-            extracted_dir = z.namelist()[0].split('/')[0]
-            if os.path.exists(extracted_dir) and extracted_dir != model_path:
-                os.rename(extracted_dir, model_path)
-            print(f"Model downloaded and extracted to {model_path}")
-        else:
-            print(f"Failed to download model: HTTP {response.status_code}")
-            return False
-    else:
-        print(f"Model already exists at {model_path}")
-    
-    return True
+    return install_model(model_path="model", progress=print_progress)
+
+def print_progress(done, total):
+    if total:
+        print(f"Downloading model: {100 * done / total:.0f}%", end="\r")
 
 def test_vosk_recognition():
     """Test speech recognition using Vosk"""
-    if not download_model():
-        print("Failed to download the model. Exiting.")
-        return
-    
-    print("\nInitializing Vosk speech recognition...")
-    model = Model("model")
-    
     # Configure audio settings
     CHUNK = 4096
     FORMAT = pyaudio.paInt16
     CHANNELS = 1
     RATE = 16000
     
+    # Attach to a running recognition server instead of loading the model
+    server = ping()
+    if server is not None:
+        print(f"\nUsing recognition server (model {server.get('model')})")
+        rec = RemoteRecognizer(RATE)
+    else:
+        if not download_model():
+            print("Failed to download the model. Exiting.")
+            return
+        
+        print("\nInitializing Vosk speech recognition...")
+        from vosk import Model, KaldiRecognizer
+        model = Model("model")
+        rec = KaldiRecognizer(model, RATE)
+    
     p = pyaudio.PyAudio()
     
     print("\nVosk Speech Recognition Test")
@@ -65,9 +52,6 @@ def test_vosk_recognition():
                         input=True,
                         frames_per_buffer=CHUNK)
         
-        # Create recognizer
-        rec = KaldiRecognizer(model, RATE)
-        
         print("\nListening... (Press Ctrl+C to stop)")
         
         while True:
@@ -0,0 +1,117 @@
+"""
+Test script for the wake phrase gate, with a fake keyword spotter
+"""
+import json
+from agent.wake_word import WakeWordGate, GATE_CLOSED, GATE_OPENED, GATE_OPEN
+
+
+class FakeSpotter:
+    """
+    Treats each chunk as one spoken word; a word ending in "." ends the utterance
+    """
+
+    def __init__(self):
+        self.words = []
+        self.text = ""
+        self.resets = 0
+
+    def AcceptWaveform(self, data):
+        word = data.decode()
+        self.words.append(word.rstrip("."))
+        if word.endswith("."):
+            self.text, self.words = " ".join(self.words), []
+            return True
+        return False
+
+    def Result(self):
+        return json.dumps({"text": self.text})
+
+    def PartialResult(self):
+        return json.dumps({"partial": " ".join(self.words)})
+
+    def Reset(self):
+        self.words = []
+        self.resets += 1
+
+
+class LaggingSpotter(FakeSpotter):
+    """
+    Partial results miss the last two words, as a real decoder's lag behind the audio
+    """
+
+    def PartialResult(self):
+        return json.dumps({"partial": " ".join(self.words[:-2])})
+
+
+def test_gate_window():
+    """
+    Chunks pass only after the wake phrase, until the window ends or is closed
+    """
+    clock = [0.0]
+    gate = WakeWordGate("Hey  Agent", window=2.0, clock=lambda: clock[0])
+    spotter = FakeSpotter()
+    gate.set_spotter(spotter)
+    assert gate.grammar == ["hey agent", "[unk]"]
+
+    # Background speech never opens the gate
+    for word in [b"open", b"inventory."]:
+        assert gate.accept(word) == GATE_CLOSED
+
+    # The gate opens on the partial result, before the utterance ends
+    assert gate.accept(b"hey") == GATE_CLOSED
+    assert gate.accept(b"agent") == GATE_OPENED
+    assert spotter.resets == 1
+    assert gate.take_pre_roll() == [b"inventory.", b"hey"] and gate.take_pre_roll() == []
+    clock[0] += 1
+    assert gate.accept(b"volume") == GATE_OPEN
+    clock[0] += 1.5
+    assert gate.accept(b"up.") == GATE_CLOSED
+    assert gate.activations == 1 and gate.passed_chunks == 2 and gate.spotted_chunks == 5
+
+    # Closing after a command ends the window early
+    gate.accept(b"hey")
+    assert gate.accept(b"agent.") == GATE_OPENED
+    gate.close()
+    assert not gate.is_open and gate.accept(b"mute") == GATE_CLOSED
+    assert gate.release_spotter() is spotter and gate.accept(b"hey") == GATE_CLOSED
+
+
+def test_pre_roll_keeps_command_start():
+    """
+    Replaying the pre-roll recovers the words said before the late spot
+    """
+    gate = WakeWordGate("hey agent", window=5.0, clock=lambda: 0.0)
+    gate.set_spotter(LaggingSpotter())
+    rec = FakeSpotter()
+    for word in [b"hey", b"agent", b"volume", b"up."]:
+        gate_state = gate.accept(word)
+        if gate_state == GATE_CLOSED:
+            continue
+        if gate_state == GATE_OPENED:
+            # Spotted only on the last chunk, once "volume" was already said
+            assert word == b"up."
+            rec.Reset()
+            for chunk in gate.take_pre_roll():
+                rec.AcceptWaveform(chunk)
+        final = rec.AcceptWaveform(word)
+    assert final and gate.strip(json.loads(rec.Result())["text"]) == "volume up"
+
+
+def test_strip():
+    """
+    The wake phrase, or the end of it heard by the full recognizer, is removed
+    """
+    gate = WakeWordGate("hey agent")
+    assert gate.strip("hey agent volume up") == "volume up"
+    assert gate.strip("agent next track") == "next track"
+    assert gate.strip("hey agent") == ""
+    assert gate.strip("take screenshot") == "take screenshot"
+    # Pre-roll from before the wake phrase is dropped too
+    assert gate.strip("inventory hey agent mute game") == "mute game"
+
+
+if __name__ == "__main__":
+    test_gate_window()
+    test_pre_roll_keeps_command_start()
+    test_strip()
+    print("Wake word tests passed")
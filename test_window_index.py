@@ -0,0 +1,52 @@
+"""
+Test script for the cached window index, using the in-memory window backend
+"""
+from agent.window_index import WindowIndex, FakeWindowBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_index():
+    """
+    Test lookups, TTL caching and invalidation of the window index
+    """
+    backend = FakeWindowBackend([
+        (1, "Spotify Premium"),
+        (2, "General - Discord"),
+        (3, ""),
+        (4, "Google Chrome"),
+    ])
+    clock = FakeClock()
+    index = WindowIndex(backend, ttl=0.5, clock=clock)
+
+    assert index.find("discord") == [(2, "General - Discord")]
+    assert index.find_first("SPOTIFY") == 1
+    assert index.find_first("firefox") is None
+    # Untitled windows are never part of the index
+    assert len(index.find("")) == 3
+    assert backend.enumerations == 1
+
+    # A new window is not seen until the snapshot expires
+    backend.add_window(5, "Mozilla Firefox")
+    assert index.find_first("firefox") is None
+    clock.now += 1.0
+    assert index.find_first("firefox") == 5
+    assert backend.enumerations == 2
+
+    # Invalidation forces a fresh enumeration
+    backend.remove_window(2)
+    index.invalidate()
+    assert index.find("discord") == []
+    assert backend.enumerations == 3
+
+    print("Window index test passed")
+
+
+if __name__ == "__main__":
+    test_window_index()